@@ -1,15 +1,30 @@
+import asyncio
+import importlib
+import os
 import subprocess
 import time
 import sys
+from collections import deque
 from datetime import datetime, timedelta
 
-# Liste des scripts à exécuter dans l'ordre
+from monitor.favorite_filter import FavoriteSorter
+from monitor.pipeline import Checkpoint, Pipeline, Stage
+from monitor.state_store import atomic_write_json
+from monitor.storage import open_store
+
+# Liste des scripts à exécuter dans l'ordre (mode --legacy)
 SCRIPTS = [
     "01_ids_league.py",
     "02_scrape.py",
     "03_tri_cotes.py"
 ]
 
+# --- PIPELINE EN FLUX ---
+# ligues -> matchs -> favoris -> surveillance, reliés par des files bornées
+FAVORITES_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "50"))
+CONTROL_HOST = os.getenv("MONITOR_CONTROL_HOST", "127.0.0.1")
+CONTROL_PORT = int(os.getenv("MONITOR_CONTROL_PORT", 8765))
+
 def run_script(script_name):
     """Exécute un script python et attend qu'il finisse"""
     print(f"🔹 Lancement de {script_name}...")
@@ -23,6 +38,224 @@ def run_script(script_name):
     except Exception as e:
         print(f"❌ Erreur inattendue : {e}")
 
+def load_script(name):
+    """Importe un script 0X_*.py (rechargé à chaque cycle pour la date du jour)"""
+    module = sys.modules.get(name)
+    return importlib.reload(module) if module else importlib.import_module(name)
+
+def sorting_key(match):
+    """Clé de checkpoint du tri : ID + cotes 1/2 (un match aux cotes modifiées est retrié)"""
+    odds = match.get('odds') or {}
+    return f"{match['id']}:{odds.get('1')}:{odds.get('2')}"
+
+async def notify_monitor(host=CONTROL_HOST, port=CONTROL_PORT, timeout=2):
+    """Demande au démon de surveillance de relire les favoris (sans attendre son housekeeping)"""
+    try:
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+        writer.write(b"reload\n")
+        await writer.drain()
+        await asyncio.wait_for(reader.readline(), timeout)
+        writer.close()
+        return True
+    except (OSError, asyncio.TimeoutError):
+        return False
+
+class DiscoveryPipeline:
+    """
+    Un cycle 01 -> 02 -> 03 dans le même processus, en flux.
+
+    Les ligues déjà connues partent au scraping immédiatement ; la découverte
+    01 tourne en parallèle dans sa propre tâche et, dès qu'elle finit, ses
+    nouvelles ligues passent devant les connues restantes. Chaque ligue scrapée
+    envoie ses nouveaux matchs au tri, et chaque favori est aussitôt remis
+    à la surveillance : démon en mémoire (--monitor) ou démon externe
+    prévenu par son socket de contrôle.
+    """
+
+    def __init__(self, daemon=None):
+        self.s01 = load_script("01_ids_league")
+        self.s02 = load_script("02_scrape")
+        self.s03 = load_script("03_tri_cotes")
+        self.date_str = self.s02.DATE_STR
+        self.daemon = daemon
+        self.store = open_store()
+
+        base_dir = os.path.join("match", self.date_str)
+        self.metrics_file = os.path.join(base_dir, "pipeline_metrics.json")
+        progress = self.s02.load_progress()
+        self.checkpoint = Checkpoint(os.path.join(base_dir, ".pipeline_checkpoint.json"))
+        self.checkpoint.seed("matchs", progress)
+        self.merger = self.s02.LeagueMerger(self.store, progress)
+        self.favorites = FavoriteSorter(self.store, self.date_str, self.s03.BANDES)
+
+        self.limiter = self.s02.HostRateLimiter()
+        self.popup_state = {"accepted": False}
+        self.context = None
+        self.pages = None
+        self.notified = 0
+
+    # --- Etapes ---
+
+    async def discover_leagues(self):
+        known, _ = self.store.read("leagues", self.date_str)
+        seen = {self.s02.league_key(lg) for lg in known}
+        backlog = deque(known)
+
+        # Lancée avant le premier yield : la file "matchs" étant bornée, la
+        # source reste bloquée tant que les ligues connues ne sont pas scrapées.
+        # Cache de découverte : rapide si rien n'a changé.
+        discovery = asyncio.create_task(self.s01.run_scraper())
+        try:
+            while backlog or discovery is not None:
+                if discovery is not None and discovery.done():
+                    try:
+                        discovery.result()
+                    except Exception as e:
+                        print(f"   ⚠️ [ligues] Découverte en échec : {e}")
+                    discovery = None
+                    leagues, _ = self.store.read("leagues", self.date_str)
+                    fresh = [lg for lg in leagues if self.s02.league_key(lg) not in seen]
+                    seen.update(self.s02.league_key(lg) for lg in fresh)
+                    if fresh:
+                        print(f"   🆕 {len(fresh)} nouvelles ligues, scrapées en priorité")
+                    backlog.extendleft(reversed(fresh))
+                elif backlog:
+                    yield backlog.popleft()
+                else:
+                    await asyncio.wait({discovery})
+        finally:
+            if discovery is not None and not discovery.done():
+                discovery.cancel()
+                await asyncio.gather(discovery, return_exceptions=True)
+
+    async def scrape_league(self, league):
+        page = await self.pages.get()
+        try:
+            page, matches = await self.s02.scrape_league(
+                self.context, page, league, self.limiter, self.popup_state, "pipeline"
+            )
+        finally:
+            self.pages.put_nowait(page)
+        if matches is None:
+            raise RuntimeError(f"{league['name']} : échec après {self.s02.LEAGUE_RETRIES + 1} tentatives")
+        # Nouveaux matchs et matchs aux cotes modifiées : le tri des favoris
+        # peut ainsi émettre un favori "changed" (cote, pronostic ou bande)
+        for match in self.merger.merge(league, matches):
+            yield match
+
+    async def filter_favorite(self, match):
+        change = self.favorites.feed(match)
+        if change:
+            self.favorites.persist([change])
+            yield change[1]
+
+    async def hand_over(self, favorite):
+        if self.daemon is not None:
+            status = self.daemon.scheduler.upsert(favorite)
+            if status == "new":
+                print(f"   🎯 Surveillance : {favorite['match_complet']} ({favorite['heure']})")
+            elif status == "changed":
+                print(f"   🔁 Mis à jour : {favorite['match_complet']} (cote {favorite['cote']})")
+        else:
+            self.store.export_json(self.date_str, ["favorites"])
+            if await notify_monitor():
+                self.notified += 1
+        yield favorite
+
+    def pending_matches(self):
+        """Matchs déjà en base mais pas encore triés (reprise)"""
+        matches, _ = self.store.read("matches", self.date_str)
+        return [m for m in matches if not self.checkpoint.is_done("favoris", sorting_key(m))]
+
+    def pending_favorites(self):
+        favorites, _ = self.store.read("favorites", self.date_str)
+        return favorites
+
+    # --- Exécution ---
+
+    def build(self):
+        workers = max(1, self.s02.LEAGUE_WORKERS)
+        return Pipeline([
+            Stage("ligues", self.discover_leagues),
+            Stage("matchs", self.scrape_league, after="ligues", workers=workers,
+                  maxsize=workers * 2, key=self.s02.league_key),
+            Stage("favoris", self.filter_favorite, after="matchs",
+                  maxsize=FAVORITES_QUEUE_SIZE, key=sorting_key, backlog=self.pending_matches),
+            Stage("surveillance", self.hand_over, after="favoris", maxsize=FAVORITES_QUEUE_SIZE,
+                  backlog=self.pending_favorites if self.daemon is not None else None),
+        ], self.checkpoint)
+
+    async def run(self):
+        """
+        Returns:
+            dict: Métriques par étape
+        """
+        pipeline = self.build()
+        async with self.s02.async_playwright() as p:
+            browser = await p.chromium.launch(headless=True, args=["--start-maximized"])
+            try:
+                self.context = await browser.new_context(no_viewport=True)
+                self.pages = asyncio.Queue()
+                for _ in range(max(1, self.s02.LEAGUE_WORKERS)):
+                    self.pages.put_nowait(await self.context.new_page())
+                metrics = await pipeline.run()
+                # Cycle terminé : les ligues ne sont sautées qu'à la reprise d'un
+                # cycle interrompu, le cycle suivant les rescrape toutes
+                # (les IDs déjà en base évitent les doublons).
+                self.checkpoint.clear("matchs")
+                self.s02.clear_progress()
+            finally:
+                self.store.export_json(self.date_str, ["matches", "favorites"])
+                self.store.close()
+                await browser.close()
+
+        pipeline.print_metrics()
+        if self.daemon is None and self.notified == 0 and metrics["surveillance"]["out"]:
+            print("   ℹ️ Démon de surveillance injoignable : il relira les favoris à son prochain cycle.")
+        atomic_write_json(self.metrics_file, {"finished_at": datetime.now().isoformat(), "stages": metrics})
+        return metrics
+
+async def run_pipeline_cycle(daemon=None):
+    try:
+        await DiscoveryPipeline(daemon).run()
+    except Exception as e:
+        print(f"❌ Erreur du pipeline : {e}")
+
+async def run_pipeline_forever(with_monitor=False, once=False):
+    """Cycle horaire du pipeline, avec le démon de surveillance dans le même processus si demandé"""
+    daemon = daemon_task = None
+    if with_monitor:
+        from monitor.daemon import MonitorDaemon
+        daemon = MonitorDaemon(control_host=CONTROL_HOST, control_port=CONTROL_PORT)
+        daemon_task = asyncio.create_task(daemon.run())
+
+    try:
+        while True:
+            start_time = datetime.now()
+            print(f"\n==================================================")
+            print(f"⏰ Début du cycle : {start_time.strftime('%H:%M:%S')}")
+            print(f"==================================================")
+            await run_pipeline_cycle(daemon)
+            if once and daemon is None:
+                return
+
+            wait_seconds = get_seconds_until_next_hour()
+            next_run = datetime.now() + timedelta(seconds=wait_seconds)
+            print(f"\n💤 Cycle terminé. Prochain lancement prévu à : {next_run.strftime('%H:%M:%S')}")
+            if daemon is None:
+                await asyncio.sleep(wait_seconds)
+                continue
+            # Le démon continue la surveillance entre deux cycles (arrêt : --stop de scheduler_monitor.py)
+            try:
+                await asyncio.wait_for(daemon.stop_event.wait(), wait_seconds if not once else None)
+            except asyncio.TimeoutError:
+                continue
+            return
+    finally:
+        if daemon_task is not None:
+            daemon.stop_event.set()
+            await daemon_task
+
 def get_seconds_until_next_hour():
     """Calcule le nombre de secondes à attendre jusqu'à la prochaine heure pile"""
     now = datetime.now()
@@ -31,7 +264,7 @@ def get_seconds_until_next_hour():
     seconds = (next_hour - now).total_seconds()
     return seconds
 
-def main():
+def run_legacy():
     print("🚀 DÉMARRAGE DU PLANIFICATEUR (SCHEDULER)")
     print("   Les scripts seront lancés séquentiellement chaque heure.")
     
@@ -57,6 +290,17 @@ def main():
         # 3. Dodo jusqu'à la prochaine heure
         time.sleep(wait_seconds)
 
+def main():
+    # python 00_scheduler.py              -> pipeline en flux, toutes les heures
+    # python 00_scheduler.py --once       -> un seul cycle du pipeline
+    # python 00_scheduler.py --monitor    -> pipeline + démon de surveillance dans le même processus
+    # python 00_scheduler.py --legacy     -> ancienne chaîne 01/02/03 en sous-processus
+    if "--legacy" in sys.argv:
+        run_legacy()
+        return
+    print("🚀 DÉMARRAGE DU PIPELINE (ligues -> matchs -> favoris -> surveillance)")
+    asyncio.run(run_pipeline_forever(with_monitor="--monitor" in sys.argv, once="--once" in sys.argv))
+
 if __name__ == "__main__":
     try:
         main()
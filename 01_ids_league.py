@@ -2,10 +2,16 @@ import asyncio
 import json
 import os
 import re  # 👈 AJOUTÉ POUR LE NETTOYAGE DU NOM
+import sys
+import time
 from datetime import datetime
 from playwright.async_api import async_playwright
 from bs4 import BeautifulSoup
 
+from monitor.api_parser import decode_payload
+from monitor.state_store import atomic_write_json
+from monitor.storage import open_store
+
 # --- CONFIGURATION ---
 URL_1XBET = "https://1xbet.cm/fr/line/football"
 
@@ -16,6 +22,15 @@ if not os.path.exists(BASE_DIR):
     os.makedirs(BASE_DIR)
 OUTPUT_FILE = os.path.join(BASE_DIR, "ids_championnats_24h.json")
 
+# --- CACHE DE DÉCOUVERTE ---
+# La liste des ligues change peu dans la journée : on ne refait le parcours
+# complet du menu que si le cache a expiré ou si le nombre de championnats
+# annoncé par l'API du menu (GetChampsZip, un seul chargement de page) a changé.
+CACHE_FILE = os.path.join(BASE_DIR, ".leagues_cache.json")
+LEAGUES_CACHE_TTL = int(os.getenv("LEAGUES_CACHE_TTL", str(6 * 3600)))  # Secondes
+MENU_FEED_MARKERS = ("GetChampsZip",)
+MENU_CHECK_WAIT = 15        # Secondes d'attente de l'API du menu
+
 async def hover_sidebar_area(page):
     try:
         viewport = page.viewport_size
@@ -25,34 +40,25 @@ async def hover_sidebar_area(page):
         await page.mouse.move(x, y)
     except: pass
 
-async def step_1_force_popup_close(page):
+async def step_1_force_popup_close(page, timeout=60000):
     """
-    BOUCLE BLOQUANTE (Max 60s)
+    Attend le popup (max `timeout` ms) et le ferme dès qu'il apparaît.
     """
     print("\n🛑 ÉTAPE 1 : GESTION DU POPUP")
     btn_selector = ".notification-age-restriction__actions button"
     
-    attempt = 0
-    max_attempts = 60 
-    
-    while attempt < max_attempts:
-        if await page.locator(btn_selector).is_visible():
-            print("   👀 Popup DÉTECTÉ ! Clic...")
-            try:
-                await page.locator(btn_selector).click(force=True)
-                await asyncio.sleep(1)
-                if not await page.locator(btn_selector).is_visible():
-                    print("   ✅ Popup FERMÉ.")
-                    return True
-            except: pass
-        else:
-            if attempt % 5 == 0:
-                print(f"   ⏳ En attente du popup... ({attempt}s)")
-        
-        await asyncio.sleep(1)
-        attempt += 1
+    try:
+        await page.locator(btn_selector).wait_for(state="visible", timeout=timeout)
+    except:
+        print("   ❌ TIMEOUT Popup. On continue quand même.")
+        return True
 
-    print("   ❌ TIMEOUT Popup. On continue quand même.")
+    print("   👀 Popup DÉTECTÉ ! Clic...")
+    try:
+        await page.locator(btn_selector).click(force=True)
+        await page.locator(btn_selector).wait_for(state="hidden", timeout=5000)
+        print("   ✅ Popup FERMÉ.")
+    except: pass
     return True 
 
 async def step_2_open_sidebar(page):
@@ -69,7 +75,9 @@ async def step_2_open_sidebar(page):
         if await toggle_btn.is_visible():
             print("   👉 Ouverture du menu...")
             await toggle_btn.evaluate("e => e.click()")
-            await asyncio.sleep(2)
+            try:
+                await page.locator(".sports-menu-main").first.wait_for(state="visible", timeout=5000)
+            except: pass
             return True
         else:
             print("   ❌ Bouton menu introuvable.")
@@ -93,13 +101,11 @@ async def step_3_apply_filter(page):
         
         print("   👉 Clic sur le filtre...")
         await trigger.click(force=True)
-        await asyncio.sleep(1)
 
         par_jour = page.locator("text='Par jour'").first
         try:
             await par_jour.wait_for(state="visible", timeout=5000)
             await par_jour.click(force=True)
-            await asyncio.sleep(1)
         except: pass
 
         today = page.locator("text=\"Aujourd'hui\"").first
@@ -107,8 +113,8 @@ async def step_3_apply_filter(page):
             await today.wait_for(state="visible", timeout=5000)
             print("   👉 Clic 'Aujourd'hui'...")
             await today.click(force=True)
-            print("   ⏳ Chargement des données matchs (10s)...")
-            await asyncio.sleep(10)
+            print("   ⏳ Chargement des données matchs...")
+            await wait_for_network_idle(page)
             return True
         except:
             print("   ❌ Impossible de cliquer sur 'Aujourd'hui'.")
@@ -117,43 +123,42 @@ async def step_3_apply_filter(page):
         print(f"   ❌ ERREUR CRITIQUE ÉTAPE 3 : {e}")
         return False
 
+async def wait_for_network_idle(page, timeout=10000):
+    """Attend la fin des requêtes en cours (au lieu d'une pause fixe)"""
+    try:
+        await page.wait_for_load_state("networkidle", timeout=timeout)
+    except: pass
+
 # --- NOUVELLE FONCTION POUR DÉPLIER LES MENUS ---
+EXPAND_TOGGLES_JS = """
+(sidebar) => {
+    sidebar.scrollTop = sidebar.scrollHeight;
+    const toggles = sidebar.querySelectorAll(".sports-menu-app-champ-with-sub-champs-group__toggle");
+    let opened = 0;
+    for (const toggle of toggles) {
+        if (!toggle.classList.contains("ui-nav-link-toggle--is-toggled") && toggle.offsetParent !== null) {
+            toggle.click();
+            opened++;
+        }
+    }
+    return [toggles.length, opened];
+}
+"""
+
 async def expand_all_sub_menus(page, sidebar):
     print("   📂 Déploiement des sous-menus (Pays/Ligues)...")
     
-    # 1. On scrolle vers le bas de la sidebar pour forcer le chargement de tous les éléments
+    # Scroll + ouverture de tous les groupes fermés en un seul appel navigateur
     try:
-        # On scrolle progressivement pour déclencher le rendu
-        for _ in range(3):
-            await sidebar.evaluate("el => el.scrollTop = el.scrollHeight")
-            await asyncio.sleep(1)
-    except: pass
-
-    # 2. On cherche les boutons "Toggle" qui ne sont PAS encore ouverts
-    toggle_selector = ".sports-menu-app-champ-with-sub-champs-group__toggle"
-    
-    # On récupère tous les boutons toggles
-    toggles = await sidebar.locator(toggle_selector).all()
-    print(f"   👀 {len(toggles)} groupes détectés. Vérification ouverture...")
-
-    count_opened = 0
-    for toggle in toggles:
-        try:
-            # On vérifie si c'est déjà ouvert via la classe CSS
-            class_attr = await toggle.get_attribute("class")
-            if "ui-nav-link-toggle--is-toggled" not in class_attr:
-                # Si c'est fermé, on clique pour ouvrir
-                if await toggle.is_visible():
-                    await toggle.click(force=True)
-                    count_opened += 1
-                    # Petite pause pour ne pas saturer le navigateur
-                    await asyncio.sleep(0.1)
-        except:
-            continue
+        total, count_opened = await sidebar.evaluate(EXPAND_TOGGLES_JS)
+    except Exception as e:
+        print(f"   ⚠️ Déploiement impossible : {e}")
+        return
+    print(f"   👀 {total} groupes détectés.")
             
     if count_opened > 0:
-        print(f"   ✅ {count_opened} sous-menus ouverts. Pause de stabilisation (3s)...")
-        await asyncio.sleep(3)
+        print(f"   ✅ {count_opened} sous-menus ouverts. Attente du chargement...")
+        await wait_for_network_idle(page, timeout=5000)
     else:
         print("   ℹ️ Tous les menus semblaient déjà ouverts ou aucun trouvé.")
 
@@ -217,35 +222,16 @@ async def step_4_extract_data(page):
         if leagues:
             print(f"   ✅ {len(leagues)} championnats trouvés sur la page.")
             
-            # --- LOGIQUE DE FUSION (MERGE) ---
-            existing_data = []
-            
-            # 1. Tenter de lire le fichier existant
-            if os.path.exists(OUTPUT_FILE):
-                try:
-                    with open(OUTPUT_FILE, "r", encoding="utf-8") as f:
-                        content = f.read().strip()
-                        if content:
-                            existing_data = json.loads(content)
-                except Exception as e:
-                    print(f"   ⚠️ Fichier existant corrompu ou illisible, on repart à zéro. ({e})")
-                    existing_data = []
-
-            # 2. Créer un Set des IDs existants pour une recherche rapide
-            existing_ids = {item['id'] for item in existing_data}
-            
-            # 3. Ajouter seulement ce qui manque
-            added_count = 0
-            for l in leagues:
-                if l['id'] not in existing_ids:
-                    existing_data.append(l)
-                    added_count += 1
-            
-            print(f"   🔄 FUSION : {added_count} nouveaux championnats ajoutés. Total dans le fichier : {len(existing_data)}")
+            # --- FUSION (MERGE) : seuls les IDs inconnus sont ajoutés ---
+            store = open_store()
+            try:
+                added_count = store.add("leagues", DATE_STR, leagues)
+                total = len(store.ids("leagues", DATE_STR))
+                store.export_json(DATE_STR, ["leagues"])
+            finally:
+                store.close()
 
-            # 4. Sauvegarder la liste consolidée
-            with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-                json.dump(existing_data, f, indent=4, ensure_ascii=False)
+            print(f"   🔄 FUSION : {added_count} nouveaux championnats ajoutés. Total : {total}")
             
             return True
         return False
@@ -254,31 +240,126 @@ async def step_4_extract_data(page):
         print(f"   ❌ Erreur extraction : {e}")
         return False
 
-async def run_scraper():
+def load_cache():
+    try:
+        with open(CACHE_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+def count_menu_champs(payload):
+    """Nombre de championnats dans une réponse GetChampsZip (None si illisible)"""
+    try:
+        value = decode_payload(payload).get("Value")
+    except Exception:
+        return None
+    if not isinstance(value, list):
+        return None
+    return sum(1 for champ in value if isinstance(champ, dict) and (champ.get("LI") or champ.get("CI")))
+
+class MenuWatcher:
+    """Relève le nombre de championnats annoncé par l'API du menu pendant le chargement"""
+
+    def __init__(self, page):
+        self.count = None
+        self._seen = asyncio.Event()
+        self._page = page
+        page.on("response", self._on_response)
+
+    def detach(self):
+        """Arrête l'écoute (le parcours filtré rappelle l'API du menu)"""
+        try:
+            self._page.remove_listener("response", self._on_response)
+        except Exception:
+            pass
+
+    async def _on_response(self, response):
+        if not any(marker in response.url for marker in MENU_FEED_MARKERS):
+            return
+        try:
+            count = count_menu_champs(await response.body())
+        except Exception:
+            return
+        if count is not None:
+            self.count = count
+            self._seen.set()
+
+    async def wait(self, timeout=MENU_CHECK_WAIT):
+        try:
+            await asyncio.wait_for(self._seen.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return self.count
+
+def recrawl_reason(cache, known_leagues, menu_count, now=None):
+    """
+    Raison de refaire le parcours complet (None si le cache est valide).
+
+    Un nombre de championnats illisible (API non capturée) ne force pas le
+    parcours : seul le TTL s'applique alors.
+    """
+    now = now or time.time()
+    if not known_leagues:
+        return "aucune ligue connue pour aujourd'hui"
+    if not cache.get("crawled_at"):
+        return "pas de cache"
+    age = now - cache["crawled_at"]
+    if age >= LEAGUES_CACHE_TTL:
+        return f"cache expiré ({age / 3600:.1f} h)"
+    if menu_count is not None and cache.get("menu_count") is not None and menu_count != cache["menu_count"]:
+        return f"nombre de championnats modifié ({cache['menu_count']} -> {menu_count})"
+    return None
+
+async def run_scraper(force=False):
+    store = open_store()
+    try:
+        known_leagues = len(store.ids("leagues", DATE_STR))
+    finally:
+        store.close()
+    cache = load_cache()
+
     async with async_playwright() as p:
         print("🚀 Lancement...")
         
         # 🟢 COMMENTAIRE AJOUTÉ ICI : AFFICHE LE NAVIGATEUR
         # C'est ici que l'on configure le navigateur pour qu'il soit visible (headless=False)
-        browser = await p.chromium.launch(headless=True, slow_mo=200, args=["--start-maximized"])
-        
-        context = await browser.new_context(no_viewport=True)
-        page = await context.new_page()
-        
-        print(f"🌐 Connexion...")
+        browser = await p.chromium.launch(headless=True, args=["--start-maximized"])
         try:
-            await page.goto(URL_1XBET, wait_until="domcontentloaded", timeout=60000)
-        except: pass
+            context = await browser.new_context(no_viewport=True)
+            page = await context.new_page()
+            menu = MenuWatcher(page)
+            
+            print(f"🌐 Connexion...")
+            try:
+                await page.goto(URL_1XBET, wait_until="domcontentloaded", timeout=60000)
+            except: pass
 
-        await step_1_force_popup_close(page)
-        if not await step_2_open_sidebar(page): return
-        if not await step_3_apply_filter(page): return
-        if await step_4_extract_data(page):
-            print("\n✨ SUCCÈS TOTAL ✨")
-        
-        print("Fin dans 10s...")
-        await asyncio.sleep(10)
-        await browser.close()
+            # Vérification légère : un chargement de page + l'API du menu.
+            # Le nombre relevé AVANT le parcours est celui mis en cache : c'est
+            # lui que la prochaine vérification (page non filtrée) comparera.
+            menu_count = await menu.wait()
+            menu.detach()
+            if not force:
+                reason = recrawl_reason(cache, known_leagues, menu_count)
+                if reason is None:
+                    age_min = (time.time() - cache["crawled_at"]) / 60
+                    print(f"♻️ Cache valide ({known_leagues} ligues, {age_min:.0f} min, "
+                          f"{menu_count if menu_count is not None else '?'} championnats au menu) : rien à faire.")
+                    return
+                print(f"🔄 Parcours complet : {reason}")
+
+            await step_1_force_popup_close(page)
+            if not await step_2_open_sidebar(page): return
+            if not await step_3_apply_filter(page): return
+            if await step_4_extract_data(page):
+                atomic_write_json(CACHE_FILE, {
+                    "crawled_at": time.time(),
+                    "menu_count": menu_count,
+                })
+                print("\n✨ SUCCÈS TOTAL ✨")
+        finally:
+            await browser.close()
 
 if __name__ == "__main__":
-    asyncio.run(run_scraper())
\ No newline at end of file
+    # Usage : python 01_ids_league.py [--force]
+    asyncio.run(run_scraper(force="--force" in sys.argv))
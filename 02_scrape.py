@@ -2,9 +2,16 @@ import asyncio
 import json
 import os
 import random
+import time
 from datetime import datetime
+from urllib.parse import urlparse
 from playwright.async_api import async_playwright
-from bs4 import BeautifulSoup
+
+from monitor.league_feed import feed_mentions_league, is_feed_url, league_id_from_url, parse_league_feed
+from monitor.league_parser import GAMES_HTML_JS, parse_league_html, today_tokens
+from monitor.rate_limit import TokenBucket
+from monitor.state_store import atomic_write_json
+from monitor.storage import open_store
 
 # --- CONFIGURATION ---
 BASE_URL = "https://1xbet.cm"
@@ -14,41 +21,48 @@ DATE_STR = datetime.now().strftime("%Y-%m-%d")
 INPUT_DIR = os.path.join("match", DATE_STR)
 INPUT_FILE = os.path.join(INPUT_DIR, "ids_championnats_24h.json")
 OUTPUT_FILE = os.path.join(INPUT_DIR, "matchs_details.json")
+PROGRESS_FILE = os.path.join(INPUT_DIR, ".ligues_traitees.json")  # Reprise après crash (effacé en fin de run)
 
-# --- CONFIGURATION DATE STRICTE ---
-MOIS_FR = {
-    1: "janvier", 2: "février", 3: "mars", 4: "avril", 5: "mai", 6: "juin",
-    7: "juillet", 8: "août", 9: "septembre", 10: "octobre", 11: "novembre", 12: "décembre"
-}
+# --- PARALLÉLISME ---
+LEAGUE_WORKERS = int(os.getenv("SCRAPE_WORKERS", "4"))          # Pages ouvertes en parallèle
+REQUESTS_PER_SECOND = float(os.getenv("SCRAPE_RATE", "0.5"))    # Navigations par seconde et par hôte
+RATE_BURST = 2                                                  # Rafale autorisée par hôte
+LEAGUE_TIMEOUT = 90         # Secondes max par tentative de ligue
+LEAGUE_RETRIES = 2          # Tentatives supplémentaires après échec
+RETRY_BACKOFF = 5           # Secondes (doublé à chaque tentative, + aléa)
 
-now = datetime.now()
-# Format 1 : "29/12"
-TODAY_SLASH = now.strftime("%d/%m") 
-# Format 2 : "29 décembre"
-TODAY_LONG = f"{now.day} {MOIS_FR[now.month]}"
+# --- CONFIGURATION DATE STRICTE ---
+TODAY_TOKENS = today_tokens()  # ("29/12", "29 décembre", "29.12")
+TODAY_SLASH, TODAY_LONG, _ = TODAY_TOKENS
 
 print(f"📅 FILTRE STRICT ACTIVÉ : On ne garde que [{TODAY_SLASH}] ou [{TODAY_LONG}]")
 
-# Mots à bannir
-BANNED_TEAMS = [
-    "à domicile", "à l'extérieur", "home", "away", 
-    "buts", "goals", "corner", "carton", "penalty",
-    "équipe", "team", "joueur", "player", "ace", "faute",
-    "first", "second", "period", "half"
-]
+# --- COLLECTE ---
+# "feed" : flux JSON de la ligue intercepté (repli DOM automatique), "dom" : DOM seul
+LEAGUE_COLLECTOR = os.getenv("LEAGUE_COLLECTOR", "feed")
+FEED_WAIT = 8               # Secondes d'attente du flux après chargement
+TODAY_DATE = datetime.now().date()
+
+# Fixtures (monitor/league_parser.py et monitor/league_feed.py)
+SAVE_LEAGUE_HTML = os.getenv("SAVE_LEAGUE_HTML", "False") == "True"
+SAVE_LEAGUE_FEED = os.getenv("SAVE_LEAGUE_FEED", "False") == "True"
+LEAGUE_HTML_DIR = os.path.join(INPUT_DIR, "league_html")
+LEAGUE_FEED_DIR = os.path.join(INPUT_DIR, "league_feed")
 
-async def handle_popup_after_nav(page):
-    """ Gestion du popup après navigation """
+async def handle_popup_after_nav(page, timeout=10000):
+    """ Gestion du popup après navigation (True si le popup a été validé) """
     # print("      ⏳ Vérif popup...")
     btn_selector = ".notification-age-restriction__actions button"
     try:
-        await page.locator(btn_selector).wait_for(state="visible", timeout=10000)
+        await page.locator(btn_selector).wait_for(state="visible", timeout=timeout)
         await asyncio.sleep(0.5)
         await page.locator(btn_selector).click(force=True)
         try:
             await page.locator(btn_selector).wait_for(state="hidden", timeout=3000)
         except: pass
-    except: pass
+        return True
+    except:
+        return False
 
 async def wait_for_data_load(page):
     """ Scroll et attente des cotes """
@@ -57,188 +71,280 @@ async def wait_for_data_load(page):
         await page.locator(".ui-market__value:text-matches('\\d+\\.\\d+')").first.wait_for(state="visible", timeout=5000)
     except: pass
 
-def parse_match_html(match_html, league_name):
-    """Analyse le HTML et filtre STRICTEMENT la date"""
-    soup = BeautifulSoup(str(match_html), 'html.parser')
-    
-    try:
-        # 1. Équipes
-        team_elements = soup.select(".dashboard-game-team-info__name")
-        if len(team_elements) < 2: return None
-        
-        home_team = team_elements[0].get_text(strip=True)
-        away_team = team_elements[1].get_text(strip=True)
-        
-        # 2. Filtrage Mots Bannis
-        if any(b in home_team.lower() for b in BANNED_TEAMS) or \
-           any(b in away_team.lower() for b in BANNED_TEAMS):
-            return None
-
-        # 3. DATE ET HEURE (VÉRIFICATION STRICTE)
-        date_elem = soup.select_one(".dashboard-game-info__date")
-        time_elem = soup.select_one(".dashboard-game-info__time")
-        
-        # Récupération propre de la date
-        raw_date = date_elem.get_text(strip=True) if date_elem else ""
-        start_time = time_elem.get_text(strip=True) if time_elem else "N/A"
-        
-        # --- LOGIQUE DE FILTRAGE DATE ---
-        # Si une date est présente (si vide, c'est parfois du live ou "tout de suite", on garde par prudence si time existe)
-        if raw_date:
-            raw_date_clean = raw_date.lower().strip()
-            
-            # Cas 1 : Format "29/12" (Slash détecté)
-            if "/" in raw_date_clean:
-                if TODAY_SLASH not in raw_date_clean:
-                    return None # C'est une autre date (ex: 30/12)
-
-            # Cas 2 : Format "29 décembre" (Pas de slash, mais texte)
-            elif any(char.isalpha() for char in raw_date_clean):
-                if TODAY_LONG.lower() not in raw_date_clean:
-                    return None # C'est une autre date (ex: 30 décembre)
-            
-            # Cas 3 : Format "29.12" (Point détecté - au cas où 1xbet change)
-            elif "." in raw_date_clean:
-                today_dot = now.strftime("%d.%m")
-                if today_dot not in raw_date_clean:
-                    return None
-
-        # 4. ID et Lien
-        link_elem = soup.select_one(".dashboard-game-block__link")
-        match_url = link_elem.get('href') if link_elem else ""
-        
-        match_id = "N/A"
-        if match_url:
-            parts = match_url.split('/')
-            if parts:
-                last_part = parts[-1]
-                match_id = last_part.split('-')[0] if '-' in last_part else last_part
-
-        # 5. Cotes
-        odds = {"1": "-", "X": "-", "2": "-"}
-        markets = soup.select(".dashboard-markets__market")
-        
-        for market in markets:
-            btn = market.select_one(".ui-market__toggle")
-            val = market.select_one(".ui-market__value")
-            
-            if btn and val:
-                label = btn.get("aria-label")
-                odd_value = val.get_text(strip=True)
-                
-                if odd_value and odd_value != "-":
-                    if label == "V1": odds["1"] = odd_value
-                    elif label == "X": odds["X"] = odd_value
-                    elif label == "V2": odds["2"] = odd_value
-
-        return {
-            "id": match_id,
-            "league": league_name,
-            "home": home_team,
-            "away": away_team,
-            "date": raw_date if raw_date else TODAY_SLASH, # On met la date du jour si vide
-            "time": start_time,
-            "odds": odds,
-            "url": match_url
-        }
-    except: return None
-
-async def extract_matches_from_league(page, league_url, league_name):
+class HostRateLimiter:
+    """Un token bucket par hôte, partagé par toutes les pages"""
+
+    def __init__(self, rate=REQUESTS_PER_SECOND, burst=RATE_BURST):
+        self.rate = rate
+        self.burst = burst
+        self.buckets = {}
+
+    async def acquire(self, url):
+        host = urlparse(url).netloc
+        bucket = self.buckets.get(host)
+        if bucket is None:
+            bucket = self.buckets[host] = TokenBucket(self.rate, self.burst)
+        await bucket.acquire()
+
+
+def _save_fixture(directory, league_url, ext, content):
+    os.makedirs(directory, exist_ok=True)
+    fixture = os.path.join(directory, f"{league_url.rstrip('/').split('/')[-1]}.{ext}")
+    with open(fixture, "wb" if isinstance(content, bytes) else "w") as f:
+        f.write(content)
+
+async def extract_matches_from_league(page, league_url, league_name, limiter=None, popup_state=None):
+    """
+    Extrait les matchs du jour d'une ligue.
+
+    Mode "feed" : le flux JSON de la ligue est intercepté pendant le
+    chargement (epoch, IDs, cotes) ; sans flux, lecture du DOM.
+    Une erreur de navigation est propagée (la ligue sera retentée) ;
+    une page sans match retourne une liste vide.
+
+    popup_state["accepted"] passe à True dès que le popup d'âge a été
+    validé une fois : les pages suivantes ne l'attendent plus que 2 s.
+    """
     full_url = BASE_URL + league_url if not league_url.startswith("http") else league_url
     print(f"   🌍 Navigation : {league_name}")
-    
+
+    use_feed = LEAGUE_COLLECTOR == "feed"
+    league_id = league_id_from_url(league_url)
+    captured = []
+    feed_seen = asyncio.Event()
+
+    async def on_response(response):
+        if not is_feed_url(response.url):
+            return
+        try:
+            raw = await response.body()
+        except Exception:
+            return
+        captured.append(raw)
+        if not feed_seen.is_set() and feed_mentions_league(response.url, raw, league_id):
+            feed_seen.set()
+            if SAVE_LEAGUE_FEED:
+                _save_fixture(LEAGUE_FEED_DIR, league_url, "json", raw)
+
+    if use_feed:
+        page.on("response", on_response)
     try:
+        if limiter is not None:
+            await limiter.acquire(full_url)
         await page.goto(full_url, wait_until="domcontentloaded", timeout=60000)
-        await handle_popup_after_nav(page)
 
-        try:
-            await page.locator(".dashboard-game").first.wait_for(state="visible", timeout=10000)
-        except:
-            print("      ⚠️ Aucun match détecté.")
-            return []
-
-        await wait_for_data_load(page)
-        
-        match_elements = await page.locator("li.dashboard-game").all()
-        matches_found = []
-        
-        for match_locator in match_elements:
-            html = await match_locator.inner_html()
-            # Le filtrage de date se fait ici
-            match_data = parse_match_html(html, league_name)
-            
-            if match_data and match_data['time'] != "N/A":
-                 matches_found.append(match_data)
-        
-        print(f"      ⚽ {len(matches_found)} matchs valides pour AUJOURD'HUI.")
-        return matches_found
-
-    except Exception as e:
-        print(f"      ❌ Erreur technique : {e}")
-        return []
+        feed_matches = None
+        if use_feed:
+            try:
+                await asyncio.wait_for(feed_seen.wait(), FEED_WAIT)
+            except asyncio.TimeoutError:
+                pass
+            if feed_seen.is_set():
+                feed_matches = parse_league_feed(captured, league_name, league_url, TODAY_DATE)
+                print(f"      📡 {len(feed_matches)} matchs du jour via le flux ({league_name}).")
+                if not SAVE_LEAGUE_HTML:
+                    return feed_matches
+            else:
+                print(f"      ↩️ Flux non capturé, lecture du DOM ({league_name}).")
+    finally:
+        if use_feed:
+            page.remove_listener("response", on_response)
 
-async def run_scraper():
-    if not os.path.exists(INPUT_FILE):
-        print(f"❌ Fichier d'entrée manquant : {INPUT_FILE}")
-        return
+    popup_state = popup_state if popup_state is not None else {"accepted": False}
+    if await handle_popup_after_nav(page, 2000 if popup_state["accepted"] else 10000):
+        popup_state["accepted"] = True
 
-    with open(INPUT_FILE, "r", encoding="utf-8") as f:
-        leagues_list = json.load(f)
+    try:
+        await page.locator(".dashboard-game").first.wait_for(state="visible", timeout=10000)
+    except:
+        print(f"      ⚠️ Aucun match détecté ({league_name}).")
+        return feed_matches if feed_matches is not None else []
+
+    await wait_for_data_load(page)
     
-    print(f"📂 {len(leagues_list)} championnats à traiter.")
+    # Un seul aller-retour navigateur pour tous les matchs, parsing lxml en un passage
+    games_html = await page.evaluate(GAMES_HTML_JS)
+    if SAVE_LEAGUE_HTML:
+        _save_fixture(LEAGUE_HTML_DIR, league_url, "html", games_html)
+    if feed_matches is not None:
+        return feed_matches
 
-    # 1. CHARGEMENT DES DONNÉES EXISTANTES
-    all_matches = []
-    if os.path.exists(OUTPUT_FILE):
+    # Le filtrage de date se fait ici
+    matches_found = parse_league_html(games_html, league_name, TODAY_TOKENS)
+    
+    print(f"      ⚽ {len(matches_found)} matchs valides pour AUJOURD'HUI ({league_name}).")
+    return matches_found
+
+def league_key(league):
+    return str(league.get("id") or league.get("url"))
+
+def load_progress():
+    """Ligues déjà traitées par le run interrompu (reprise après crash)"""
+    try:
+        with open(PROGRESS_FILE, "r", encoding="utf-8") as f:
+            return set(json.load(f))
+    except (OSError, json.JSONDecodeError):
+        return set()
+
+def clear_progress():
+    """
+    Fin de run : la progression ne sert qu'à reprendre un run interrompu.
+    Les runs suivants (toutes les heures) repassent sur toutes les ligues,
+    les IDs déjà connus suffisant à éviter les doublons.
+    """
+    try:
+        os.remove(PROGRESS_FILE)
+    except FileNotFoundError:
+        pass
+
+class LeagueMerger:
+    """
+    Fusion incrémentale des résultats, ligue par ligue, dès leur arrivée.
+
+    Les matchs sont écrits dans le store AVANT que la ligue soit marquée
+    traitée : après un crash, une ligue est au pire refaite (les IDs déjà
+    connus sont ignorés), jamais perdue. Un match déjà connu dont les cotes
+    ont changé est mis à jour (upsert) et renvoyé comme un nouveau.
+    """
+
+    def __init__(self, store, done):
+        self.store = store
+        self.done = done
+        matches, _ = store.read("matches", DATE_STR)
+        self.known_odds = {m['id']: m.get('odds') for m in matches}
+        self.merged = 0
+
+    @property
+    def existing_ids(self):
+        return self.known_odds.keys()
+
+    def merge(self, league, matches):
+        """
+        Returns:
+            list: Matchs nouveaux ou dont les cotes ont changé (pour le tri des favoris)
+        """
+        new_matches = [m for m in matches if m['id'] not in self.known_odds]
+        changed = [m for m in matches
+                   if m['id'] in self.known_odds and m.get('odds') != self.known_odds[m['id']]]
+        added_count = self.store.add("matches", DATE_STR, new_matches) if new_matches else 0
+        if changed:
+            self.store.upsert("matches", DATE_STR, changed)
+        self.known_odds.update((m['id'], m.get('odds')) for m in new_matches + changed)
+        if added_count > 0:
+            print(f"      ➕ {added_count} nouveaux matchs ajoutés ({league['name']}).")
+        if changed:
+            print(f"      🔁 {len(changed)} matchs aux cotes modifiées ({league['name']}).")
+
+        self.done.add(league_key(league))
+        atomic_write_json(PROGRESS_FILE, sorted(self.done))
+
+        # Export JSON intermédiaire (backend SQLite uniquement)
+        self.merged += 1
+        if self.merged % 3 == 0:
+            self.store.export_json(DATE_STR, ["matches"])
+        return new_matches + changed
+
+async def scrape_league(context, page, league, limiter, popup_state, label=""):
+    """
+    Une ligue avec timeout et retries (page neuve après chaque échec).
+
+    Returns:
+        tuple: (page à réutiliser, matchs ou None si toutes les tentatives ont échoué)
+    """
+    for attempt in range(LEAGUE_RETRIES + 1):
         try:
-            with open(OUTPUT_FILE, "r", encoding="utf-8") as f:
-                content = f.read().strip()
-                if content:
-                    all_matches = json.loads(content)
-            print(f"🔄 Reprise : {len(all_matches)} matchs déjà existants chargés.")
+            matches = await asyncio.wait_for(
+                extract_matches_from_league(page, league['url'], league['name'], limiter, popup_state),
+                timeout=LEAGUE_TIMEOUT
+            )
         except Exception as e:
-            print(f"⚠️ Erreur lecture fichier existant ({e}), on repart à zéro.")
-            all_matches = []
+            reason = "timeout" if isinstance(e, asyncio.TimeoutError) else e
+            print(f"      ❌ [{label}] {league['name']} tentative {attempt + 1} : {reason}")
+            # Page potentiellement bloquée : on repart d'une page neuve
+            try:
+                await page.close()
+            except Exception:
+                pass
+            page = await context.new_page()
+            if attempt < LEAGUE_RETRIES:
+                await asyncio.sleep(RETRY_BACKOFF * 2 ** attempt + random.uniform(0, 2))
+            continue
+
+        return page, matches
+    return page, None
+
+async def league_worker(worker_id, context, queue, limiter, merger, stats, popup_state):
+    """Vide la file de ligues avec sa propre page (timeouts + retries)"""
+    page = await context.new_page()
+    try:
+        while True:
+            try:
+                league = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+
+            page, matches = await scrape_league(context, page, league, limiter, popup_state, worker_id)
+            if matches is None:
+                stats["failed"].append(league['name'])
+            else:
+                merger.merge(league, matches)
+                stats["ok"] += 1
+            queue.task_done()
+    finally:
+        try:
+            await page.close()
+        except Exception:
+            pass
+
+async def run_scraper():
+    store = open_store()
+    leagues_list, _ = store.read("leagues", DATE_STR)
+    if not leagues_list:
+        print(f"❌ Aucun championnat pour {DATE_STR} ({INPUT_FILE})")
+        store.close()
+        return
     
-    # Création d'un Set d'IDs pour éviter les doublons rapidement
-    existing_ids = {m['id'] for m in all_matches}
+    # 1. LIGUES ET IDS DÉJÀ CONNUS (reprise)
+    done = load_progress()
+    todo = [lg for lg in leagues_list if league_key(lg) not in done]
+    merger = LeagueMerger(store, done)
+    if merger.existing_ids or done:
+        print(f"🔄 Reprise : {len(merger.existing_ids)} matchs déjà existants, "
+              f"{len(leagues_list) - len(todo)} ligues déjà traitées.")
+    print(f"📂 {len(todo)} championnats à traiter ({LEAGUE_WORKERS} pages en parallèle).")
+
+    queue = asyncio.Queue()
+    for league in todo:
+        queue.put_nowait(league)
+    limiter = HostRateLimiter()
+    stats = {"ok": 0, "failed": []}
+    popup_state = {"accepted": False}
+    started = time.perf_counter()
 
     async with async_playwright() as p:
         print("🚀 Lancement...")
-        browser = await p.chromium.launch(headless=True, slow_mo=500, args=["--start-maximized"])
+        browser = await p.chromium.launch(headless=True, args=["--start-maximized"])
         context = await browser.new_context(no_viewport=True)
-        page = await context.new_page()
 
         print("🌐 Démarrage...")
+        try:
+            workers = [
+                asyncio.create_task(league_worker(w, context, queue, limiter, merger, stats, popup_state))
+                for w in range(max(1, min(LEAGUE_WORKERS, len(todo))))
+            ]
+            await asyncio.gather(*workers)
+            clear_progress()
+        finally:
+            # Export final (y compris après interruption)
+            store.export_json(DATE_STR, ["matches"])
+            store.close()
+            await browser.close()
 
-        for i, league in enumerate(leagues_list):
-            matches = await extract_matches_from_league(page, league['url'], league['name'])
-            
-            # 2. FUSION INTELLIGENTE (MERGE)
-            added_count = 0
-            for m in matches:
-                # On ajoute seulement si l'ID n'est pas déjà connu
-                if m['id'] not in existing_ids:
-                    all_matches.append(m)
-                    existing_ids.add(m['id'])
-                    added_count += 1
-            
-            if added_count > 0:
-                print(f"      ➕ {added_count} nouveaux matchs ajoutés.")
-
-            # Sauvegarde intermédiaire (Ecrit TOUT : anciens + nouveaux)
-            if i % 3 == 0:
-                with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-                    json.dump(all_matches, f, indent=4, ensure_ascii=False)
-            
-            await asyncio.sleep(random.uniform(2, 5))
-
-        # Sauvegarde finale
-        with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-            json.dump(all_matches, f, indent=4, ensure_ascii=False)
-        
-        print(f"\n🎉 TERMINÉ ! {len(all_matches)} matchs au total sauvegardés (Date validée : {TODAY_SLASH})")
-        await browser.close()
+    elapsed = time.perf_counter() - started
+    print(f"\n🎉 TERMINÉ ! {len(merger.existing_ids)} matchs au total sauvegardés (Date validée : {TODAY_SLASH})")
+    print(f"⏱️ {stats['ok']} ligues en {elapsed:.0f}s ({elapsed / max(1, stats['ok']):.1f}s/ligue)")
+    if stats["failed"]:
+        print(f"⚠️ {len(stats['failed'])} ligues en échec (relancer pour les retenter) : {', '.join(stats['failed'])}")
 
 if __name__ == "__main__":
-    asyncio.run(run_scraper())
\ No newline at end of file
+    asyncio.run(run_scraper())
@@ -8,11 +8,19 @@ import asyncio
 import json
 import os
 import random
+import sys
 from datetime import datetime
 
 # Import des modules du dossier monitor
+from monitor.alert_queue import AlertQueue
 from monitor.betting_logic import BettingAnalyzer
 from monitor.scraper_engine import MatchScraper
+from monitor.payload_archive import PayloadArchive
+from monitor.polling_scheduler import PollingScheduler
+from monitor.scan_result import process_scan_result as handle_scan_result
+from monitor.state_store import DashboardStore
+from monitor.history_log import HistoryWriter
+from monitor.storage import STORAGE_BACKEND, open_store
 
 
 # === CONFIGURATION ===
@@ -35,15 +43,34 @@ RESTART_BROWSER_EVERY = 120
 LONG_PAUSE_EVERY = 30
 LONG_PAUSE_RANGE = (60, 120)  # pause longue 1–2 min
 
+# Ecriture du dashboard / des alertes : au plus une fois toutes les N secondes
+DASHBOARD_WRITE_INTERVAL = 5
+
+# Mode adaptatif (python 04_monitor_favoris.py --adaptive)
+MAX_SCANS_PER_MINUTE = 20       # Budget global de scans
+INPUT_RELOAD_SECONDS = 300      # Relecture des favoris (nouveaux matchs)
+
+# Archive des payloads API bruts (rejouables via python -m monitor.replay)
+ARCHIVE_API_PAYLOADS = os.getenv("ARCHIVE_API_PAYLOADS", "False") == "True"
+ARCHIVE_COMPRESSION = os.getenv("ARCHIVE_COMPRESSION", "gzip")  # gzip ou zstd
+
+
+# Historique : écriture bufferisée, rotation à 50 Mo, segments fermés compressés
+HISTORY_FLUSH_INTERVAL = 2
+HISTORY_MAX_BYTES = 50 * 1024 * 1024
+HISTORY_KEYFRAME_EVERY = 20  # Mode delta : image complète tous les 20 scans (None = désactivé)
+
+history_writer = HistoryWriter(
+    HISTORY_FILE,
+    flush_interval=HISTORY_FLUSH_INTERVAL,
+    max_bytes=HISTORY_MAX_BYTES,
+    delta_keyframe_every=HISTORY_KEYFRAME_EVERY
+)
+
+
+# Base SQLite (STORAGE_BACKEND=sqlite) : dashboard, alertes et snapshots upsertés par match
+db = open_store() if STORAGE_BACKEND == "sqlite" else None
 
-def append_to_history(match_data):
-    """Ajoute une capture (snapshot) du match dans le fichier d'historique."""
-    snapshot = {
-        "scan_timestamp": datetime.now().isoformat(),
-        **match_data
-    }
-    with open(HISTORY_FILE, "a", encoding="utf-8") as f:
-        f.write(json.dumps(snapshot, ensure_ascii=False) + "\n")
 
 def get_match_priority(match):
     """
@@ -83,6 +110,24 @@ def get_match_priority(match):
     
     return 4
 
+def process_scan_result(match_data, analyzer, store):
+    """
+    Traite le résultat d'un scan : analyse, alertes, historique, dashboard.
+    Partagé par la boucle classique et le mode adaptatif (voir monitor/scan_result.py).
+    """
+    return handle_scan_result(match_data, analyzer, store, history_writer,
+                              db=db, date_str=DATE_STR, verbose=True)
+
+
+def load_existing_alerts(analyzer):
+    """Récupère les alertes déjà enregistrées dans l'analyseur"""
+    if os.path.exists(ALERTS_FILE):
+        try:
+            with open(ALERTS_FILE, "r", encoding="utf-8") as f:
+                analyzer.alerts = json.load(f)
+        except: pass
+
+
 async def monitor_matches():
     """Fonction principale de surveillance."""
     
@@ -135,18 +180,6 @@ async def monitor_matches():
         matches_to_check = final_scan_queue
 
     
-    # === CHARGEMENT DASHBOARD EXISTANT ===
-    dashboard_data_map = {}
-    if os.path.exists(OUTPUT_FILE):
-        try:
-            with open(OUTPUT_FILE, "r", encoding="utf-8") as f:
-                content = f.read().strip()
-                if content:
-                    old_data = json.loads(content)
-                    for m in old_data:
-                        if m.get('id'): dashboard_data_map[m.get('id')] = m
-        except: pass
-
     # === AFFICHAGE INFOS ===
     print(f"\n{'='*70}")
     print(f"🚀 TRACKING INTELLIGENT (LIVE FIRST)")
@@ -157,15 +190,18 @@ async def monitor_matches():
     print(f"{'='*70}\n")
     
     # === INITIALISATION ===
-    scraper = MatchScraper(base_url=BASE_URL, headless=HEADLESS_MODE)
-    analyzer = BettingAnalyzer()
+    archive = PayloadArchive(compression=ARCHIVE_COMPRESSION) if ARCHIVE_API_PAYLOADS else None
+    scraper = MatchScraper(base_url=BASE_URL, headless=HEADLESS_MODE, archive=archive)
+    alert_queue = AlertQueue()  # Publication immédiate vers 05_alert_system.py
+    analyzer = BettingAnalyzer(publisher=alert_queue.publish)
     
     # Récupération alertes existantes
-    if os.path.exists(ALERTS_FILE):
-        try:
-            with open(ALERTS_FILE, "r", encoding="utf-8") as f:
-                analyzer.alerts = json.load(f)
-        except: pass
+    load_existing_alerts(analyzer)
+    
+    # === CHARGEMENT DASHBOARD EXISTANT ===
+    store = DashboardStore(OUTPUT_FILE, ALERTS_FILE, analyzer.get_alerts,
+                           min_interval=DASHBOARD_WRITE_INTERVAL, db=db, date_str=DATE_STR)
+    store.load()
     
     monitored_data = [] 
     
@@ -200,44 +236,7 @@ async def monitor_matches():
             match_data = await scraper.extract_match_data(match)
             monitored_data.append(match_data)
             
-            # 2. ANALYSE (Seulement si LIVE)
-            if match_data.get("status") == "LIVE":
-                opportunity = analyzer.calculate_opportunity_score(match_data)
-                match_data["opportunity"] = opportunity
-                
-                # Gestion Alertes
-                if opportunity.get("score", 0) >= 50:
-                    alert_msg = analyzer.generate_alert_message(match_data, opportunity)
-                    if alert_msg:
-                        print(alert_msg) # Affiche en console
-                        analyzer.add_alert(match_data, opportunity) # Ajoute au JSON
-            else:
-                match_data["opportunity"] = {}
-            
-            # 3. HISTORIQUE
-            if match_data.get("status") != "NOT_READY":
-                append_to_history(match_data)
-                print(f"      📚 Historisé")
-
-            # 4. DASHBOARD (Sauvegarde continue)
-            m_id = match_data.get('id')
-            if m_id:
-                dashboard_data_map[m_id] = match_data
-            
-            final_dashboard_list = list(dashboard_data_map.values())
-            # On garde le tri LIVE en premier pour le fichier de sortie aussi
-            final_dashboard_list.sort(key=lambda x: (x.get("status") != "LIVE", x.get("game_time", "")))
-
-            with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-                json.dump(final_dashboard_list, f, indent=4, ensure_ascii=False)
-            
-            # Sauvegarde Alertes
-            alerts = analyzer.get_alerts()
-            if alerts:
-                with open(ALERTS_FILE, "w", encoding="utf-8") as f:
-                    json.dump(alerts, f, indent=4, ensure_ascii=False)
-            
-            print(f"      ✅ Données sauvegardées")
+            process_scan_result(match_data, analyzer, store)
             
             # === PAUSE LONGUE ALÉATOIRE ===
             if i > 0 and i % LONG_PAUSE_EVERY == 0:
@@ -265,10 +264,15 @@ async def monitor_matches():
             await scraper.close_session()
         else:
             await scraper.stop()
+        write_metrics = store.end_cycle()
+        history_writer.close()
+        alert_queue.close()
     
     # === RÉSUMÉ ===
     print(f"\n{'='*70}")
     print(f"💾 CYCLE TERMINÉ")
+    print(f"📝 Ecritures : {write_metrics['writes']} fichiers, "
+          f"{write_metrics['bytes_written']/1024:.1f} Ko pour {write_metrics['updates']} matchs")
     
     status_counts = {}
     for m in monitored_data:
@@ -280,9 +284,94 @@ async def monitor_matches():
     print(f"{'='*70}\n")
 
 
+async def monitor_adaptive():
+    """
+    Surveillance longue durée pilotée par PollingScheduler : chaque match a
+    sa propre fréquence de scan (LIVE chaud, LIVE calme, avant coup d'envoi),
+    les matchs terminés ne sont plus scannés.
+    """
+    if not os.path.exists(INPUT_FILE):
+        print(f"❌ Fichier manquant : {INPUT_FILE}")
+        return
+
+    archive = PayloadArchive(compression=ARCHIVE_COMPRESSION) if ARCHIVE_API_PAYLOADS else None
+    scraper = MatchScraper(base_url=BASE_URL, headless=HEADLESS_MODE, archive=archive)
+    alert_queue = AlertQueue()  # Publication immédiate vers 05_alert_system.py
+    analyzer = BettingAnalyzer(publisher=alert_queue.publish)
+    load_existing_alerts(analyzer)
+    store = DashboardStore(OUTPUT_FILE, ALERTS_FILE, analyzer.get_alerts,
+                           min_interval=DASHBOARD_WRITE_INTERVAL, db=db, date_str=DATE_STR)
+    store.load()
+    scheduler = PollingScheduler(max_polls_per_minute=MAX_SCANS_PER_MINUTE)
+    stop_event = asyncio.Event()
+    scans_done = 0
+
+    def reload_inputs():
+        try:
+            with open(INPUT_FILE, "r", encoding="utf-8") as f:
+                added, updated = scheduler.sync(json.load(f))
+            if added or updated:
+                print(f"📥 {added} nouveaux matchs planifiés, {updated} mis à jour ({len(scheduler)} suivis)")
+        except Exception as e:
+            print(f"⚠️ Relecture {INPUT_FILE} impossible : {e}")
+
+    async def periodic_reload():
+        while not stop_event.is_set():
+            await asyncio.sleep(INPUT_RELOAD_SECONDS)
+            reload_inputs()
+            metrics = store.end_cycle()
+            print(f"📝 {metrics['bytes_written']/1024:.1f} Ko écrits sur {INPUT_RELOAD_SECONDS}s "
+                  f"({metrics['updates']} scans)")
+
+    async def periodic_flush():
+        # Garantit l'écriture des derniers scans même sans nouvelle mise à jour
+        while not stop_event.is_set():
+            await asyncio.sleep(DASHBOARD_WRITE_INTERVAL)
+            store.flush()
+            history_writer.maybe_flush()
+
+    async def poll(match):
+        nonlocal scans_done
+        if scans_done > 0 and scans_done % RESTART_BROWSER_EVERY == 0:
+            print("♻️  Restart complet du navigateur (stabilité long run)")
+            await scraper.stop()
+            await asyncio.sleep(5)
+            await scraper.start()
+        scans_done += 1
+
+        match_data = await scraper.extract_match_data(match)
+        process_scan_result(match_data, analyzer, store)
+        return match_data
+
+    print(f"\n{'='*70}")
+    print(f"🚀 TRACKING ADAPTATIF (budget {MAX_SCANS_PER_MINUTE} scans/min)")
+    print(f"{'='*70}\n")
+
+    reload_inputs()
+    reload_task = asyncio.create_task(periodic_reload())
+    flush_task = asyncio.create_task(periodic_flush())
+    try:
+        await scraper.start()
+        await scheduler.run(poll, stop_event=stop_event)
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        print("\n\n⚠️  Arrêt demandé.")
+    finally:
+        stop_event.set()
+        reload_task.cancel()
+        flush_task.cancel()
+        store.end_cycle()
+        history_writer.close()
+        alert_queue.close()
+        await scraper.stop()
+        print(f"🚨 Alertes : {len(analyzer.get_alerts())} | Scans : {scans_done}")
+
+
 def main():
     try:
-        asyncio.run(monitor_matches())
+        if "--adaptive" in sys.argv:
+            asyncio.run(monitor_adaptive())
+        else:
+            asyncio.run(monitor_matches())
     except KeyboardInterrupt:
         print("\n👋 Bye !")
 
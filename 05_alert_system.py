@@ -1,6 +1,6 @@
 """
 05_telegram_notifier.py
-Script autonome qui surveille le fichier d'alertes et envoie les notifs Telegram.
+Script autonome qui consomme la file d'alertes du monitor et envoie les notifs Telegram.
 CORRECTIF ANTI-SPAM : N'envoie qu'une seule fois par niveau d'alerte.
 """
 
@@ -12,6 +12,10 @@ import sys
 from datetime import datetime
 from dotenv import load_dotenv
 
+from monitor.alert_queue import AlertQueue
+from monitor.dedup_store import DedupStore
+from monitor.telegram_sender import TelegramOutbox, TelegramSender
+
 # 1. Chargement du fichier .env
 load_dotenv()
 
@@ -25,10 +29,12 @@ if not TELEGRAM_TOKEN or not TELEGRAM_RECIPIENTS:
     print("❌ ERREUR CRITIQUE : Le fichier .env est mal configuré.")
     sys.exit()
 
-# Dossiers et Fichiers
-DATE_STR = datetime.now().strftime("%Y-%m-%d")
-BASE_DIR = os.path.join("match", DATE_STR)
-ALERTS_FILE = os.path.join(BASE_DIR, "alertes_opportunites.json")
+# Dossiers et Fichiers (recalculés à chaque changement de jour)
+def alerts_file_for(date_str):
+    return os.path.join("match", date_str, "alertes_opportunites.json")
+
+# Anti-doublon : une clé déjà envoyée est ignorée pendant DEDUP_TTL secondes
+DEDUP_TTL = int(os.getenv("ALERT_DEDUP_TTL", 12 * 3600))
 
 # ==========================================
 # 📨 FONCTIONS TELEGRAM
@@ -121,75 +127,142 @@ def generate_unique_key(alert):
 # 📡 BOUCLE PRINCIPALE
 # ==========================================
 
+def process_alerts(alerts, dedup, deliver):
+    """Transmet les alertes dont la clé n'a pas été vue pendant le TTL"""
+    new_alerts_count = 0
+    for alert in alerts:
+        # On génère la clé SANS le timestamp
+        unique_key = generate_unique_key(alert)
+        
+        # Si cette configuration exacte n'a pas été envoyée récemment
+        if unique_key not in dedup:
+            print(f"\n🔔 NOUVELLE ALERTE VALIDÉE : {alert.get('match')}")
+            deliver(format_message(alert))
+            # Ajout à l'anti-doublon (persisté) pour ne plus la renvoyer
+            dedup.add(unique_key)
+            new_alerts_count += 1
+    return new_alerts_count
+
+
+CONSUMER_NAME = "telegram"
+MAX_WAIT_SECONDS = 5  # Attente max sans réveil (producteur sans socket de réveil)
+
+
+def run_alert_dispatcher():
+    """
+    Consomme la file d'alertes (monitor/alert_queue.py) : seules les alertes
+    publiées depuis le dernier offset sont lues, réveil immédiat à chaque
+    publication, clés déjà envoyées persistées avec expiration (TTL).
+    """
+    queue = AlertQueue()
+    queue.listen()
+    dedup = DedupStore(ttl=DEDUP_TTL)
+
+    # Envoi asynchrone : boîte d'envoi persistante vidée par un worker dédié
+    outbox = TelegramOutbox()
+    sender = TelegramSender(TELEGRAM_TOKEN, outbox)
+    sender_thread = sender.start_in_thread()
+
+    def deliver(message):
+        outbox.enqueue(message, TELEGRAM_RECIPIENTS)
+        sender.wake()
+
+    offset = queue.get_offset(CONSUMER_NAME)
+    if offset is None:
+        # Premier démarrage : on ne spamme pas avec les alertes déjà en file
+        offset = queue.last_seq()
+        queue.set_offset(CONSUMER_NAME, offset)
+
+    print(f"\n📡 BOT TELEGRAM ACTIF (FILE D'ALERTES, offset {offset})")
+    print(f"📂 File : {queue.db_path} | Boîte d'envoi : {outbox.counts()}")
+    print(f"🧹 Anti-doublon : {len(dedup)} clés actives (TTL {DEDUP_TTL // 3600}h)")
+    print("------------------------------------------------")
+
+    try:
+        while True:
+            if not sender_thread.is_alive():
+                print("⚠️ Worker Telegram arrêté, relance...")
+                sender_thread = sender.start_in_thread()
+            try:
+                consumed = False
+                for seq, alert, created_at in queue.consume(offset):
+                    if process_alerts([alert], dedup, deliver):
+                        print(f"      ⏱️ Latence : {time.time() - created_at:.2f}s")
+                    offset = seq
+                    queue.set_offset(CONSUMER_NAME, offset)
+                    consumed = True
+                if consumed:
+                    queue.prune()  # Alertes lues par tous : la base reste à taille constante
+                dedup.maybe_evict()
+            except Exception as e:
+                print(f"❌ Erreur : {e}")
+            queue.wait(MAX_WAIT_SECONDS)
+    finally:
+        queue.close()
+        dedup.close()
+        outbox.close()
+
+
 def run_alert_system():
+    """
+    Ancienne boucle : surveille le fichier d'alertes du jour toutes les 5 s.
+    Seules les alertes ajoutées depuis le dernier passage sont traitées, et
+    le fichier suivi bascule automatiquement sur le dossier du nouveau jour.
+    """
+    dedup = DedupStore(ttl=DEDUP_TTL)
+    date_str = datetime.now().strftime("%Y-%m-%d")
+    alerts_file = alerts_file_for(date_str)
+
     print(f"\n📡 BOT TELEGRAM ACTIF (ANTI-SPAM ACTIVÉ)")
-    print(f"📂 Fichier surveillé : {ALERTS_FILE}")
+    print(f"📂 Fichier surveillé : {alerts_file}")
+    print(f"🧹 Anti-doublon : {len(dedup)} clés actives (TTL {DEDUP_TTL // 3600}h)")
     print("------------------------------------------------")
 
-    # Cache des alertes déjà envoyées (Mémoire vive)
-    sent_alerts_cache = set()
-
-    # 1. Chargement initial : On remplit le cache avec ce qui existe déjà pour ne pas spammer au démarrage
-    if os.path.exists(ALERTS_FILE):
+    def read_alerts(path):
         try:
-            with open(ALERTS_FILE, "r", encoding="utf-8") as f:
+            with open(path, "r", encoding="utf-8") as f:
                 content = f.read().strip()
-                if content:
-                    existing = json.loads(content)
-                    for item in existing:
-                        key = generate_unique_key(item)
-                        sent_alerts_cache.add(key)
-            print(f"ℹ️ {len(sent_alerts_cache)} anciennes alertes ignorées.")
-        except: pass
+                return json.loads(content) if content else []
+        except FileNotFoundError:
+            return []
+
+    # 1. Démarrage : les alertes déjà présentes ne sont pas renvoyées
+    try:
+        processed = len(read_alerts(alerts_file))
+        print(f"ℹ️ {processed} anciennes alertes ignorées.")
+    except json.JSONDecodeError:
+        processed = 0
 
     # 2. Boucle
     while True:
-        if os.path.exists(ALERTS_FILE):
-            try:
-                # Lecture
-                with open(ALERTS_FILE, "r", encoding="utf-8") as f:
-                    content = f.read().strip()
-                    if not content:
-                        time.sleep(2)
-                        continue
-                    alerts = json.loads(content)
-                
-                # Traitement
-                new_alerts_count = 0
-                
-                # On parcourt les alertes (les plus récentes sont souvent à la fin)
-                for alert in alerts:
-                    # On génère la clé SANS le timestamp
-                    unique_key = generate_unique_key(alert)
-                    
-                    # Si cette configuration exacte n'a jamais été envoyée
-                    if unique_key not in sent_alerts_cache:
-                        match_name = alert.get("match")
-                        print(f"\n🔔 NOUVELLE ALERTE VALIDÉE : {match_name}")
-                        
-                        # Envoi
-                        msg = format_message(alert)
-                        send_telegram_alert(msg)
-                        
-                        # Ajout au cache pour ne plus la renvoyer
-                        sent_alerts_cache.add(unique_key)
-                        new_alerts_count += 1
-                
-                if new_alerts_count == 0:
-                    # Petit print de debug optionnel pour dire "je suis vivant"
-                    # sys.stdout.write(".") 
-                    # sys.stdout.flush()
-                    pass
-
-            except json.JSONDecodeError:
-                pass # Conflit lecture/écriture, on ignore
-            except Exception as e:
-                print(f"❌ Erreur : {e}")
+        try:
+            # Changement de jour : nouveau fichier, lu depuis le début
+            today = datetime.now().strftime("%Y-%m-%d")
+            if today != date_str:
+                date_str, alerts_file, processed = today, alerts_file_for(today), 0
+                print(f"📅 Changement de jour : {alerts_file}")
+
+            alerts = read_alerts(alerts_file)
+            if len(alerts) < processed:
+                processed = 0  # Fichier réinitialisé
+            process_alerts(alerts[processed:], dedup, send_telegram_alert)
+            processed = len(alerts)
+            dedup.maybe_evict()
+
+        except json.JSONDecodeError:
+            pass # Conflit lecture/écriture, on ignore
+        except Exception as e:
+            print(f"❌ Erreur : {e}")
         
         time.sleep(5)
 
 if __name__ == "__main__":
     try:
-        run_alert_system()
+        # python 05_alert_system.py           -> file d'alertes (réveil immédiat)
+        # python 05_alert_system.py --legacy  -> relecture du fichier JSON
+        if "--legacy" in sys.argv:
+            run_alert_system()
+        else:
+            run_alert_dispatcher()
     except KeyboardInterrupt:
         print("\n👋 Arrêt du bot.")
\ No newline at end of file
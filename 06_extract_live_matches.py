@@ -1,7 +1,9 @@
-import json
 import os
 from datetime import datetime
 
+from monitor.state_store import atomic_write_json
+from monitor.storage import open_store
+
 # === DATE DU JOUR ===
 DATE_STR = datetime.now().strftime("%Y-%m-%d")
 
@@ -12,13 +14,13 @@ OUTPUT_FILE = os.path.join(BASE_DIR, "live_matches.json")
 
 
 def extract_live_matches():
-    if not os.path.exists(INPUT_FILE):
-        print(f"❌ Fichier surveillance introuvable : {INPUT_FILE}")
+    store = open_store()
+    matches, _ = store.read("dashboard", DATE_STR)
+    store.close()
+    if not matches:
+        print(f"❌ Aucun match surveillé pour {DATE_STR} ({INPUT_FILE})")
         return
 
-    with open(INPUT_FILE, "r", encoding="utf-8") as f:
-        matches = json.load(f)
-
     live_matches = []
 
     for m in matches:
@@ -39,8 +41,7 @@ def extract_live_matches():
     # donc x["status"] != "LIVE" renvoie False(0) pour LIVE et True(1) pour le reste -> LIVE arrive en premier)
     live_matches.sort(key=lambda x: x["status"] != "LIVE")
 
-    with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-        json.dump(live_matches, f, indent=4, ensure_ascii=False)
+    atomic_write_json(OUTPUT_FILE, live_matches, compact=False)
 
     print(f"✅ {len(live_matches)} matchs filtrés exportés (LIVE en tête)")
     print(f"📁 Fichier généré : {OUTPUT_FILE}")
@@ -13,6 +13,10 @@ import uvicorn # Nécessaire pour le lancement automatique
 load_dotenv()
 
 from . import models, database
+from monitor.rule_engine import default_engine, opportunity_context
+
+# Règles de détection partagées avec le monitor
+rules = default_engine()
 
 app = FastAPI(
     title="Football Scraper API",
@@ -260,6 +264,15 @@ def get_match_live_history(
         models.MatchLiveStat.match_id == match_id
     ).order_by(models.MatchLiveStat.recorded_at).limit(limit).all()
 
+def _clock_minutes(game_clock):
+    """Minute de jeu depuis game_clock ("67'" -> 67, "45+2" -> 45, 0 si illisible)"""
+    digits = ""
+    for char in str(game_clock or ""):
+        if not char.isdigit():
+            break
+        digits += char
+    return int(digits) if digits else 0
+
 @app.get("/matches/live/alerts")
 def get_live_alerts(
     min_attacks: int = Query(15, description="Seuil attaques dangereuses"),
@@ -283,6 +296,13 @@ def get_live_alerts(
         )
     ).filter(models.MatchLiveStat.status == "LIVE").all()
     
+    # Mêmes règles que le monitor (monitor/betting_rules.json, rechargées à chaud)
+    activity_rules = rules.ruleset("activite", {
+        "MIN_DANGEROUS_ATTACKS": min_attacks,
+        "MIN_SHOTS_ON_TARGET": min_shots,
+        "MIN_POSSESSION_GAP": min_possession_gap,
+    })
+    opportunity_rules = rules.ruleset("opportunite")
     alerts = []
     
     for stat in latest_stats:
@@ -290,52 +310,44 @@ def get_live_alerts(
         if not match:
             continue
             
-        # Détection d'attaques dangereuses élevées
-        if stat.dangerous_attacks_home >= min_attacks:
-            alerts.append({
-                "match": match,
-                "alert_type": "HIGH_ATTACKS_HOME",
-                "alert_value": stat.dangerous_attacks_home,
-                "message": f"{match.home_team} a {stat.dangerous_attacks_home} attaques dangereuses"
-            })
-        
-        if stat.dangerous_attacks_away >= min_attacks:
-            alerts.append({
-                "match": match,
-                "alert_type": "HIGH_ATTACKS_AWAY",
-                "alert_value": stat.dangerous_attacks_away,
-                "message": f"{match.away_team} a {stat.dangerous_attacks_away} attaques dangereuses"
-            })
-        
-        # Détection de tirs cadrés élevés
-        if stat.shots_on_target_home and stat.shots_on_target_home >= min_shots:
-            alerts.append({
-                "match": match,
-                "alert_type": "HIGH_SHOTS_HOME",
-                "alert_value": stat.shots_on_target_home,
-                "message": f"{match.home_team} domine avec {stat.shots_on_target_home} tirs cadrés"
-            })
-        
-        if stat.shots_on_target_away and stat.shots_on_target_away >= min_shots:
+        # Activité anormale (attaques dangereuses, tirs cadrés, possession)
+        activity = {
+            "home_team": match.home_team,
+            "away_team": match.away_team,
+            "dangerous_attacks_home": stat.dangerous_attacks_home,
+            "dangerous_attacks_away": stat.dangerous_attacks_away,
+            "shots_on_target_home": stat.shots_on_target_home,
+            "shots_on_target_away": stat.shots_on_target_away,
+            "possession_home": stat.possession_home,
+            "possession_away": stat.possession_away,
+        }
+        for fired in activity_rules.fire(activity):
+            fired.pop("rule", None)
+            alerts.append({"match": match, **fired})
+
+        # Scénarios de paris sur les matchs suivis en favori
+        favorite = match.favorite
+        if favorite is None or favorite.bet_type not in ("1", "2"):
+            continue
+        odds = db.query(models.OddsHistory).filter(
+            models.OddsHistory.match_id == match.id
+        ).order_by(desc(models.OddsHistory.recorded_at)).first()
+        ctx = opportunity_context(
+            stat.score_home or 0, stat.score_away or 0, _clock_minutes(stat.game_clock),
+            "V1" if favorite.bet_type == "1" else "V2", favorite.initial_odd,
+            odds.odd_1 if odds else None, odds.odd_2 if odds else None,
+            stat.attacks_home, stat.attacks_away,
+            match.home_team if favorite.bet_type == "1" else match.away_team,
+        )
+        opportunity = opportunity_rules.evaluate(ctx)
+        if opportunity["score"] >= 50:
             alerts.append({
                 "match": match,
-                "alert_type": "HIGH_SHOTS_AWAY",
-                "alert_value": stat.shots_on_target_away,
-                "message": f"{match.away_team} domine avec {stat.shots_on_target_away} tirs cadrés"
+                "alert_type": opportunity["type"],
+                "alert_value": opportunity["score"],
+                "message": opportunity["action_suggeree"] or opportunity["niveau"],
+                "opportunity": opportunity
             })
-        
-        # Détection de domination possession
-        if stat.possession_home and stat.possession_away:
-            poss_gap = abs(stat.possession_home - stat.possession_away)
-            if poss_gap >= min_possession_gap:
-                dominator = match.home_team if stat.possession_home > stat.possession_away else match.away_team
-                dominant_poss = max(stat.possession_home, stat.possession_away)
-                alerts.append({
-                    "match": match,
-                    "alert_type": "POSSESSION_DOMINATION",
-                    "alert_value": poss_gap,
-                    "message": f"{dominator} domine la possession ({dominant_poss}%)"
-                })
     
     return {
         "timestamp": datetime.now(),
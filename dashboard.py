@@ -6,11 +6,13 @@ VERSION : Ajout Ligue, Pronostic, URL (Cliquable), Heure, Favori, Cote.
 
 import streamlit as st
 import pandas as pd
-import json
 import os
 import time
 from datetime import datetime
 
+from monitor.dashboard_data import enrich_live, file_signature, health_rows, load_json
+from monitor.history_log import HistoryReader
+
 # === CONFIGURATION ===
 st.set_page_config(
     page_title="1xBet Command Center",
@@ -32,6 +34,11 @@ FILES = {
     "IDS": os.path.join(BASE_DIR, "ids_championnats_24h.json")
 }
 
+# Rafraîchissement : seuls les onglets live sont réexécutés (st.fragment),
+# et un fichier n'est relu que si sa signature (mtime, taille) a changé
+LIVE_REFRESH_SECONDS = 5
+BASES_REFRESH_SECONDS = 60
+
 # === FONCTIONS UTILITAIRES ===
 
 def get_file_age(filepath):
@@ -41,28 +48,35 @@ def get_file_age(filepath):
     timestamp = os.path.getmtime(filepath)
     return datetime.fromtimestamp(timestamp).strftime("%H:%M:%S")
 
+@st.cache_data(max_entries=16, show_spinner=False)
+def _cached_json(filepath, signature):
+    return load_json(filepath)
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def _cached_live(filepath, signature):
+    return enrich_live(load_json(filepath))
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def _cached_frame(filepath, signature):
+    return pd.DataFrame(load_json(filepath))
+
 def safe_load_json(filepath):
-    """Lecture sécurisée JSON standard"""
-    if not os.path.exists(filepath): return []
-    try:
-        with open(filepath, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except: return []
+    """Lecture sécurisée JSON standard (cache invalidé par mtime/taille)"""
+    return _cached_json(filepath, file_signature(filepath))
+
+def load_live_frame(filepath):
+    """Tableau live enrichi (cache invalidé par mtime/taille)"""
+    return _cached_live(filepath, file_signature(filepath))
+
+def load_frame(filepath):
+    return _cached_frame(filepath, file_signature(filepath))
 
 def safe_load_jsonl(filepath, limit=1000):
-    """Lecture sécurisée JSONL"""
-    data = []
+    """Lecture sécurisée JSONL (snapshots complets, reconstruits en mode delta)"""
     if not os.path.exists(filepath): return pd.DataFrame()
     
     try:
-        with open(filepath, "r", encoding="utf-8") as f:
-            lines = f.readlines()[-limit:]
-            for line in lines:
-                try:
-                    if line.strip():
-                        data.append(json.loads(line))
-                except: pass
-        return pd.DataFrame(data)
+        return pd.DataFrame(HistoryReader(filepath).tail(limit))
     except:
         return pd.DataFrame()
 
@@ -87,40 +101,14 @@ auto_refresh = st.sidebar.checkbox("Auto-Refresh (5s)", value=True)
 st.sidebar.divider()
 st.sidebar.text(f"Dossier : {DATE_STR}")
 
-# === CHARGEMENT DONNÉES ===
-alerts_data = safe_load_json(FILES["ALERTES"])
-live_data = safe_load_json(FILES["LIVE"])
-ids_data = safe_load_json(FILES["IDS"])
-
-# Conversion Live en DF
-df_live = pd.DataFrame(live_data)
-
-# === GESTION DES NOMS DE COLONNES (Match Complet) ===
-if not df_live.empty:
-    if "match" not in df_live.columns and "match_complet" in df_live.columns:
-        df_live["match"] = df_live["match_complet"]
-    elif "match" not in df_live.columns:
-        df_live["match"] = "Nom Inconnu"
-
-# === ENRICHISSEMENT DATA ===
-if not df_live.empty:
-    # On s'assure que les colonnes existent même si le JSON est partiel
-    if "opportunity" in df_live.columns:
-        df_live["score_opp"] = df_live["opportunity"].apply(lambda x: x.get("score", 0) if isinstance(x, dict) else 0)
-        df_live["conseil"] = df_live["opportunity"].apply(lambda x: x.get("action_suggeree", "") if isinstance(x, dict) else "")
-    else:
-        df_live["score_opp"] = 0
-        df_live["conseil"] = ""
+# Sans st.fragment (Streamlit ancien), repli sur le rerun complet de la page
+FRAGMENTS = auto_refresh and hasattr(st, "fragment")
 
-    # Ajout des colonnes demandées : ligue, url, pronostic, etc.
-    # On complète aussi l'URL si elle est relative
-    if "url" in df_live.columns:
-        df_live["url"] = df_live["url"].apply(lambda x: f"https://1xbet.cm{x}" if x and x.startswith("/") else x)
-
-    cols_required = ["league", "heure", "favori", "pronostic", "cote", "url"]
-    for col in cols_required:
-        if col not in df_live.columns:
-            df_live[col] = None
+def refreshed_every(seconds):
+    """Réexécute seulement le bloc décoré toutes les `seconds` secondes"""
+    def decorate(func):
+        return st.fragment(run_every=seconds)(func) if FRAGMENTS else func
+    return decorate
 
 # === INTERFACE PRINCIPALE (ONGLETS) ===
 tab1, tab2, tab3, tab4 = st.tabs([
@@ -133,7 +121,12 @@ tab1, tab2, tab3, tab4 = st.tabs([
 # -----------------------------------------------------------------------------
 # TAB 1 : LE COCKPIT (ALERTE + LIVE)
 # -----------------------------------------------------------------------------
-with tab1:
+@refreshed_every(LIVE_REFRESH_SECONDS)
+def render_live_center():
+    # === CHARGEMENT DONNÉES (relues seulement si le fichier a changé) ===
+    alerts_data = safe_load_json(FILES["ALERTES"])
+    df_live = load_live_frame(FILES["LIVE"])
+
     c1, c2, c3, c4 = st.columns(4)
     c1.metric("Matchs Surveillés", len(df_live))
     c2.metric("Alertes Actives", len(alerts_data), delta_color="inverse")
@@ -199,13 +192,21 @@ with tab1:
     else:
         st.warning("Aucune donnée live disponible.")
 
+with tab1:
+    render_live_center()
+
 # -----------------------------------------------------------------------------
 # TAB 2 : HISTORIQUE (JSONL)
 # -----------------------------------------------------------------------------
 with tab2:
     st.header("📜 Historique des Scans (.jsonl)")
+    history_match_id = st.text_input("ID match (optionnel, lecture directe via l'index)", value="").strip()
     if st.button("🔄 Charger/Actualiser l'Historique"):
-        df_history = safe_load_jsonl(FILES["HISTORY"])
+        if history_match_id:
+            # Lecture directe des snapshots du match (index .idx), sans parcourir le fichier
+            df_history = pd.DataFrame(list(HistoryReader(FILES["HISTORY"]).iter_match(history_match_id)))
+        else:
+            df_history = safe_load_jsonl(FILES["HISTORY"])
         
         if not df_history.empty:
             if "match" not in df_history.columns and "match_complet" in df_history.columns:
@@ -221,35 +222,34 @@ with tab2:
 # -----------------------------------------------------------------------------
 # TAB 3 : BASES DE DONNÉES
 # -----------------------------------------------------------------------------
-with tab3:
+@refreshed_every(BASES_REFRESH_SECONDS)
+def render_databases():
     c1, c2 = st.columns(2)
     with c1:
         st.subheader("🗂️ IDs Championnats")
         st.caption(f"Fichier : {os.path.basename(FILES['IDS'])}")
-        if ids_data: st.dataframe(pd.DataFrame(ids_data), use_container_width=True)
+        df_ids = load_frame(FILES["IDS"])
+        if not df_ids.empty: st.dataframe(df_ids, use_container_width=True)
     with c2:
         st.subheader("🗂️ Détails Matchs")
         st.caption(f"Fichier : {os.path.basename(FILES['RAW_MATCHS'])}")
-        raw_matchs = safe_load_json(FILES["RAW_MATCHS"])
-        if raw_matchs: st.dataframe(pd.DataFrame(raw_matchs), use_container_width=True)
+        df_raw = load_frame(FILES["RAW_MATCHS"])
+        if not df_raw.empty: st.dataframe(df_raw, use_container_width=True)
+
+with tab3:
+    render_databases()
 
 # -----------------------------------------------------------------------------
 # TAB 4 : SANTÉ
 # -----------------------------------------------------------------------------
-with tab4:
+@refreshed_every(LIVE_REFRESH_SECONDS)
+def render_health():
     st.header("⚙️ Diagnostic")
-    health_data = []
-    for name, path in FILES.items():
-        exists = os.path.exists(path)
-        size = f"{os.path.getsize(path)/1024:.2f} KB" if exists else "0 KB"
-        health_data.append({
-            "Fichier": name,
-            "Statut": "✅ OK" if exists else "❌ MANQUANT",
-            "Taille": size,
-            "Dernière Modif": get_file_age(path)
-        })
-    st.dataframe(pd.DataFrame(health_data), use_container_width=True)
-
-if auto_refresh:
-    time.sleep(5)
-    st.rerun()
\ No newline at end of file
+    st.dataframe(pd.DataFrame(health_rows(FILES)), use_container_width=True)
+
+with tab4:
+    render_health()
+
+if auto_refresh and not FRAGMENTS:
+    time.sleep(LIVE_REFRESH_SECONDS)
+    st.rerun()
@@ -7,10 +7,29 @@ Ce package contient deux modules principaux :
 - scraper_engine : Extraction de données depuis 1xbet.cm
 """
 
-from .betting_logic import BettingAnalyzer
-from .scraper_engine import MatchScraper
+import importlib
 
 __version__ = "1.0.0"
 __author__ = "Votre Nom"
 
-__all__ = ["BettingAnalyzer", "MatchScraper"]
\ No newline at end of file
+__all__ = ["BettingAnalyzer", "MatchScraper"]
+
+# Imports paresseux : importer un sous-module (ex: monitor.rule_engine depuis
+# le backend) ne doit pas charger playwright/bs4 via scraper_engine.
+_LAZY_EXPORTS = {
+    "BettingAnalyzer": ".betting_logic",
+    "MatchScraper": ".scraper_engine",
+}
+
+
+def __getattr__(name):
+    module = _LAZY_EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_LAZY_EXPORTS))
\ No newline at end of file
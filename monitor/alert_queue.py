@@ -0,0 +1,202 @@
+"""
+monitor/alert_queue.py
+File d'attente d'alertes entre le monitor (producteur) et le bot Telegram
+(consommateur), sans relecture périodique d'alertes_opportunites.json.
+
+- Table SQLite en ajout seul (mode WAL) : BettingAnalyzer.add_alert y publie
+  chaque alerte dès sa création.
+- Réveil immédiat du consommateur par un datagramme UDP local (latence
+  inférieure à la seconde) ; à défaut, simple attente avec délai maximum.
+- Le consommateur mémorise son offset (seq) dans la même base : un
+  redémarrage ne relit pas les anciennes alertes (anti-doublon : dedup_store).
+- Purge : les alertes lues par tous les consommateurs sont supprimées
+  (prune), et toute alerte plus vieille que RETENTION_SECONDS, même non lue
+  (consommateur abandonné). Les pages libérées sont réutilisées par SQLite :
+  le fichier ne grossit plus au fil des semaines.
+"""
+
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+
+DEFAULT_QUEUE_PATH = os.path.join("match", "alert_queue.db")
+NOTIFY_HOST = "127.0.0.1"
+NOTIFY_PORT = int(os.getenv("ALERT_NOTIFY_PORT", 8766))
+RETENTION_SECONDS = 7 * 24 * 3600  # Alertes non lues gardées au plus 7 jours
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS alert_queue (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    date TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS consumer_offsets (
+    name TEXT PRIMARY KEY,
+    seq INTEGER NOT NULL
+);
+"""
+
+
+class AlertQueue:
+    """File d'alertes persistante (SQLite) avec réveil UDP du consommateur"""
+
+    def __init__(self, db_path=DEFAULT_QUEUE_PATH, notify_host=NOTIFY_HOST, notify_port=NOTIFY_PORT):
+        """
+        Args:
+            db_path (str): Fichier de la base
+            notify_host (str): Adresse du socket de réveil
+            notify_port (int): Port UDP du socket de réveil (None = désactivé)
+        """
+        self.db_path = db_path
+        self.notify_address = (notify_host, notify_port) if notify_port else None
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        self._notify_sock = None
+        self._wake_sock = None
+
+    # ------------------------------------------------------------
+    # Producteur
+    # ------------------------------------------------------------
+
+    def publish(self, alert):
+        """
+        Ajoute une alerte à la file et réveille le consommateur.
+
+        Args:
+            alert (dict): Alerte telle que construite par BettingAnalyzer.add_alert
+
+        Returns:
+            int: Numéro de séquence de l'alerte
+        """
+        date_str = (alert.get("timestamp") or datetime.now().isoformat())[:10]
+        with self._lock, self.conn:
+            cursor = self.conn.execute(
+                "INSERT INTO alert_queue (date, created_at, data) VALUES (?, ?, ?)",
+                (date_str, time.time(), json.dumps(alert, ensure_ascii=False))
+            )
+        self._notify()
+        return cursor.lastrowid
+
+    def _notify(self):
+        if not self.notify_address:
+            return
+        try:
+            if self._notify_sock is None:
+                self._notify_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+                self._notify_sock.setblocking(False)
+            self._notify_sock.sendto(b"1", self.notify_address)
+        except OSError:
+            pass  # Pas de consommateur à l'écoute : il lira au prochain réveil
+
+    # ------------------------------------------------------------
+    # Consommateur
+    # ------------------------------------------------------------
+
+    def last_seq(self):
+        with self._lock:
+            row = self.conn.execute("SELECT MAX(seq) FROM alert_queue").fetchone()
+        return row[0] or 0
+
+    def get_offset(self, name):
+        """Offset persisté du consommateur (None si jamais démarré)"""
+        with self._lock:
+            row = self.conn.execute("SELECT seq FROM consumer_offsets WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def set_offset(self, name, seq):
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT INTO consumer_offsets (name, seq) VALUES (?, ?) "
+                "ON CONFLICT (name) DO UPDATE SET seq = excluded.seq",
+                (name, seq)
+            )
+
+    def consume(self, since, limit=500):
+        """
+        Alertes publiées après `since`.
+
+        Returns:
+            list: [(seq, alerte, created_at), ...]
+        """
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT seq, data, created_at FROM alert_queue WHERE seq > ? ORDER BY seq LIMIT ?",
+                (since, limit)
+            ).fetchall()
+        return [(seq, json.loads(data), created_at) for seq, data, created_at in rows]
+
+    def prune(self, max_age=RETENTION_SECONDS):
+        """
+        Supprime les alertes dépassées par tous les consommateurs connus,
+        et celles plus vieilles que `max_age` secondes.
+
+        Returns:
+            int: Nombre d'alertes supprimées
+        """
+        with self._lock, self.conn:
+            cursor = self.conn.execute(
+                "DELETE FROM alert_queue "
+                "WHERE seq <= (SELECT MIN(seq) FROM consumer_offsets) OR created_at < ?",
+                (time.time() - max_age,)
+            )
+        return cursor.rowcount
+
+    def listen(self):
+        """
+        Ouvre le socket de réveil. A appeler AVANT la première lecture : les
+        réveils reçus entre une lecture et l'attente suivante restent en tampon.
+        """
+        if not self.notify_address or self._wake_sock is not None:
+            return
+        try:
+            self._wake_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self._wake_sock.bind(self.notify_address)
+        except OSError as e:
+            print(f"⚠️ Socket de réveil indisponible ({e}), attente simple")
+            self._wake_sock.close()
+            self._wake_sock = None
+            self.notify_address = None
+
+    def wait(self, timeout):
+        """
+        Attend une publication (datagramme de réveil) ou l'expiration du délai.
+
+        Returns:
+            bool: True si réveillé par un producteur
+        """
+        self.listen()
+        if self._wake_sock is None:
+            time.sleep(timeout)
+            return False
+
+        self._wake_sock.settimeout(timeout)
+        try:
+            self._wake_sock.recv(16)
+        except socket.timeout:
+            return False
+        # Vide les réveils accumulés : une seule lecture suffit pour tous
+        self._wake_sock.setblocking(False)
+        try:
+            while self._wake_sock.recv(16):
+                pass
+        except OSError:
+            pass
+        return True
+
+    def close(self):
+        for sock in (self._notify_sock, self._wake_sock):
+            if sock is not None:
+                sock.close()
+        self.conn.close()
@@ -0,0 +1,471 @@
+"""
+monitor/api_parser.py
+Parsing des réponses GetGameZip de l'API 1xbet.
+Table de dispatch construite une seule fois au chargement du module et
+rangement direct des lignes (totaux, handicaps) par seuil.
+
+parse_api_data_legacy (ancien parseur de MatchScraper, if/elif par
+événement puis regroupement par seuil) est conservé comme référence :
+tests/test_api_parser.py vérifie que les deux donnent les mêmes champs.
+
+Les totaux sont rendus sous forme de TotalsLine : la même liste triée de
+lignes {"Seuil", "Plus", "Moins"} (sérialisée telle quelle en JSON), doublée
+d'un tableau de seuils en float pour les recherches par bisection.
+"""
+
+import bisect
+import json
+import os
+import sys
+import time
+
+try:
+    import orjson
+except ImportError:  # orjson est optionnel
+    orjson = None
+
+
+# === TABLE DE DISPATCH DES MARCHÉS ===
+# Marchés simples : type d'événement -> (section, clé)
+SIMPLE_MARKETS = {
+    1: ("live_odds", "V1"),
+    2: ("live_odds", "X"),
+    3: ("live_odds", "V2"),
+    4: ("double_chance", "1X"),
+    5: ("double_chance", "12"),
+    6: ("double_chance", "X2"),
+    180: ("live_odds", "BTS_Oui"),
+    181: ("live_odds", "BTS_Non"),
+}
+
+# Marchés à seuil : type d'événement -> (section, liste, colonne, signe du seuil)
+# Le handicap de l'équipe 2 est rangé sur la ligne opposée (-P) pour que
+# H1 -1.5 et H2 +1.5 se retrouvent sur la même ligne.
+LINE_MARKETS = {
+    7: ("handicaps", "main", "H1", 1),
+    8: ("handicaps", "main", "H2", -1),
+    9: ("totals", "global", "Plus", 1),
+    10: ("totals", "global", "Moins", 1),
+    11: ("totals", "team_1", "Plus", 1),
+    12: ("totals", "team_1", "Moins", 1),
+    13: ("totals", "team_2", "Plus", 1),
+    14: ("totals", "team_2", "Moins", 1),
+}
+
+# Colonnes de chaque ligne, dans l'ordre de sortie
+LINE_COLUMNS = {
+    "totals": ("Plus", "Moins"),
+    "handicaps": ("H1", "H2"),
+}
+
+_COLUMN_INDEX = {
+    t: (section, name, LINE_COLUMNS[section].index(column), sign)
+    for t, (section, name, column, sign) in LINE_MARKETS.items()
+}
+
+
+def decode_payload(raw):
+    """
+    Décode une réponse brute de l'API (orjson si disponible).
+
+    Args:
+        raw (bytes|str|dict): Corps de la réponse
+
+    Returns:
+        dict: JSON décodé
+    """
+    if isinstance(raw, dict):
+        return raw
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def _empty_info():
+    return {
+        "current_score": None,
+        "current_time": None,
+        "probabilities": {},
+        "live_odds": {
+            "V1": "N/A", "V2": "N/A", "X": "N/A",
+            "BTS_Oui": "N/A", "BTS_Non": "N/A"
+        },
+        "double_chance": {},
+        "totals": {"global": [], "team_1": [], "team_2": []},
+        "handicaps": {"main": []},
+        "other_markets": {}
+    }
+
+
+def _iter_event_items(game_events):
+    """Aplatit Value.GE[*].E (listes de listes ou dicts isolés)"""
+    for group in game_events:
+        events = group.get("E") if isinstance(group, dict) else None
+        if not isinstance(events, list):
+            continue
+        for event_group in events:
+            if isinstance(event_group, list):
+                yield from event_group
+            else:
+                yield event_group
+
+
+class TotalsLine(list):
+    """
+    Lignes de totaux triées par seuil, avec index de recherche.
+
+    Reste une liste de dicts {"Seuil", "Plus", "Moins"} (json.dump, pickle et
+    le code existant la voient comme avant) ; les seuils sont convertis une
+    seule fois en float dans `thresholds` (même ordre que les lignes).
+    """
+
+    TOLERANCE = 0.1  # 2.5 vs 2.499999 (seuils en float)
+
+    def __init__(self, rows=()):
+        super().__init__(rows)
+        self.thresholds = []
+        self._rows = []  # Lignes dont le seuil est lisible, alignées sur thresholds
+        for row in self:
+            try:
+                threshold = float(row["Seuil"])
+            except (KeyError, TypeError, ValueError):
+                continue
+            self.thresholds.append(threshold)
+            self._rows.append(row)
+        if any(a > b for a, b in zip(self.thresholds, self.thresholds[1:])):
+            order = sorted(range(len(self.thresholds)), key=self.thresholds.__getitem__)
+            self.thresholds = [self.thresholds[i] for i in order]
+            self._rows = [self._rows[i] for i in order]
+
+    def __reduce__(self):
+        # Pickle : on reconstruit l'index depuis les lignes
+        return (type(self), (list(self),))
+
+    @classmethod
+    def of(cls, rows):
+        """Index sur `rows` (réutilisé tel quel si c'est déjà une TotalsLine)"""
+        if isinstance(rows, cls):
+            return rows
+        return cls(rows or ())
+
+    def find(self, threshold, tolerance=TOLERANCE):
+        """
+        Ligne du seuil demandé (à `tolerance` près), en O(log n).
+
+        Returns:
+            dict or None: Ligne {"Seuil", "Plus", "Moins"}
+        """
+        i = bisect.bisect_right(self.thresholds, threshold - tolerance)
+        if i < len(self.thresholds) and self.thresholds[i] - threshold < tolerance:
+            return self._rows[i]
+        return None
+
+    def odd(self, threshold, column="Plus", default="N/A"):
+        """Cote d'une colonne pour un seuil (default si seuil absent)"""
+        row = self.find(threshold)
+        return default if row is None else row.get(column, default)
+
+    def nearest(self, threshold):
+        """
+        Ligne au seuil le plus proche (le plus bas en cas d'égalité).
+
+        Returns:
+            dict or None
+        """
+        if not self.thresholds:
+            return None
+        i = bisect.bisect_left(self.thresholds, threshold)
+        if i == 0:
+            return self._rows[0]
+        if i == len(self.thresholds):
+            return self._rows[-1]
+        before, after = self.thresholds[i - 1], self.thresholds[i]
+        return self._rows[i - 1] if threshold - before <= after - threshold else self._rows[i]
+
+    def diff(self, previous, columns=LINE_COLUMNS["totals"]):
+        """
+        Mouvements de ligne depuis un snapshot précédent (fusion de deux listes triées).
+
+        Args:
+            previous (list): Totaux précédents (TotalsLine ou liste de lignes)
+            columns (tuple): Colonnes comparées
+
+        Returns:
+            dict: {seuil: {colonne: [avant, après]}} ; un seuil apparu ou
+                  disparu a "-" du côté manquant
+        """
+        previous = TotalsLine.of(previous)
+        moves = {}
+        a, b = previous.thresholds, self.thresholds
+        i = j = 0
+        while i < len(a) or j < len(b):
+            if j >= len(b) or (i < len(a) and a[i] < b[j] - self.TOLERANCE):
+                old, new, threshold = previous._rows[i], {}, a[i]
+                i += 1
+            elif i >= len(a) or b[j] < a[i] - self.TOLERANCE:
+                old, new, threshold = {}, self._rows[j], b[j]
+                j += 1
+            else:
+                old, new, threshold = previous._rows[i], self._rows[j], b[j]
+                i += 1
+                j += 1
+            changed = {
+                col: [old.get(col, "-"), new.get(col, "-")]
+                for col in columns if old.get(col, "-") != new.get(col, "-")
+            }
+            if changed:
+                moves[threshold] = changed
+        return moves
+
+
+def diff_totals(previous, current):
+    """
+    Mouvements de toutes les lignes de totaux entre deux snapshots.
+
+    Returns:
+        dict: {"global"|"team_1"|"team_2": {seuil: {colonne: [avant, après]}}}
+              (lignes sans mouvement omises)
+    """
+    previous, current = previous or {}, current or {}
+    moves = {}
+    for name in set(previous) | set(current):
+        line_moves = TotalsLine.of(current.get(name)).diff(previous.get(name))
+        if line_moves:
+            moves[name] = line_moves
+    return moves
+
+
+def _rows_from_buckets(buckets, columns):
+    """Transforme {seuil: [c1, c2]} en liste triée [{"Seuil", col1, col2}]"""
+    c1, c2 = columns
+    return [
+        {"Seuil": p, c1: pair[0], c2: pair[1]}
+        for p, pair in sorted(buckets.items())
+    ]
+
+
+def parse_api_data(json_data):
+    """
+    Parse les données capturées de l'API.
+
+    Args:
+        json_data (dict|bytes|str): Réponse JSON de l'API (décodée ou brute)
+
+    Returns:
+        dict: Données parsées structurées (live_odds, totals, handicaps, ...)
+    """
+    info = _empty_info()
+
+    try:
+        val = decode_payload(json_data).get("Value", {})
+
+        # Score et temps
+        sc = val.get("SC")
+        if sc:
+            fs = sc.get("FS")
+            if fs is not None:
+                info["current_score"] = f"{fs.get('S1', 0)}-{fs.get('S2', 0)}"
+            ts = sc.get("TS")
+            if ts is not None:
+                info["current_time"] = f"{ts // 60}:{ts % 60:02d}"
+
+        # Probabilités
+        wp = val.get("WP")
+        if wp:
+            info["probabilities"] = {
+                "P1": f"{wp.get('P1', 0)*100:.0f}%",
+                "PX": f"{wp.get('PX', 0)*100:.0f}%",
+                "P2": f"{wp.get('P2', 0)*100:.0f}%"
+            }
+
+        # Cotes : un seul passage, rangement direct par seuil
+        buckets = {
+            "totals": {"global": {}, "team_1": {}, "team_2": {}},
+            "handicaps": {"main": {}}
+        }
+        other = info["other_markets"]
+        simple_get = SIMPLE_MARKETS.get
+        line_get = _COLUMN_INDEX.get
+
+        for item in _iter_event_items(val.get("GE", ())):
+            if not isinstance(item, dict):
+                continue
+            t = item.get("T")
+            c = item.get("C")
+            if t is None or c is None:
+                continue
+            p = item.get("P")
+
+            target = simple_get(t)
+            if target is not None:
+                info[target[0]][target[1]] = c
+                continue
+
+            line = line_get(t)
+            if line is not None:
+                if p is None:
+                    continue
+                section, name, col, sign = line
+                key = p * sign if p else p
+                pair = buckets[section][name].get(key)
+                if pair is None:
+                    pair = buckets[section][name][key] = ["-", "-"]
+                pair[col] = c
+                continue
+
+            # Marché non répertorié : conservé brut pour analyse ultérieure
+            other.setdefault(str(t), {})[str(p) if p is not None else "_"] = c
+
+        for section, lists in buckets.items():
+            columns = LINE_COLUMNS[section]
+            for name, b in lists.items():
+                rows = _rows_from_buckets(b, columns)
+                info[section][name] = TotalsLine(rows) if section == "totals" else rows
+
+    except Exception as e:
+        print(f"      ⚠️ Erreur parsing API: {e}")
+
+    return info
+
+
+# ============================================================
+# 🐢 RÉFÉRENCE : ANCIEN PARSEUR (MatchScraper.parse_api_data)
+# ============================================================
+
+_LEGACY_ODDS = {1: "V1", 2: "X", 3: "V2", 180: "BTS_Oui", 181: "BTS_Non"}
+_LEGACY_TOTALS = {9: ("global", "Plus"), 10: ("global", "Moins"), 11: ("team_1", "Plus"),
+                  12: ("team_1", "Moins"), 13: ("team_2", "Plus"), 14: ("team_2", "Moins")}
+
+
+def _legacy_organize_totals(raw_list):
+    mapped = {}
+    for item in raw_list:
+        threshold = item.get("P")
+        if threshold is not None:
+            if threshold not in mapped:
+                mapped[threshold] = {"Plus": "-", "Moins": "-"}
+            mapped[threshold][item.get("Type")] = item.get("Cote")
+    return [
+        {"Seuil": threshold, "Plus": mapped[threshold]["Plus"], "Moins": mapped[threshold]["Moins"]}
+        for threshold in sorted(mapped.keys())
+    ]
+
+
+def parse_api_data_legacy(json_data):
+    """
+    Ancien parseur (score, temps, probabilités, 1X2, BTS et totaux seulement).
+
+    Returns:
+        dict: {"current_score", "current_time", "probabilities", "live_odds", "totals"}
+    """
+    info = {
+        "current_score": None,
+        "current_time": None,
+        "probabilities": {},
+        "live_odds": {
+            "V1": "N/A", "V2": "N/A", "X": "N/A",
+            "BTS_Oui": "N/A", "BTS_Non": "N/A"
+        },
+        "totals": {"global": [], "team_1": [], "team_2": []}
+    }
+    try:
+        val = decode_payload(json_data).get("Value", {})
+        if "SC" in val:
+            sc = val["SC"]
+            if "FS" in sc:
+                info["current_score"] = f"{sc['FS'].get('S1', 0)}-{sc['FS'].get('S2', 0)}"
+            if "TS" in sc:
+                info["current_time"] = f"{sc['TS'] // 60}:{sc['TS'] % 60:02d}"
+        if "WP" in val:
+            info["probabilities"] = {
+                "P1": f"{val['WP'].get('P1', 0)*100:.0f}%",
+                "PX": f"{val['WP'].get('PX', 0)*100:.0f}%",
+                "P2": f"{val['WP'].get('P2', 0)*100:.0f}%"
+            }
+
+        raw = {"global": [], "team_1": [], "team_2": []}
+        for group in val.get("GE", []):
+            events = group.get("E", [])
+            if not isinstance(events, list):
+                continue
+            for event_group in events:
+                items = event_group if isinstance(event_group, list) else [event_group]
+                for item in items:
+                    if not isinstance(item, dict):
+                        continue
+                    t, c, p = item.get("T"), item.get("C"), item.get("P")
+                    if t is None or c is None:
+                        continue
+                    if t in _LEGACY_ODDS:
+                        info["live_odds"][_LEGACY_ODDS[t]] = c
+                    elif t in _LEGACY_TOTALS and p is not None:
+                        name, type_pari = _LEGACY_TOTALS[t]
+                        raw[name].append({"P": p, "Type": type_pari, "Cote": c})
+        for name, raw_list in raw.items():
+            info["totals"][name] = _legacy_organize_totals(raw_list)
+    except Exception as e:
+        print(f"      ⚠️ Erreur parsing API: {e}")
+    return info
+
+
+def benchmark(paths, repeat=200):
+    """
+    Mesure le débit du parseur sur des réponses GetGameZip enregistrées.
+
+    Args:
+        paths (list): Fichiers JSON (une réponse par fichier) ou dossiers
+        repeat (int): Nombre de passages sur l'ensemble des payloads
+
+    Returns:
+        dict: {"payloads", "parse_per_s", "decode_parse_per_s", "mb_per_s"}
+    """
+    raws = []
+    for path in paths:
+        if os.path.isdir(path):
+            files = [os.path.join(path, f) for f in sorted(os.listdir(path)) if f.endswith(".json")]
+        else:
+            files = [path]
+        for f in files:
+            with open(f, "rb") as fh:
+                raws.append(fh.read())
+
+    if not raws:
+        print("❌ Aucun payload trouvé")
+        return {}
+
+    decoded = [decode_payload(r) for r in raws]
+    total_bytes = sum(len(r) for r in raws) * repeat
+    n = len(raws) * repeat
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for d in decoded:
+            parse_api_data(d)
+    parse_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for r in raws:
+            parse_api_data(r)
+    full_elapsed = time.perf_counter() - start
+
+    report = {
+        "payloads": len(raws),
+        "parse_per_s": n / parse_elapsed,
+        "decode_parse_per_s": n / full_elapsed,
+        "mb_per_s": total_bytes / full_elapsed / 1e6,
+        "decoder": "orjson" if orjson is not None else "json"
+    }
+    print(f"📊 {report['payloads']} payloads x {repeat} ({report['decoder']})")
+    print(f"   ⚡ Parsing seul      : {report['parse_per_s']:.0f} payloads/s")
+    print(f"   ⚡ Décodage+parsing  : {report['decode_parse_per_s']:.0f} payloads/s "
+          f"({report['mb_per_s']:.1f} Mo/s)")
+    return report
+
+
+if __name__ == "__main__":
+    # Usage : python -m monitor.api_parser <fichier.json|dossier> [...]
+    if len(sys.argv) < 2:
+        print("Usage : python -m monitor.api_parser <payloads.json|dossier> [...]")
+        sys.exit(1)
+    benchmark(sys.argv[1:])
@@ -0,0 +1,401 @@
+"""
+monitor/backtest.py
+Backtest hors-ligne des règles de BettingAnalyzer sur l'historique des scans.
+
+Pour chaque journée : les snapshots (matchs_history_log.jsonl ou table
+snapshots de la base SQLite) sont rejoués dans l'ordre chronologique à
+travers l'analyseur ; chaque alerte (score >= 50, une seule fois par
+match/type/niveau/action comme le bot Telegram) devient un pari simulé à
+1 unité, à la cote capturée au moment de l'alerte (cotes_extra / cotes live).
+Le résultat final de chaque match est joint pour régler les paris.
+
+Les journées et les jeux de paramètres sont répartis sur plusieurs processus.
+
+Usage :
+    python -m monitor.backtest --all
+    python -m monitor.backtest --date 2025-12-30 --sweep MIN_MINUTE_TRAILING=45,50,55 DOMINATION_RATIO=1.3,1.5
+"""
+
+import argparse
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+from .betting_logic import BettingAnalyzer
+from .history_log import HistoryReader
+
+
+HISTORY_FILENAME = "matchs_history_log.jsonl"
+RESULTS_FILENAME = "resultats_finaux.json"  # Optionnel : {match_id: "2-1"}
+MIN_FINAL_MINUTE = 85   # Dernier score LIVE considéré comme final à partir de cette minute
+ALERT_MIN_SCORE = 50    # Même seuil que le monitor
+
+# Mot-clé de l'action suggérée -> type de pari simulé (premier trouvé)
+BET_RULES = [
+    ("Victoire sèche du Favori", "FAV_WIN"),
+    ("Remboursé si Nul", "FAV_DNB"),
+    ("Prochain but équipe favori", "FAV_GOAL"),
+    ("Prochain but du Favori", "FAV_GOAL"),
+    ("But dans le match", "MATCH_GOAL"),
+    ("Total Buts +0.5", "MATCH_GOAL"),
+]
+
+def _parse_score(score):
+    try:
+        home, away = map(int, str(score).replace(" ", "").split("-"))
+        return home, away
+    except (TypeError, ValueError):
+        return None
+
+
+def _minute(game_time):
+    try:
+        return int(str(game_time).split(":")[0])
+    except (TypeError, ValueError):
+        return 0
+
+
+def _to_float(value):
+    try:
+        return float(str(value).replace(",", "."))
+    except (TypeError, ValueError):
+        return None
+
+
+# ============================================================
+# Chargement d'une journée
+# ============================================================
+
+def load_snapshots(date_str, root="match", source="jsonl", db_path=None):
+    """
+    Snapshots d'une journée triés par horodatage de scan.
+
+    Args:
+        source (str): "jsonl" (historique fichier) ou "sqlite" (table snapshots)
+    """
+    if source == "sqlite":
+        from .storage import DEFAULT_DB_PATH, SQLiteStore
+        store = SQLiteStore(db_path or DEFAULT_DB_PATH, root=root)
+        try:
+            snapshots, _ = store.read("snapshots", date_str)
+        finally:
+            store.close()
+    else:
+        snapshots = list(HistoryReader(os.path.join(root, date_str, HISTORY_FILENAME)).iter_all())
+    snapshots.sort(key=lambda s: s.get("scan_timestamp") or s.get("timestamp") or "")
+    return snapshots
+
+
+def final_results(snapshots, date_str=None, root="match", min_final_minute=MIN_FINAL_MINUTE):
+    """
+    Score final par match.
+
+    Priorité au fichier resultats_finaux.json s'il existe ; sinon dernier
+    score LIVE, retenu seulement si le match est ensuite passé FINISHED ou
+    si ce score a été vu à partir de la `min_final_minute`e minute.
+
+    Returns:
+        dict: {match_id: (buts domicile, buts extérieur)}
+    """
+    results = {}
+    if date_str:
+        path = os.path.join(root, date_str, RESULTS_FILENAME)
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for m_id, score in json.load(f).items():
+                    parsed = _parse_score(score)
+                    if parsed:
+                        results[str(m_id)] = parsed
+
+    last_live = {}
+    finished = set()
+    for snap in snapshots:
+        m_id = str(snap.get("id"))
+        if snap.get("status") == "LIVE":
+            parsed = _parse_score(snap.get("score"))
+            if parsed:
+                last_live[m_id] = (parsed, _minute(snap.get("game_time")))
+        elif snap.get("status") == "FINISHED" and m_id in last_live:
+            # Le scraper ne lit pas le score des matchs terminés : seul le statut compte
+            finished.add(m_id)
+
+    for m_id, (score, minute) in last_live.items():
+        if m_id not in results and (m_id in finished or minute >= min_final_minute):
+            results[m_id] = score
+    return results
+
+
+# ============================================================
+# Simulation des paris
+# ============================================================
+
+def classify_bet(action):
+    """Type de pari correspondant à l'action suggérée (None = pas de pari)"""
+    if not action:
+        return None
+    for keyword, bet_type in BET_RULES:
+        if keyword in action:
+            return bet_type
+    return None
+
+
+def bet_odds(bet_type, snap, opportunity, side_fav):
+    """Cote disponible au moment de l'alerte pour le pari simulé"""
+    extra = opportunity.get("cotes_extra", {})
+    live = snap.get("live_odds", {}) or {}
+    fav_odd = _to_float(live.get("V1" if side_fav == "home" else "V2"))
+    if bet_type == "FAV_GOAL":
+        return _to_float(extra.get("but_favori"))
+    if bet_type == "MATCH_GOAL":
+        return _to_float(extra.get("but_match"))
+    if bet_type == "FAV_WIN":
+        return fav_odd
+    if bet_type == "FAV_DNB":
+        # Cote "remboursé si nul" non capturée : approximation V * (X - 1) / X
+        draw_odd = _to_float(live.get("X"))
+        if fav_odd and draw_odd and draw_odd > 1:
+            return round(fav_odd * (draw_odd - 1) / draw_odd, 3)
+    return None
+
+
+def settle_bet(bet_type, side_fav, score_at_alert, final_score):
+    """
+    Returns:
+        str: "win", "loss" ou "push"
+    """
+    fav_idx = 0 if side_fav == "home" else 1
+    fav_now, fav_end = score_at_alert[fav_idx], final_score[fav_idx]
+    adv_end = final_score[1 - fav_idx]
+    if bet_type == "FAV_GOAL":
+        return "win" if fav_end > fav_now else "loss"
+    if bet_type == "MATCH_GOAL":
+        return "win" if sum(final_score) > sum(score_at_alert) else "loss"
+    if bet_type == "FAV_WIN":
+        return "win" if fav_end > adv_end else "loss"
+    if bet_type == "FAV_DNB":
+        if fav_end == adv_end:
+            return "push"
+        return "win" if fav_end > adv_end else "loss"
+    return "loss"
+
+
+def _empty_bucket():
+    return {"alerts": 0, "bets": 0, "wins": 0, "losses": 0, "pushes": 0,
+            "no_odds": 0, "unresolved": 0, "staked": 0.0, "profit": 0.0}
+
+
+def make_analyzer(params=None):
+    """BettingAnalyzer dont les seuils de betting_rules.json sont remplacés par `params`"""
+    if not params:
+        return BettingAnalyzer()
+    return BettingAnalyzer(rule_params=params)  # RuleError si paramètre inconnu
+
+
+def backtest_snapshots(snapshots, results, params=None):
+    """
+    Rejoue des snapshots et règle les paris suggérés.
+
+    Args:
+        snapshots (list): Snapshots (rejoués dans l'ordre chronologique)
+        results (dict): Scores finaux {match_id: (home, away)}
+        params (dict): Seuils de l'analyseur à tester
+
+    Returns:
+        dict: {"by_type": {...}, "by_level": {...}, "total": {...}, "bets": [...]}
+    """
+    analyzer = make_analyzer(params)
+    report = {"by_type": {}, "by_level": {}, "total": _empty_bucket(), "bets": []}
+    seen = set()
+
+    # Même enchaînement que le bot : chaque scan alimente l'état glissant
+    # du match (observe) avant le calcul, pour les règles de dynamique.
+    snapshots = sorted(snapshots, key=lambda s: s.get("scan_timestamp") or s.get("timestamp") or "")
+    for snap in snapshots:
+        features = analyzer.observe(snap)
+        if snap.get("status") != "LIVE":
+            continue
+        opp = analyzer.calculate_opportunity_score(snap, features)
+        if opp.get("score", 0) < ALERT_MIN_SCORE:
+            continue
+
+        m_id = str(snap.get("id"))
+        action = opp.get("action_suggeree")
+        key = (m_id, opp.get("type"), opp.get("niveau"), action)
+        if key in seen:
+            continue  # Même alerte que le bot n'enverrait qu'une fois
+        seen.add(key)
+
+        buckets = [
+            report["total"],
+            report["by_type"].setdefault(opp.get("type") or "AUCUN", _empty_bucket()),
+            report["by_level"].setdefault(opp.get("niveau"), _empty_bucket()),
+        ]
+        for b in buckets:
+            b["alerts"] += 1
+
+        bet_type = classify_bet(action)
+        if bet_type is None:
+            continue
+        side_fav = "home" if snap.get("pronostic") == "V1" else "away"
+        odds = bet_odds(bet_type, snap, opp, side_fav)
+        score_at_alert = _parse_score(snap.get("score"))
+        final = results.get(m_id)
+
+        if odds is None or odds <= 1:
+            outcome = "no_odds"
+        elif final is None or score_at_alert is None:
+            outcome = "unresolved"
+        else:
+            outcome = settle_bet(bet_type, side_fav, score_at_alert, final)
+
+        profit = {"win": odds - 1 if odds else 0.0, "loss": -1.0}.get(outcome, 0.0)
+        for b in buckets:
+            if outcome in ("no_odds", "unresolved"):
+                b[outcome] += 1
+                continue
+            b["bets"] += 1
+            b["staked"] += 1.0
+            b[{"win": "wins", "loss": "losses", "push": "pushes"}[outcome]] += 1
+            b["profit"] += profit
+
+        report["bets"].append({
+            "match_id": m_id, "ts": snap.get("scan_timestamp"), "type": opp.get("type"),
+            "niveau": opp.get("niveau"), "bet": bet_type, "odds": odds,
+            "score": snap.get("score"), "minute": _minute(snap.get("game_time")),
+            "final": "-".join(map(str, final)) if final else None, "outcome": outcome,
+        })
+    return report
+
+
+@lru_cache(maxsize=8)
+def _load_day(date_str, root, source):
+    # Cache par processus : une journée n'est lue qu'une fois par worker
+    snapshots = load_snapshots(date_str, root, source)
+    return snapshots, final_results(snapshots, date_str, root)
+
+
+def _run_task(task):
+    date_str, params, root, source = task
+    snapshots, results = _load_day(date_str, root, source)
+    report = backtest_snapshots(snapshots, results, dict(params))
+    return date_str, params, report
+
+
+def merge_reports(reports):
+    """Additionne des rapports (plusieurs journées)"""
+    merged = {"by_type": {}, "by_level": {}, "total": _empty_bucket(), "bets": []}
+
+    def add(dst, src):
+        for k, v in src.items():
+            dst[k] += v
+
+    for r in reports:
+        add(merged["total"], r["total"])
+        for section in ("by_type", "by_level"):
+            for name, bucket in r[section].items():
+                add(merged[section].setdefault(name, _empty_bucket()), bucket)
+        merged["bets"].extend(r["bets"])
+    return merged
+
+
+def summarize(bucket):
+    """Taux de réussite et ROI d'un groupe de paris"""
+    settled = bucket["wins"] + bucket["losses"]
+    return {
+        **{k: v for k, v in bucket.items() if k not in ("staked", "profit")},
+        "hit_rate": round(bucket["wins"] / settled, 3) if settled else None,
+        "roi": round(bucket["profit"] / bucket["staked"], 3) if bucket["staked"] else None,
+        "profit": round(bucket["profit"], 2),
+    }
+
+
+def expand_grid(sweep):
+    """{"A": [1, 2], "B": [3]} -> [(("A", 1), ("B", 3)), (("A", 2), ("B", 3))]"""
+    if not sweep:
+        return [()]
+    names = sorted(sweep)
+    return [tuple(zip(names, values)) for values in itertools.product(*(sweep[n] for n in names))]
+
+
+def run_backtest(dates, sweep=None, root="match", source="jsonl", workers=None):
+    """
+    Backtest multi-processus : une tâche par (journée, jeu de paramètres).
+
+    Returns:
+        list: [(params, rapport fusionné sur toutes les journées), ...]
+    """
+    grid = expand_grid(sweep)
+    tasks = [(d, params, root, source) for params in grid for d in dates]
+    by_params = {params: [] for params in grid}
+
+    if workers == 1 or len(tasks) == 1:
+        outputs = list(map(_run_task, tasks))
+    else:
+        # Tâches groupées par paramètres : chaque worker garde ses journées en cache
+        chunksize = max(1, len(tasks) // (4 * (workers or os.cpu_count() or 1)))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            outputs = list(executor.map(_run_task, tasks, chunksize=chunksize))
+
+    for date_str, params, report in outputs:
+        by_params[params].append(report)
+    return [(dict(params), merge_reports(by_params[params])) for params in grid]
+
+
+def available_dates(root="match", source="jsonl"):
+    if source == "sqlite":
+        from .storage import DEFAULT_DB_PATH, SQLiteStore
+        store = SQLiteStore(DEFAULT_DB_PATH, root=root)
+        try:
+            rows = store.conn.execute("SELECT DISTINCT date FROM snapshots ORDER BY date").fetchall()
+        finally:
+            store.close()
+        return [r[0] for r in rows]
+    return sorted(
+        d for d in os.listdir(root)
+        if os.path.exists(os.path.join(root, d, HISTORY_FILENAME))
+    )
+
+
+def _parse_sweep(items):
+    sweep = {}
+    for item in items or []:
+        name, _, values = item.partition("=")
+        sweep[name.strip()] = [float(v) if "." in v else int(v) for v in values.split(",") if v]
+    return sweep
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtest des règles BettingAnalyzer")
+    parser.add_argument("--date", action="append", help="Date YYYY-MM-DD (répétable)")
+    parser.add_argument("--all", action="store_true", help="Toutes les journées disponibles")
+    parser.add_argument("--sweep", nargs="*", help="NOM=v1,v2,... (ex: DOMINATION_RATIO=1.3,1.5)")
+    parser.add_argument("--source", choices=["jsonl", "sqlite"], default="jsonl")
+    parser.add_argument("--root", default="match")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--bets", action="store_true", help="Affiche le détail des paris")
+    args = parser.parse_args()
+
+    dates = available_dates(args.root, args.source) if args.all else (args.date or [])
+    if not dates:
+        parser.error("aucune journée (--date ou --all)")
+
+    results = run_backtest(dates, _parse_sweep(args.sweep), args.root, args.source, args.workers)
+    results.sort(key=lambda r: r[1]["total"]["profit"], reverse=True)
+
+    print(f"📊 Backtest sur {len(dates)} journée(s), {len(results)} jeu(x) de paramètres\n")
+    for params, report in results:
+        print(f"{'='*70}")
+        print(f"⚙️  {params or 'paramètres actuels'}")
+        print(f"   TOTAL : {summarize(report['total'])}")
+        for section, title in (("by_type", "Règle"), ("by_level", "Niveau")):
+            for name, bucket in sorted(report[section].items(), key=lambda x: str(x[0])):
+                print(f"   {title} {name} : {summarize(bucket)}")
+        if args.bets:
+            for bet in report["bets"]:
+                print(f"      {bet}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""
+monitor/batch_scoring.py
+Evaluation vectorisée (numpy) des règles de BettingAnalyzer sur un lot de
+snapshots : favori perdant, nul tardif, domination statistique.
+
+Les snapshots sont d'abord convertis une seule fois en colonnes (ou lus
+directement depuis l'export Parquet de monitor/history_export.py), puis les
+règles de betting_rules.json, compilées en expressions numpy par
+rule_engine.py, sont appliquées en opérations sur tableaux. Le résultat (score,
+niveau, type, risque, action) est identique au chemin scalaire
+calculate_opportunity_score, ce que differential_check() vérifie.
+
+Usage :
+    python -m monitor.batch_scoring 2025-12-30      # vérification + chronos
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+
+from .betting_logic import BettingAnalyzer
+from .rule_engine import default_engine
+
+
+PRONOSTIC_CODES = {"V1": 1, "V2": 2}
+RESULT_FIELDS = ("score", "niveau", "type", "risque", "action_suggeree")
+
+
+def _stat_value(stats, key, side):
+    # Même règle que _analyze_statistical_domination : chaîne de chiffres ou 0
+    val = stats.get(key, {}).get(side, "0")
+    return int(val) if isinstance(val, str) and val.isdigit() else 0
+
+
+def columns_from_snapshots(snapshots):
+    """
+    Convertit des snapshots (dicts) en colonnes numpy, en une seule passe.
+
+    Une ligne est `valid` si le chemin scalaire irait jusqu'à l'analyse
+    (LIVE, score/minute/cote lisibles, pronostic V1 ou V2).
+
+    Returns:
+        dict: Colonnes numpy de même longueur
+    """
+    n = len(snapshots)
+    valid = np.zeros(n, dtype=bool)
+    home = np.zeros(n, dtype=np.int64)
+    away = np.zeros(n, dtype=np.int64)
+    minutes = np.zeros(n, dtype=np.int64)
+    pronostic = np.zeros(n, dtype=np.int8)
+    odd_v1 = np.full(n, np.nan)
+    odd_v2 = np.full(n, np.nan)
+    att_home = np.zeros(n, dtype=np.int64)
+    att_away = np.zeros(n, dtype=np.int64)
+
+    for i, m in enumerate(snapshots):
+        if m.get("status") != "LIVE":
+            continue
+        try:
+            score = m.get("score", "0-0")
+            if "-" not in score:
+                continue
+            h, a = map(int, score.replace(" ", "").split("-"))
+            game_time = m.get("game_time", "00:00")
+            minute = int(game_time.split(":")[0]) if ":" in game_time else 0
+            float(m.get("cote", 0))
+            live_odds = m.get("live_odds", {})
+            try: v1 = float(live_odds.get("V1"))
+            except: v1 = np.nan
+            try: v2 = float(live_odds.get("V2"))
+            except: v2 = np.nan
+        except:
+            continue
+
+        code = PRONOSTIC_CODES.get(m.get("pronostic", ""), 0)
+        if not code:
+            continue
+        valid[i] = True
+        home[i], away[i], minutes[i], pronostic[i] = h, a, minute, code
+        odd_v1[i], odd_v2[i] = v1, v2
+        try:
+            stats = m.get("stats", {})
+            att_home[i] = _stat_value(stats, "Attaques", "home")
+            att_away[i] = _stat_value(stats, "Attaques", "away")
+        except:
+            pass
+
+    return {
+        "valid": valid, "score_home": home, "score_away": away, "minute": minutes,
+        "pronostic": pronostic, "odd_v1": odd_v1, "odd_v2": odd_v2,
+        "attacks_home": att_home, "attacks_away": att_away,
+    }
+
+
+def columns_from_frame(df):
+    """
+    Colonnes depuis un DataFrame de monitor.history_export.load_history().
+
+    Returns:
+        dict: Colonnes numpy de même longueur
+    """
+    pronostic = df["pronostic"].map(PRONOSTIC_CODES).fillna(0).to_numpy(dtype=np.int8)
+    valid = (
+        (df["status"] == "LIVE").to_numpy()
+        & df["score_home"].notna().to_numpy()
+        & df["score_away"].notna().to_numpy()
+        & df["cote"].notna().to_numpy()
+        & (pronostic > 0)
+    )
+    return {
+        "valid": valid,
+        "score_home": df["score_home"].fillna(0).to_numpy(dtype=np.int64),
+        "score_away": df["score_away"].fillna(0).to_numpy(dtype=np.int64),
+        "minute": df["minute"].fillna(0).to_numpy(dtype=np.int64),
+        "pronostic": pronostic,
+        "odd_v1": df["odd_v1"].to_numpy(dtype=float, na_value=np.nan),
+        "odd_v2": df["odd_v2"].to_numpy(dtype=float, na_value=np.nan),
+        "attacks_home": df["attacks_home"].fillna(0).to_numpy(dtype=np.int64),
+        "attacks_away": df["attacks_away"].fillna(0).to_numpy(dtype=np.int64),
+    }
+
+
+def score_batch(cols, rules=None):
+    """
+    Applique les règles "opportunite" (betting_rules.json) sur des colonnes.
+
+    Args:
+        cols (dict): Sortie de columns_from_snapshots / columns_from_frame
+        rules (RuleEngine): Moteur de règles (défaut : moteur partagé)
+
+    Returns:
+        dict: Tableaux score (int), niveau, type, risque, action_suggeree (objets)
+    """
+    rules = rules or default_engine()
+    is_v1 = cols["pronostic"] == 1
+    score_fav = np.where(is_v1, cols["score_home"], cols["score_away"])
+    score_adv = np.where(is_v1, cols["score_away"], cols["score_home"])
+
+    # Variables vues du favori, comme opportunity_context() (chemin scalaire)
+    variables = {
+        "minutes": cols["minute"],
+        "score_fav": score_fav,
+        "score_adv": score_adv,
+        "ecart": score_adv - score_fav,
+        "cote_live": np.where(is_v1, cols["odd_v1"], cols["odd_v2"]),
+        "att_fav": np.where(is_v1, cols["attacks_home"], cols["attacks_away"]),
+        "att_adv": np.where(is_v1, cols["attacks_away"], cols["attacks_home"]),
+    }
+    result = rules.ruleset(BettingAnalyzer.RULESET).evaluate_batch(variables, mask=cols["valid"])
+    return {field: result[field] for field in RESULT_FIELDS}
+
+
+def score_snapshots(snapshots, rules=None):
+    """Raccourci : snapshots (dicts) -> résultats vectorisés"""
+    return score_batch(columns_from_snapshots(snapshots), rules)
+
+
+def differential_check(snapshots, analyzer=None):
+    """
+    Compare le chemin vectorisé au chemin scalaire, ligne par ligne.
+
+    Returns:
+        list: Divergences [(index, champ, scalaire, vectorisé), ...]
+    """
+    analyzer = analyzer or BettingAnalyzer()
+    batch = score_snapshots(snapshots, analyzer.rules)
+    mismatches = []
+    for i, snap in enumerate(snapshots):
+        expected = analyzer.calculate_opportunity_score(dict(snap))
+        for field in RESULT_FIELDS:
+            got = batch[field][i]
+            got = int(got) if field == "score" else got
+            if expected.get(field) != got:
+                mismatches.append((i, field, expected.get(field), got))
+    return mismatches
+
+
+def main():
+    from .history_log import HistoryReader
+
+    parser = argparse.ArgumentParser(description="Scoring vectorisé d'une journée d'historique")
+    parser.add_argument("date", help="Date YYYY-MM-DD")
+    parser.add_argument("--root", default="match")
+    args = parser.parse_args()
+
+    path = os.path.join(args.root, args.date, "matchs_history_log.jsonl")
+    snapshots = list(HistoryReader(path).iter_all())
+    print(f"📂 {len(snapshots)} snapshots ({path})")
+
+    analyzer = BettingAnalyzer()
+    start = time.perf_counter()
+    for snap in snapshots:
+        analyzer.calculate_opportunity_score(snap)
+    scalar_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    cols = columns_from_snapshots(snapshots)
+    convert_s = time.perf_counter() - start
+    start = time.perf_counter()
+    result = score_batch(cols)
+    batch_s = time.perf_counter() - start
+
+    mismatches = differential_check(snapshots, analyzer)
+    print(f"⏱️ Scalaire : {scalar_s*1000:.1f} ms | Colonnes : {convert_s*1000:.1f} ms "
+          f"| Règles vectorisées : {batch_s*1000:.1f} ms")
+    print(f"🎯 Alertes (score >= 50) : {int((result['score'] >= 50).sum())}")
+    if mismatches:
+        print(f"❌ {len(mismatches)} divergences, ex : {mismatches[:5]}")
+    else:
+        print("✅ Chemin vectorisé identique au chemin scalaire")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,21 +6,49 @@ MISE A JOUR : Extraction des cotes de but (+0.5) et structure d'alerte enrichie
 
 from datetime import datetime
 
+from .api_parser import TotalsLine
+from .match_state import MatchStateRegistry
+from .rule_engine import RuleEngine, default_engine, opportunity_context
+
 class BettingAnalyzer:
     """Analyseur de matchs pour détecter les opportunités de paris"""
     
-    # === SEUILS CONFIGURABLES ===
-    MIN_MINUTE_TRAILING = 45  # Minute min pour favori perdant
-    MIN_MINUTE_DRAW = 45      # Minute min pour match nul
-    MIN_MINUTE_LATE_GAME = 60 # Minute pour fin de match
-    LATE_GAME_THRESHOLD = 75  # Minute pour actions de dernière minute
-    
-    DOMINATION_RATIO = 1.5    # Ratio d'attaques pour considérer domination
-    MIN_MINUTE_DOMINATION = 45
-    
-    def __init__(self):
-        """Initialise l'analyseur avec une liste d'alertes vide"""
+    # Les scénarios et leurs seuils sont décrits dans betting_rules.json
+    # (voir rule_engine.py) : ensemble de règles "opportunite".
+    RULESET = "opportunite"
+
+    # Indicateurs de dynamique (scalaires du contexte des règles) recopiés
+    # dans l'opportunité : ce sont ceux qu'utilisent règles et messages.
+    DYNAMIQUE_KEYS = ("window_minutes", "minutes_since_goal", "danger_fav",
+                      "danger_adv", "odd_fav_velocity")
+
+    def __init__(self, publisher=None, rules=None, rule_params=None):
+        """
+        Initialise l'analyseur avec une liste d'alertes vide.
+
+        Args:
+            publisher: Callable optionnel appelé avec chaque nouvelle alerte
+                       (ex: AlertQueue.publish, consommé par 05_alert_system.py)
+            rules (RuleEngine): Moteur de règles (défaut : moteur partagé sur
+                                betting_rules.json, rechargé à chaud)
+            rule_params (dict): Seuils remplaçant ceux du fichier (ex: backtest)
+        """
         self.alerts = []
+        self.publisher = publisher
+        if rules is None:
+            rules = RuleEngine(params=rule_params) if rule_params else default_engine()
+        self.rules = rules
+        self.match_states = MatchStateRegistry()
+
+    def observe(self, match_data):
+        """
+        Ajoute un scan à l'état glissant du match.
+
+        Returns:
+            dict: Indicateurs de dynamique (vide si match non LIVE)
+        """
+        state = self.match_states.update(match_data)
+        return state.features() if state else {}
 
     # ============================================================
     # 🛠️ NOUVELLES FONCTIONS POUR LES COTES DE BUTS
@@ -28,19 +56,13 @@ class BettingAnalyzer:
     
     def _find_best_odd(self, totals_list, target_threshold):
         """
-        Cherche la cote 'Plus' (Over) pour un seuil donné ou le plus proche.
+        Cherche la cote 'Plus' (Over) pour un seuil donné.
         Ex: Si le score est 1-0, on cherche l'Over 1.5.
+        Recherche par bisection dans la TotalsLine construite par api_parser
+        (index construit à la volée pour une liste relue depuis le JSON).
         """
-        best_odd = "N/A"
-        if not totals_list: return best_odd
-
-        for t in totals_list:
-            try:
-                # On compare avec une petite marge d'erreur pour les float (2.5 vs 2.5)
-                if abs(float(t['Seuil']) - target_threshold) < 0.1:
-                    return t['Plus']
-            except: continue
-        return best_odd
+        if not totals_list: return "N/A"
+        return TotalsLine.of(totals_list).odd(target_threshold, "Plus")
 
     def _extract_target_odds(self, match_data, side_fav):
         """
@@ -87,9 +109,14 @@ class BettingAnalyzer:
     # 🧠 LOGIQUE PRINCIPALE
     # ============================================================
     
-    def calculate_opportunity_score(self, match_data):
+    def calculate_opportunity_score(self, match_data, features=None):
         """
         Calcule une note d'opportunité et propose une ACTION DE PARI.
+
+        Args:
+            match_data (dict): Scan courant
+            features (dict): Indicateurs de observe() (optionnel). Sans eux,
+                             seules les règles sur le scan courant s'appliquent.
         """
         opportunity = {
             "score": 0,
@@ -132,14 +159,8 @@ class BettingAnalyzer:
 
         # 3. Définition dynamique du favori
         if pronostic == "V1":
-            score_fav = home_score
-            score_adv = away_score
-            cote_live_fav = c_v1
             side_fav = "home"
         elif pronostic == "V2":
-            score_fav = away_score
-            score_adv = home_score
-            cote_live_fav = c_v2
             side_fav = "away"
         else:
             return opportunity
@@ -147,27 +168,15 @@ class BettingAnalyzer:
         # === 4. RECUPERATION DES COTES CIBLÉES (NOUVEAU) ===
         opportunity["cotes_extra"] = self._extract_target_odds(match_data, side_fav)
 
-        # 5. Analyse des scénarios
-        ecart = score_adv - score_fav
-        
-        # --- CAS 1 : FAVORI PERDANT ---
-        if score_adv > score_fav and minutes >= self.MIN_MINUTE_TRAILING:
-            opportunity = self._analyze_trailing_favorite(
-                opportunity, ecart, minutes, favori, pronostic, 
-                cote_initiale, score, cote_live_fav
-            )
-        
-        # --- CAS 2 : MATCH NUL TARDIF ---
-        elif score_adv == score_fav and minutes >= self.MIN_MINUTE_DRAW:
-            opportunity = self._analyze_late_draw(
-                opportunity, minutes, score, cote_live_fav
-            )
-        
-        # --- CAS 3 : DOMINATION STATISTIQUE ---
-        opportunity = self._analyze_statistical_domination(
-            opportunity, match_data, side_fav, minutes, 
-            score_adv, score_fav
+        # 5. Analyse des scénarios (règles déclaratives)
+        att_home, att_away = self._attack_counts(match_data)
+        ctx = opportunity_context(
+            home_score, away_score, minutes, pronostic, cote_initiale,
+            c_v1, c_v2, att_home, att_away, favori, score, features
         )
+        self.rules.ruleset(self.RULESET).evaluate(ctx, opportunity)
+        if features:
+            opportunity["dynamique"] = {k: ctx[k] for k in self.DYNAMIQUE_KEYS}
         
         # 6. Finalisation du message
         if opportunity["action_suggeree"]:
@@ -175,84 +184,21 @@ class BettingAnalyzer:
             opportunity["recommandation"] = f"{rec}\n🔥 <b>{opportunity['action_suggeree']}</b>"
 
         return opportunity
-    
-    # ... (Les fonctions d'analyse interne restent inchangées, je les remets pour que le fichier soit complet)
-    
-    def _analyze_trailing_favorite(self, opp, ecart, minutes, favori, 
-                                   pronostic, cote_init, score, cote_live):
-        opp["type"] = "FAVORI_PERDANT"
-        opp["raisons"].append(
-            f"{favori} ({pronostic}) mené {score} (Cote init: {cote_init})"
-        )
-        
-        if ecart == 1 and minutes >= self.MIN_MINUTE_LATE_GAME:
-            opp["score"] = 90
-            opp["niveau"] = "🔴 ALERTE ROUGE"
-            opp["risque"] = "MOYEN"
-            opp["recommandation"] = "Le favori n'a qu'un but de retard. Pression maximale attendue."
-            
-            if minutes < self.LATE_GAME_THRESHOLD:
-                opp["action_suggeree"] = "👉 PARIER : Prochain but équipe favori (ou '1X/X2' Double Chance)"
-            else:
-                opp["action_suggeree"] = "👉 PARIER : But dans le match (Over 0.5 fin de match)"
-        
-        elif ecart >= 2:
-            opp["score"] = 75
-            opp["niveau"] = "🟠 ALERTE ORANGE"
-            opp["risque"] = "ÉLEVÉ"
-            opp["recommandation"] = "Écart important. Le favori va attaquer pour l'honneur."
-            opp["action_suggeree"] = "👉 PARIER : Total Buts +0.5 ou But du Favori (si cote > 1.60)"
-        
-        elif ecart == 1 and self.MIN_MINUTE_TRAILING <= minutes < self.MIN_MINUTE_LATE_GAME:
-            opp["score"] = 85
-            opp["niveau"] = "🔴 ALERTE ROUGE"
-            opp["risque"] = "MOYEN"
-            opp["recommandation"] = "Le favori a tout le temps de revenir."
-            opp["action_suggeree"] = f"👉 PARIER : Victoire sèche du Favori (Cote boostée : {cote_live})"
-        
-        return opp
-    
-    def _analyze_late_draw(self, opp, minutes, score, cote_live):
-        opp["type"] = "MATCH_NUL_TARDIF"
-        opp["raisons"].append(f"Score de parité {score} à la {minutes}'")
-        
-        if cote_live and cote_live >= 1.80:
-            opp["score"] = 80
-            opp["niveau"] = "🟠 ALERTE VALUE"
-            opp["risque"] = "MOYEN"
-            opp["recommandation"] = "Cote du favori devenue très intéressante."
-            opp["action_suggeree"] = "👉 PARIER : Victoire Favori (Remboursé si Nul) ou But fin de match"
-        else:
-            opp["score"] = 60
-            opp["niveau"] = "🟡 SURVEILLANCE"
-            opp["action_suggeree"] = "Attendre que la cote monte encore"
-        
-        return opp
-    
-    def _analyze_statistical_domination(self, opp, match_data, side_fav, 
-                                        minutes, score_adv, score_fav):
-        stats = match_data.get("stats", {})
+
+    @staticmethod
+    def _attack_counts(match_data):
+        """Attaques (domicile, extérieur) ; None si les stats sont illisibles"""
         try:
+            stats = match_data.get("stats", {})
+
             def get_stat(k, s):
                 val = stats.get(k, {}).get(s, "0")
                 return int(val) if isinstance(val, str) and val.isdigit() else 0
-            
-            att_fav = get_stat("Attaques", side_fav)
-            att_adv = get_stat("Attaques", "home" if side_fav == "away" else "away")
-            
-            if att_fav > att_adv * self.DOMINATION_RATIO and \
-               minutes >= self.MIN_MINUTE_DOMINATION and \
-               score_adv >= score_fav:
-                
-                opp["score"] += 10 
-                opp["raisons"].append(
-                    f"🔥 Domination : {att_fav} attaques vs {att_adv}"
-                )
-                if opp["action_suggeree"] is None:
-                    opp["action_suggeree"] = "👉 PARIER : Prochain but du Favori"
-        except: pass
-        return opp
-    
+
+            return get_stat("Attaques", "home"), get_stat("Attaques", "away")
+        except Exception:
+            return None, None
+
     def generate_alert_message(self, match_data, opportunity):
         """Génère un message d'alerte pour la CONSOLE uniquement"""
         if opportunity["score"] < 50:
@@ -266,7 +212,8 @@ class BettingAnalyzer:
         pour que le bot Telegram puisse les lire facilement.
         """
         if opportunity.get("score", 0) >= 50:
-            self.alerts.append({
+            alert = {
+                "match_id": str(match_data.get("id", "")),  # Colonne indexée (storage.py)
                 "match": match_data.get("match_complet"),
                 "timestamp": datetime.now().isoformat(),
                 # --- AJOUTS CRUCIAUX POUR TELEGRAM ---
@@ -274,7 +221,13 @@ class BettingAnalyzer:
                 "game_time": match_data.get("game_time", "N/A"),
                 # -------------------------------------
                 "opportunity": opportunity
-            })
+            }
+            self.alerts.append(alert)
+            if self.publisher is not None:
+                try:
+                    self.publisher(alert)
+                except Exception as e:
+                    print(f"⚠️ Publication alerte impossible : {e}")
     
     def get_alerts(self):
         return self.alerts
@@ -0,0 +1,345 @@
+"""
+monitor/daemon.py
+Démon de surveillance longue durée (un seul processus asyncio).
+
+Remplace la boucle "un sous-processus par cycle" de scheduler_monitor.py :
+le navigateur, l'analyseur, le dashboard en mémoire et le planificateur
+restent vivants entre les cycles. Les fichiers d'entrée ne sont relus que
+si leur mtime change, live_matches.json est produit en interne (ex-06) et
+un socket de contrôle local répond aux commandes health / stats / reload / stop.
+"""
+
+import asyncio
+import json
+import os
+import time
+from datetime import datetime
+
+from .alert_queue import AlertQueue
+from .betting_logic import BettingAnalyzer
+from .polling_scheduler import PollingScheduler
+from .scraper_engine import MatchScraper
+from . import history_export
+from .history_log import HistoryWriter
+from .scan_result import process_scan_result
+from .state_store import DashboardStore, atomic_write_json
+from .storage import STORAGE_BACKEND, open_store
+
+
+class DayFiles:
+    """Chemins des fichiers de la journée (match/YYYY-MM-DD/...)"""
+
+    def __init__(self, date_str=None, root="match"):
+        self.date_str = date_str or datetime.now().strftime("%Y-%m-%d")
+        self.base_dir = os.path.join(root, self.date_str)
+        self.favorites = os.path.join(self.base_dir, "matchs_tries_favoris.json")
+        self.dashboard = os.path.join(self.base_dir, "matchs_surveillance_final.json")
+        self.history = os.path.join(self.base_dir, "matchs_history_log.jsonl")
+        self.alerts = os.path.join(self.base_dir, "alertes_opportunites.json")
+        self.live = os.path.join(self.base_dir, "live_matches.json")
+
+
+def send_control_command(command, host="127.0.0.1", port=8765, timeout=5):
+    """
+    Envoie une commande au socket de contrôle du démon.
+
+    Args:
+        command (str): health, stats, reload ou stop
+
+    Returns:
+        dict: Réponse JSON du démon
+    """
+    async def _send():
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+        writer.write((command + "\n").encode())
+        await writer.drain()
+        line = await asyncio.wait_for(reader.readline(), timeout)
+        writer.close()
+        return json.loads(line or b"{}")
+
+    return asyncio.run(_send())
+
+
+class MonitorDaemon:
+    """Processus unique : navigateur + analyseur + dashboard en mémoire"""
+
+    HOUSEKEEPING_INTERVAL = 30   # Relecture des entrées / export live (s)
+    DASHBOARD_WRITE_INTERVAL = 5 # Ecriture groupée du dashboard (s)
+    HISTORY_KEYFRAME_EVERY = 20  # Historique en mode delta
+
+    def __init__(self, base_url="https://1xbet.cm", headless=True,
+                 control_host="127.0.0.1", control_port=8765,
+                 max_polls_per_minute=20, restart_browser_every=120,
+                 archive=None, root="match"):
+        """
+        Args:
+            base_url (str): URL de base du site
+            headless (bool): Navigateur sans interface
+            control_host (str): Adresse du socket de contrôle
+            control_port (int): Port du socket de contrôle
+            max_polls_per_minute (int): Budget global de scans
+            restart_browser_every (int): Redémarrage navigateur tous les N scans
+            archive (PayloadArchive): Archive optionnelle des payloads API
+            root (str): Dossier racine des données
+        """
+        self.root = root
+        self.control_host = control_host
+        self.control_port = control_port
+        self.max_polls_per_minute = max_polls_per_minute
+        self.restart_browser_every = restart_browser_every
+
+        self.scraper = MatchScraper(base_url=base_url, headless=headless, archive=archive)
+        self.alert_queue = AlertQueue()
+        self.analyzer = BettingAnalyzer(publisher=self.alert_queue.publish)
+        self.files = DayFiles(root=root)
+        self.scheduler = PollingScheduler(max_polls_per_minute=max_polls_per_minute)
+        self.db = open_store(root=root) if STORAGE_BACKEND == "sqlite" else None
+        self.store = DashboardStore(
+            self.files.dashboard, self.files.alerts, self.analyzer.get_alerts,
+            min_interval=self.DASHBOARD_WRITE_INTERVAL,
+            db=self.db, date_str=self.files.date_str
+        )
+        self.history = self._new_history_writer()
+        self.last_cycle_metrics = {}
+
+        self.stop_event = asyncio.Event()
+        self.started_at = time.time()
+        self.scans_done = 0
+        self.last_scan_at = None
+        self.last_error = None
+        self._mtimes = {}
+        self._browser_ready = False
+
+    # ------------------------------------------------------------
+    # Entrées (relecture seulement si le fichier a changé)
+    # ------------------------------------------------------------
+
+    def _changed(self, path):
+        """Vrai si le fichier existe et que sa mtime a changé depuis la dernière lecture"""
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            return False
+        if self._mtimes.get(path) == mtime:
+            return False
+        self._mtimes[path] = mtime
+        return True
+
+    @staticmethod
+    def _read_json(path, default):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                content = f.read().strip()
+                return json.loads(content) if content else default
+        except (OSError, json.JSONDecodeError):
+            return default
+
+    def load_day_state(self):
+        """Chargement initial : dashboard et alertes existants de la journée"""
+        self.analyzer.alerts = self._read_json(self.files.alerts, [])
+        self.store.load()  # Après les alertes : déjà écrites, pas de réinsertion
+
+    def reload_inputs(self, force=False):
+        """
+        Upsert par ID des favoris si matchs_tries_favoris.json a changé :
+        nouveaux matchs planifiés, heure ou cote des matchs suivis mises à jour.
+
+        Returns:
+            int: Nombre de favoris ajoutés ou mis à jour
+        """
+        if force:
+            self._mtimes.pop(self.files.favorites, None)
+        if not self._changed(self.files.favorites):
+            return 0
+        added, updated = self.scheduler.sync(self._read_json(self.files.favorites, []))
+        if added or updated:
+            print(f"📥 {added} nouveaux matchs planifiés, {updated} mis à jour ({len(self.scheduler)} suivis)")
+        return added + updated
+
+    def _roll_over_if_needed(self):
+        """Bascule sur le dossier du nouveau jour à minuit"""
+        today = datetime.now().strftime("%Y-%m-%d")
+        if today == self.files.date_str:
+            return False
+        print(f"📅 Changement de jour : {self.files.date_str} → {today}")
+        previous_date = self.files.date_str
+        self.files = DayFiles(today, root=self.root)
+        self.scheduler = PollingScheduler(max_polls_per_minute=self.max_polls_per_minute)
+        self.store.end_cycle()
+        self.store.reset(self.files.dashboard, self.files.alerts, self.files.date_str)
+        self.history.close()
+        self.history = self._new_history_writer()
+        self.analyzer.clear_alerts()
+        self._mtimes.clear()
+        self.load_day_state()
+        self._compact_history(previous_date)
+        return True
+
+    def _compact_history(self, date_str):
+        """Export Parquet de la journée terminée, hors de la boucle asyncio"""
+        if history_export.pa is None:
+            return
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(None, history_export.compact_day, date_str, self.root)
+        future.add_done_callback(
+            lambda f: f.exception() and print(f"⚠️ Compaction {date_str} : {f.exception()}")
+        )
+
+    # ------------------------------------------------------------
+    # Sorties
+    # ------------------------------------------------------------
+
+    def _new_history_writer(self):
+        return HistoryWriter(self.files.history, delta_keyframe_every=self.HISTORY_KEYFRAME_EVERY)
+
+    def export_live_matches(self):
+        """Equivalent en mémoire de 06_extract_live_matches.py"""
+        live_matches = [
+            {"id": m.get("id"), "url": m.get("url"), "status": m.get("status", "UNKNOWN")}
+            for m in self.store.matches.values()
+            if m.get("status", "UNKNOWN") not in ["FINISHED", "UNKNOWN"]
+        ]
+        live_matches.sort(key=lambda x: x["status"] != "LIVE")
+        atomic_write_json(self.files.live, live_matches)
+        return len(live_matches)
+
+    # ------------------------------------------------------------
+    # Scan d'un match
+    # ------------------------------------------------------------
+
+    def process_scan_result(self, match_data):
+        """Analyse, alertes, historique et dashboard pour un scan"""
+        return process_scan_result(match_data, self.analyzer, self.store, self.history,
+                                   db=self.db, date_str=self.files.date_str)
+
+    async def _poll(self, match):
+        if self.scans_done > 0 and self.scans_done % self.restart_browser_every == 0:
+            print("♻️  Restart complet du navigateur (stabilité long run)")
+            await self.scraper.stop()
+            await asyncio.sleep(5)
+            await self.scraper.start()
+
+        self.scans_done += 1
+        match_data = await self.scraper.extract_match_data(match)
+        self.last_scan_at = datetime.now().isoformat()
+        self.process_scan_result(match_data)
+        return match_data
+
+    # ------------------------------------------------------------
+    # Socket de contrôle
+    # ------------------------------------------------------------
+
+    def health(self):
+        status_counts = {}
+        for m in self.store.matches.values():
+            s = m.get("status", "UNKNOWN")
+            status_counts[s] = status_counts.get(s, 0) + 1
+        return {
+            "status": "stopping" if self.stop_event.is_set() else "ok",
+            "date": self.files.date_str,
+            "uptime_s": round(time.time() - self.started_at, 1),
+            "browser": self._browser_ready,
+            "tracked": len(self.scheduler),
+            "scans": self.scans_done,
+            "last_scan_at": self.last_scan_at,
+            "next_due_in_s": (
+                round(self.scheduler.next_due() - time.time(), 1)
+                if self.scheduler.next_due() is not None else None
+            ),
+            "alerts": len(self.analyzer.get_alerts()),
+            "statuses": status_counts,
+            "last_cycle_writes": self.last_cycle_metrics,
+            "last_error": self.last_error
+        }
+
+    async def _handle_control(self, reader, writer):
+        try:
+            command = (await reader.readline()).decode().strip().lower()
+            if command in ("health", "stats", ""):
+                response = self.health()
+            elif command == "reload":
+                response = {"reloaded": self.reload_inputs(force=True)}
+            elif command == "stop":
+                self.stop_event.set()
+                response = {"stopping": True}
+            else:
+                response = {"error": f"commande inconnue : {command}"}
+            writer.write((json.dumps(response, default=str) + "\n").encode())
+            await writer.drain()
+        finally:
+            writer.close()
+
+    # ------------------------------------------------------------
+    # Boucle principale
+    # ------------------------------------------------------------
+
+    async def _housekeeping(self):
+        while not self.stop_event.is_set():
+            try:
+                if self._roll_over_if_needed():
+                    # Nouveau planificateur : on relance la boucle de scan
+                    self._scan_task.cancel()
+                    self._scan_task = asyncio.create_task(self._run_scans())
+                self.reload_inputs()
+                self.export_live_matches()
+                self.last_cycle_metrics = self.store.end_cycle()
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"⚠️ Housekeeping : {e}")
+            try:
+                await asyncio.wait_for(self.stop_event.wait(), self.HOUSEKEEPING_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _flusher(self):
+        # Garantit l'écriture des derniers scans même sans nouvelle mise à jour
+        while not self.stop_event.is_set():
+            try:
+                await asyncio.wait_for(self.stop_event.wait(), self.DASHBOARD_WRITE_INTERVAL)
+            except asyncio.TimeoutError:
+                self.store.flush()
+                self.history.maybe_flush()
+
+    async def _run_scans(self):
+        await self.scheduler.run(self._poll, stop_event=self.stop_event)
+
+    async def run(self):
+        """Démarre le démon jusqu'à la commande stop ou Ctrl+C"""
+        print(f"\n{'='*70}")
+        print(f"🛰️  DÉMON DE SURVEILLANCE ({self.files.date_str})")
+        print(f"🎛️  Contrôle : {self.control_host}:{self.control_port}")
+        print(f"{'='*70}\n")
+
+        self.load_day_state()
+        self.reload_inputs(force=True)
+
+        server = await asyncio.start_server(
+            self._handle_control, self.control_host, self.control_port
+        )
+        await self.scraper.start()
+        self._browser_ready = True
+
+        self._scan_task = asyncio.create_task(self._run_scans())
+        housekeeping_task = asyncio.create_task(self._housekeeping())
+        flusher_task = asyncio.create_task(self._flusher())
+        try:
+            await self.stop_event.wait()
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self.stop_event.set()
+            tasks = (self._scan_task, housekeeping_task, flusher_task)
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            server.close()
+            await server.wait_closed()
+            self.store.end_cycle()
+            self.history.close()
+            self.export_live_matches()
+            await self.scraper.stop()
+            self._browser_ready = False
+            self.alert_queue.close()
+            if self.db is not None:
+                self.db.close()
+            print(f"🛑 Démon arrêté ({self.scans_done} scans)")
@@ -0,0 +1,159 @@
+"""
+monitor/dashboard_data.py
+Couche de données de dashboard.py (sans dépendance à Streamlit).
+
+Chaque fichier est identifié par sa signature (mtime_ns, taille) : le
+dashboard met en cache les lectures avec cette signature comme clé, un
+fichier inchangé n'est donc ni relu ni reparsé. L'enrichissement du
+tableau live est vectorisé (accès .str sur les colonnes au lieu de .apply
+ligne par ligne).
+
+Mesure : python -m monitor.dashboard_data match/2025-12-30
+"""
+
+import argparse
+import json
+import os
+import time
+
+import pandas as pd
+
+
+BASE_URL = "https://1xbet.cm"
+LIVE_COLUMNS = ["league", "heure", "favori", "pronostic", "cote", "url"]
+
+
+def file_signature(path):
+    """(mtime_ns, taille) du fichier, None s'il n'existe pas"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def load_json(path):
+    """Lecture sécurisée JSON standard ([] si absent ou illisible)"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return []
+
+
+def enrich_live(records):
+    """
+    Tableau live enrichi (nom du match, score d'opportunité, conseil, URL absolue).
+
+    Args:
+        records (list): Contenu de matchs_surveillance_final.json
+
+    Returns:
+        pd.DataFrame
+    """
+    df = pd.DataFrame(records)
+    if df.empty:
+        return df
+
+    # === GESTION DES NOMS DE COLONNES (Match Complet) ===
+    if "match" not in df.columns:
+        df["match"] = df["match_complet"] if "match_complet" in df.columns else "Nom Inconnu"
+
+    # .str.get lit la clé des dicts et donne NaN pour tout le reste
+    if "opportunity" in df.columns:
+        opp = df["opportunity"].str
+        df["score_opp"] = opp.get("score").fillna(0).astype(int)  # "60%" et non "60.0%"
+        df["conseil"] = opp.get("action_suggeree").fillna("")
+    else:
+        df["score_opp"] = 0
+        df["conseil"] = ""
+
+    # On complète l'URL si elle est relative
+    if "url" in df.columns:
+        relative = df["url"].str.startswith("/", na=False)
+        df["url"] = df["url"].mask(relative, BASE_URL + df["url"].where(relative, ""))
+
+    for col in LIVE_COLUMNS:
+        if col not in df.columns:
+            df[col] = None
+    return df
+
+
+def enrich_live_legacy(records):
+    """Ancien enrichissement ligne par ligne (.apply), gardé pour la mesure"""
+    df = pd.DataFrame(records)
+    if df.empty:
+        return df
+    if "match" not in df.columns and "match_complet" in df.columns:
+        df["match"] = df["match_complet"]
+    elif "match" not in df.columns:
+        df["match"] = "Nom Inconnu"
+    if "opportunity" in df.columns:
+        df["score_opp"] = df["opportunity"].apply(lambda x: x.get("score", 0) if isinstance(x, dict) else 0)
+        df["conseil"] = df["opportunity"].apply(lambda x: x.get("action_suggeree", "") if isinstance(x, dict) else "")
+    else:
+        df["score_opp"] = 0
+        df["conseil"] = ""
+    if "url" in df.columns:
+        df["url"] = df["url"].apply(lambda x: f"{BASE_URL}{x}" if x and x.startswith("/") else x)
+    for col in LIVE_COLUMNS:
+        if col not in df.columns:
+            df[col] = None
+    return df
+
+
+def health_rows(files):
+    """Etat des fichiers de la journée (onglet SANTÉ)"""
+    rows = []
+    for name, path in files.items():
+        sig = file_signature(path)
+        rows.append({
+            "Fichier": name,
+            "Statut": "✅ OK" if sig else "❌ MANQUANT",
+            "Taille": f"{sig[1] / 1024:.2f} KB" if sig else "0 KB",
+            "Dernière Modif": time.strftime("%H:%M:%S", time.localtime(sig[0] / 1e9)) if sig else "❌ Inexistant"
+        })
+    return rows
+
+
+def benchmark(base_dir, repeat=50):
+    """
+    Compare l'enrichissement vectorisé à l'ancien .apply sur un dossier du jour.
+
+    Returns:
+        dict: {"rows", "vectorized_ms", "apply_ms", "same"}
+    """
+    records = load_json(os.path.join(base_dir, "matchs_surveillance_final.json"))
+    if not records:
+        print("❌ matchs_surveillance_final.json vide ou introuvable")
+        return {}
+
+    fast, slow = enrich_live(records), enrich_live_legacy(records)
+    cols = ["match", "conseil", "url"] + LIVE_COLUMNS
+    same = (fast[cols].astype(str).equals(slow[cols].astype(str))
+            and fast["score_opp"].equals(slow["score_opp"]))
+
+    def timed(func):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            func(records)
+        return (time.perf_counter() - start) * 1000 / repeat
+
+    report = {"rows": len(records), "vectorized_ms": timed(enrich_live), "apply_ms": timed(enrich_live_legacy), "same": same}
+    print(f"📊 {report['rows']} matchs (x{repeat})")
+    print(f"   📐 vectorisé : {report['vectorized_ms']:.2f} ms")
+    print(f"   📐 .apply    : {report['apply_ms']:.2f} ms")
+    print("   ✅ Résultats identiques" if same else "   ❌ Résultats différents")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mesure de la couche de données du dashboard")
+    parser.add_argument("base_dir", help="Dossier du jour (match/YYYY-MM-DD)")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    benchmark(args.base_dir, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+monitor/dedup_store.py
+Mémoire anti-doublon persistante et bornée pour les clés d'alertes.
+
+Chaque clé est conservée `ttl` secondes puis expire : la base ne grossit pas
+au fil des semaines et une clé revient naturellement le lendemain. Un petit
+cache LRU en mémoire (taille fixe) évite la plupart des lectures SQLite.
+Le redémarrage ne relit aucune alerte passée : la table est la source.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+DEFAULT_DEDUP_PATH = os.path.join("match", "alert_queue.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS dedup_keys (
+    key TEXT PRIMARY KEY,
+    expires_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_dedup_expires ON dedup_keys (expires_at);
+"""
+
+
+class DedupStore:
+    """Ensemble de clés avec expiration (TTL), persisté dans SQLite"""
+
+    def __init__(self, db_path=DEFAULT_DEDUP_PATH, ttl=12 * 3600, max_cache=5000,
+                 evict_every=300, clock=time.time):
+        """
+        Args:
+            db_path (str): Fichier de la base
+            ttl (float): Durée de vie d'une clé (s)
+            max_cache (int): Nombre max de clés gardées en mémoire
+            evict_every (float): Purge des clés expirées au plus toutes les N s
+            clock: Horloge (injectable)
+        """
+        self.db_path = db_path
+        self.ttl = ttl
+        self.max_cache = max_cache
+        self.evict_every = evict_every
+        self.clock = clock
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()  # clé -> expires_at
+        self._last_eviction = 0.0
+
+    def _remember(self, key, expires_at):
+        self._cache[key] = expires_at
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.max_cache:
+            self._cache.popitem(last=False)
+
+    def __contains__(self, key):
+        now = self.clock()
+        expires_at = self._cache.get(key)
+        if expires_at is None:
+            with self._lock:
+                row = self.conn.execute(
+                    "SELECT expires_at FROM dedup_keys WHERE key = ?", (key,)
+                ).fetchone()
+            if row is None:
+                return False
+            expires_at = row[0]
+            self._remember(key, expires_at)
+        return expires_at > now
+
+    def add(self, key, ttl=None):
+        """Enregistre (ou prolonge) une clé"""
+        now = self.clock()
+        expires_at = now + (self.ttl if ttl is None else ttl)
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT INTO dedup_keys (key, expires_at) VALUES (?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET expires_at = excluded.expires_at",
+                (key, expires_at)
+            )
+        self._remember(key, expires_at)
+        self.maybe_evict(now)
+
+    def check_and_add(self, key):
+        """
+        Vrai si la clé est nouvelle (et l'enregistre), faux si déjà vue.
+        """
+        if key in self:
+            return False
+        self.add(key)
+        return True
+
+    def maybe_evict(self, now=None):
+        """Purge les clés expirées (au plus toutes les `evict_every` secondes)"""
+        now = self.clock() if now is None else now
+        if now - self._last_eviction < self.evict_every:
+            return 0
+        self._last_eviction = now
+        with self._lock, self.conn:
+            cursor = self.conn.execute("DELETE FROM dedup_keys WHERE expires_at <= ?", (now,))
+        for key in [k for k, exp in self._cache.items() if exp <= now]:
+            del self._cache[key]
+        return cursor.rowcount
+
+    def __len__(self):
+        with self._lock:
+            return self.conn.execute(
+                "SELECT COUNT(*) FROM dedup_keys WHERE expires_at > ?", (self.clock(),)
+            ).fetchone()[0]
+
+    def close(self):
+        self.conn.close()
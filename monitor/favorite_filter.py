@@ -0,0 +1,223 @@
+"""
+monitor/favorite_filter.py
+Tri des favoris en flux (03_tri_cotes.py et étape "favoris" du pipeline).
+
+Chaque match est évalué dès qu'il arrive : un favori est un match dont la
+cote 1 ou 2 tombe dans une des bandes de cotes configurées (par défaut une
+seule bande ]1.0 ; SEUIL_COTE[). Les favoris sont gardés dans un index par
+ID et par heure de coup d'envoi ; seuls les favoris nouveaux ou modifiés
+(cote, pronostic ou bande) sont émis et écrits.
+
+Bandes : FAVORITE_BANDS="SUPER:1.0-1.25,FORT:1.25-1.45,FAVORI:1.45-1.60"
+(bornes basse incluse, haute exclue ; une cote de 1.0 n'est jamais retenue).
+
+Un favori n'est jamais retiré si sa cote remonte : il est déjà planifié
+en surveillance.
+"""
+
+import os
+from bisect import bisect_left, bisect_right, insort
+
+
+class Band:
+    """Bande de cotes [low ; high["""
+
+    __slots__ = ("name", "low", "high")
+
+    def __init__(self, name, low, high):
+        self.name = name
+        self.low = float(low)
+        self.high = float(high)
+
+    def __contains__(self, odd):
+        return self.low <= odd < self.high
+
+    def __repr__(self):
+        return f"{self.name}:{self.low:g}-{self.high:g}"
+
+
+def parse_bands(spec=None, seuil=1.60):
+    """
+    Bandes depuis une spécification texte (FAVORITE_BANDS si absente).
+
+    Args:
+        spec (str): "NOM:bas-haut,..." (vide = une bande FAVORI jusqu'à `seuil`)
+        seuil (float): Seuil historique (SEUIL_COTE)
+
+    Returns:
+        list: Bandes triées par borne basse
+
+    Raises:
+        ValueError: Bande illisible, vide ou chevauchant la précédente
+    """
+    spec = spec if spec is not None else os.getenv("FAVORITE_BANDS", "")
+    if not spec.strip():
+        return [Band("FAVORI", 1.0, seuil)]
+
+    bands = []
+    for part in spec.split(","):
+        try:
+            name, _, bounds = part.strip().partition(":")
+            low, high = (float(b) for b in bounds.split("-"))
+        except ValueError:
+            raise ValueError(f"Bande de cotes illisible : {part!r} (attendu NOM:bas-haut)")
+        if not name or low >= high:
+            raise ValueError(f"Bande de cotes invalide : {part!r}")
+        bands.append(Band(name, low, high))
+
+    bands.sort(key=lambda b: b.low)
+    for previous, band in zip(bands, bands[1:]):
+        if band.low < previous.high:
+            raise ValueError(f"Bandes de cotes qui se chevauchent : {previous} / {band}")
+    return bands
+
+
+def parse_odd(value):
+    """'1,45' / '1.45' / 1.45 -> 1.45 (None si illisible ou <= 1.0)"""
+    if isinstance(value, (int, float)):
+        odd = float(value)
+    else:
+        try:
+            odd = float(value)
+        except (TypeError, ValueError):
+            try:
+                odd = float(str(value).replace(",", "."))
+            except ValueError:
+                return None
+    return odd if odd > 1.0 else None
+
+
+class FavoriteFilter:
+    """Détection d'un favori dans un match (cotes 1X2 du scraping)"""
+
+    def __init__(self, bands=None):
+        self.bands = bands or parse_bands()
+        self._lows = [b.low for b in self.bands]
+
+    def band_for(self, odd):
+        """Bande contenant la cote (None si hors bandes)"""
+        if odd is None:
+            return None
+        i = bisect_right(self._lows, odd) - 1
+        if i >= 0 and odd in self.bands[i]:
+            return self.bands[i]
+        return None
+
+    def detect(self, match):
+        """
+        Args:
+            match (dict): Match au format de matchs_details.json
+
+        Returns:
+            dict or None: Favori au format de matchs_tries_favoris.json
+        """
+        odds = match.get("odds") or {}
+        candidates = []
+        for pronostic, key, team in (("V1", "1", "home"), ("V2", "2", "away")):
+            odd = parse_odd(odds.get(key))
+            band = self.band_for(odd)
+            if band is not None:
+                candidates.append((odd, pronostic, team, band))
+        if not candidates:
+            return None
+
+        # V2 ne remplace V1 que si sa cote est strictement plus basse
+        odd, pronostic, team, band = min(candidates, key=lambda c: c[0])
+        return {
+            "id": match.get("id", "N/A"),
+            "league": match.get("league", "Inconnue"),
+            "heure": match.get("time", "N/A"),
+            "favori": match[team],
+            "pronostic": pronostic,
+            "cote": odd,
+            "bande": band.name,
+            "match_complet": f"{match['home']} vs {match['away']}",
+            "url": f"https://1xbet.cm{match['url']}" if match.get("url") else "#"
+        }
+
+
+class FavoriteIndex:
+    """Favoris indexés par ID et par heure de coup d'envoi"""
+
+    def __init__(self, favorites=()):
+        self.by_id = {}
+        self._by_time = []  # (heure, id) trié
+        for favorite in favorites:
+            self.upsert(favorite)
+
+    def upsert(self, favorite):
+        """
+        Returns:
+            str or None: "new", "changed" ou None si identique
+        """
+        fav_id = str(favorite.get("id"))
+        previous = self.by_id.get(fav_id)
+        if previous == favorite:
+            return None
+        if previous is not None:
+            entry = (previous.get("heure", ""), fav_id)
+            i = bisect_left(self._by_time, entry)
+            if i < len(self._by_time) and self._by_time[i] == entry:
+                del self._by_time[i]
+        self.by_id[fav_id] = favorite
+        insort(self._by_time, (favorite.get("heure", ""), fav_id))
+        return "new" if previous is None else "changed"
+
+    def get(self, fav_id):
+        return self.by_id.get(str(fav_id))
+
+    def ordered(self):
+        """Favoris par heure de coup d'envoi"""
+        return [self.by_id[fav_id] for _, fav_id in self._by_time]
+
+    def between(self, start, end):
+        """Favoris dont l'heure ("HH:MM") est dans [start ; end["""
+        lo = bisect_left(self._by_time, (start, ""))
+        hi = bisect_left(self._by_time, (end, ""))
+        return [self.by_id[fav_id] for _, fav_id in self._by_time[lo:hi]]
+
+    def __len__(self):
+        return len(self.by_id)
+
+    def __contains__(self, fav_id):
+        return str(fav_id) in self.by_id
+
+
+class FavoriteSorter:
+    """Filtre + index adossés au store : n'écrit que les favoris nouveaux ou modifiés"""
+
+    def __init__(self, store, date_str, bands=None):
+        """
+        Args:
+            store: JsonDayStore ou SQLiteStore (monitor/storage.py)
+            date_str (str): Date YYYY-MM-DD
+            bands (list): Bandes de cotes (parse_bands() par défaut)
+        """
+        self.store = store
+        self.date_str = date_str
+        self.filter = FavoriteFilter(bands)
+        existing, _ = store.read("favorites", date_str)
+        self.index = FavoriteIndex(existing)
+
+    def feed(self, match):
+        """
+        Returns:
+            tuple or None: (statut, favori) si le favori est nouveau ou modifié
+        """
+        favorite = self.filter.detect(match)
+        if favorite is None:
+            return None
+        status = self.index.upsert(favorite)
+        return (status, favorite) if status else None
+
+    def stream(self, matches):
+        """Générateur des changements pour un flux de matchs"""
+        for match in matches:
+            change = self.feed(match)
+            if change:
+                yield change
+
+    def persist(self, changes):
+        """Ecrit les changements en un seul upsert (dernier état par ID), retourne le nombre écrit"""
+        favorites = list({str(favorite.get("id")): favorite for _, favorite in changes}.values())
+        return self.store.upsert("favorites", self.date_str, favorites) if favorites else 0
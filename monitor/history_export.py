@@ -0,0 +1,275 @@
+"""
+monitor/history_export.py
+Compaction de l'historique des scans en fichiers colonnes (Parquet).
+
+Chaque journée match/YYYY-MM-DD/matchs_history_log.jsonl (segments et mode
+delta compris) est aplatie en une table typée et écrite dans
+match/parquet/date=YYYY-MM-DD/history.parquet (partitionnement par date).
+load_history() ne lit que les colonnes et les jours demandés.
+
+Usage :
+    python -m monitor.history_export                 # hier et aujourd'hui
+    python -m monitor.history_export --date 2025-12-30
+    python -m monitor.history_export --all
+"""
+
+import argparse
+import os
+from datetime import datetime, timedelta
+
+from .history_log import HistoryReader
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow est requis uniquement pour l'export colonnes
+    pa = None
+    pq = None
+
+
+HISTORY_FILENAME = "matchs_history_log.jsonl"
+PARQUET_DIRNAME = "parquet"
+PARQUET_FILENAME = "history.parquet"
+
+# Libellés 1xbet -> nom de colonne (mêmes noms que backend/models.py)
+STAT_COLUMNS = {
+    "Attaques": "attacks",
+    "Attaques dangereuses": "dangerous_attacks",
+    "% de possession de balle": "possession",
+    "Tirs cadrés": "shots_on_target",
+    "Tirs non cadrés": "shots_off_target",
+    "Corners": "corners",
+    "Cartons jaunes": "yellow_cards",
+    "Cartons rouges": "red_cards",
+    "Pénalty": "penalties",
+}
+
+# Seuils de totaux exportés en colonnes (Plus/Moins)
+KEY_THRESHOLDS = (0.5, 1.5, 2.5, 3.5, 4.5)
+
+
+def _threshold_name(threshold):
+    return str(threshold).replace(".", "_")
+
+
+def _build_schema():
+    fields = [
+        ("match_id", pa.string()),
+        ("ts", pa.timestamp("us")),
+        ("status", pa.string()),
+        ("league", pa.string()),
+        ("pronostic", pa.string()),
+        ("cote", pa.float64()),
+        ("minute", pa.int16()),
+        ("score_home", pa.int16()),
+        ("score_away", pa.int16()),
+        ("ht_home", pa.int16()),
+        ("ht_away", pa.int16()),
+    ]
+    for column in STAT_COLUMNS.values():
+        fields.append((f"{column}_home", pa.int32()))
+        fields.append((f"{column}_away", pa.int32()))
+    fields += [("odd_v1", pa.float64()), ("odd_x", pa.float64()), ("odd_v2", pa.float64())]
+    for threshold in KEY_THRESHOLDS:
+        name = _threshold_name(threshold)
+        fields.append((f"over_{name}", pa.float64()))
+        fields.append((f"under_{name}", pa.float64()))
+    fields.append(("opportunity_score", pa.int16()))
+    return pa.schema(fields)
+
+
+def _to_int(value):
+    try:
+        return int(str(value).replace("%", "").strip())
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_float(value):
+    try:
+        return float(str(value).replace(",", "."))
+    except (TypeError, ValueError):
+        return None
+
+
+def flatten_snapshot(snap):
+    """
+    Aplatit un snapshot d'historique en une ligne typée.
+
+    Args:
+        snap (dict): Snapshot complet (tel que relu par HistoryReader)
+
+    Returns:
+        dict: Ligne {colonne: valeur}
+    """
+    score_home = score_away = None
+    score = snap.get("score")
+    if isinstance(score, str) and "-" in score:
+        home, _, away = score.replace(" ", "").partition("-")
+        score_home, score_away = _to_int(home), _to_int(away)
+
+    game_time = snap.get("game_time") or ""
+    minute = _to_int(game_time.split(":")[0]) if ":" in game_time else None
+
+    ts = snap.get("scan_timestamp") or snap.get("timestamp")
+    try:
+        ts = datetime.fromisoformat(ts) if ts else None
+    except ValueError:
+        ts = None
+
+    ht = snap.get("half_time_score") or {}
+    row = {
+        "match_id": str(snap.get("id", "")),
+        "ts": ts,
+        "status": snap.get("status"),
+        "league": snap.get("league"),
+        "pronostic": snap.get("pronostic"),
+        "cote": _to_float(snap.get("cote")),
+        "minute": minute,
+        "score_home": score_home,
+        "score_away": score_away,
+        "ht_home": _to_int(ht.get("home")),
+        "ht_away": _to_int(ht.get("away")),
+    }
+
+    stats = snap.get("stats") or {}
+    for label, column in STAT_COLUMNS.items():
+        values = stats.get(label) or {}
+        row[f"{column}_home"] = _to_int(values.get("home"))
+        row[f"{column}_away"] = _to_int(values.get("away"))
+
+    odds = snap.get("live_odds") or {}
+    row["odd_v1"] = _to_float(odds.get("V1"))
+    row["odd_x"] = _to_float(odds.get("X"))
+    row["odd_v2"] = _to_float(odds.get("V2"))
+
+    by_threshold = {}
+    for t in (snap.get("totals") or {}).get("global", []):
+        seuil = _to_float(t.get("Seuil"))
+        if seuil is not None:
+            by_threshold[seuil] = t
+    for threshold in KEY_THRESHOLDS:
+        name = _threshold_name(threshold)
+        t = by_threshold.get(threshold) or {}
+        row[f"over_{name}"] = _to_float(t.get("Plus"))
+        row[f"under_{name}"] = _to_float(t.get("Moins"))
+
+    opportunity = snap.get("opportunity") or {}
+    row["opportunity_score"] = _to_int(opportunity.get("score"))
+    return row
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("pyarrow est requis pour l'export Parquet (pip install pyarrow)")
+
+
+def partition_path(date_str, root="match"):
+    """Chemin du fichier Parquet d'une journée"""
+    return os.path.join(root, PARQUET_DIRNAME, f"date={date_str}", PARQUET_FILENAME)
+
+
+def compact_day(date_str, root="match"):
+    """
+    Compacte l'historique d'une journée en Parquet (remplace la partition).
+
+    Args:
+        date_str (str): Date YYYY-MM-DD
+        root (str): Dossier racine des données
+
+    Returns:
+        int: Nombre de lignes écrites (0 si pas d'historique)
+    """
+    _require_pyarrow()
+    history_path = os.path.join(root, date_str, HISTORY_FILENAME)
+    reader = HistoryReader(history_path)
+    if not reader.segments():
+        return 0
+
+    rows = [flatten_snapshot(s) for s in reader.iter_all()]
+    if not rows:
+        return 0
+
+    schema = _build_schema()
+    table = pa.Table.from_pylist(rows, schema=schema)
+
+    target = partition_path(date_str, root)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    tmp_target = target + ".tmp"
+    pq.write_table(table, tmp_target, compression="zstd")
+    os.replace(tmp_target, target)
+
+    print(f"🗜️  {date_str} : {len(rows)} snapshots → {target} "
+          f"({os.path.getsize(target)/1024:.0f} Ko)")
+    return len(rows)
+
+
+def available_dates(root="match"):
+    """Dates disposant d'une partition Parquet"""
+    base = os.path.join(root, PARQUET_DIRNAME)
+    if not os.path.isdir(base):
+        return []
+    return sorted(
+        name.split("=", 1)[1] for name in os.listdir(base)
+        if name.startswith("date=") and os.path.exists(os.path.join(base, name, PARQUET_FILENAME))
+    )
+
+
+def load_history(columns=None, dates=None, match_ids=None, root="match"):
+    """
+    Lit l'historique colonnes : seulement les colonnes et jours demandés.
+
+    Args:
+        columns (list): Colonnes à lire (None = toutes)
+        dates (list): Dates YYYY-MM-DD (None = toutes les partitions)
+        match_ids (list): Filtre optionnel sur les matchs
+        root (str): Dossier racine des données
+
+    Returns:
+        pandas.DataFrame: Une ligne par snapshot, colonne "date" ajoutée
+    """
+    _require_pyarrow()
+    dates = dates or available_dates(root)
+    read_columns = list(columns) if columns else None
+    if read_columns is not None and match_ids is not None and "match_id" not in read_columns:
+        read_columns.append("match_id")
+
+    filters = [("match_id", "in", [str(m) for m in match_ids])] if match_ids else None
+
+    tables = []
+    for date_str in dates:
+        path = partition_path(date_str, root)
+        if not os.path.exists(path):
+            continue
+        table = pq.read_table(path, columns=read_columns, filters=filters)
+        tables.append(table.append_column("date", pa.array([date_str] * table.num_rows, pa.string())))
+
+    if not tables:
+        return pa.table({}).to_pandas()
+    return pa.concat_tables(tables).to_pandas()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compaction de l'historique en Parquet")
+    parser.add_argument("--date", action="append", help="Date YYYY-MM-DD (répétable)")
+    parser.add_argument("--all", action="store_true", help="Toutes les journées présentes")
+    parser.add_argument("--root", default="match")
+    args = parser.parse_args()
+
+    if args.all:
+        dates = sorted(
+            d for d in os.listdir(args.root)
+            if os.path.exists(os.path.join(args.root, d, HISTORY_FILENAME))
+        )
+    elif args.date:
+        dates = args.date
+    else:
+        today = datetime.now()
+        dates = [(today - timedelta(days=1)).strftime("%Y-%m-%d"), today.strftime("%Y-%m-%d")]
+
+    total = sum(compact_day(d, args.root) for d in dates)
+    print(f"✅ {total} snapshots compactés sur {len(dates)} journée(s)")
+
+
+if __name__ == "__main__":
+    main()
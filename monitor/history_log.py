@@ -0,0 +1,523 @@
+"""
+monitor/history_log.py
+Ecriture bufferisée et rotative de matchs_history_log.jsonl, avec index
+annexe par match pour une lecture directe.
+
+- Les snapshots sont bufferisés en mémoire puis écrits toutes les
+  `flush_interval` secondes ou tous les `flush_every` snapshots
+- Politique fsync : "always" (à chaque flush), "interval" (au plus toutes
+  les `fsync_interval` secondes) ou "never"
+- Rotation par taille et/ou par âge : le fichier actif garde son nom
+  (compatibilité avec les lecteurs existants), les segments fermés sont
+  renommés matchs_history_log.0001.jsonl puis compressés en .gz si demandé
+- Index annexe <segment>.idx (TSV) : match_id, ts, offset, longueur, type
+- Mode delta optionnel : une image complète (keyframe) par match tous les
+  N snapshots, seulement les champs modifiés entre deux. HistoryReader
+  reconstruit les snapshots complets à la lecture.
+"""
+
+import asyncio
+import copy
+import gzip
+import json
+import os
+import re
+import shutil
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+INDEX_SUFFIX = ".idx"
+DELTA_KEY = "_delta"
+KEYFRAME, DELTA = "k", "d"
+
+
+def _segment_paths(path):
+    """Découpe .../matchs_history_log.jsonl en (dossier, préfixe, extension)"""
+    directory, filename = os.path.split(path)
+    stem, ext = os.path.splitext(filename)
+    return directory, stem, ext
+
+
+def _write_index_lines(index_file, entries):
+    index_file.write("".join(
+        f"{match_id}\t{ts}\t{offset}\t{length}\t{kind}\n"
+        for match_id, ts, offset, length, kind in entries
+    ))
+
+
+# ============================================================
+# 🧬 ENCODAGE DELTA
+# ============================================================
+# Un delta est un dict {"s": {clé: valeur}, "u": {clé: delta}, "l": {clé: {index: delta}}, "r": [clés]}
+# s = valeurs remplacées, u = sous-dicts modifiés, l = listes de même longueur
+# modifiées élément par élément (totaux), r = clés supprimées.
+
+def diff_dicts(prev, cur):
+    """
+    Calcule le delta récursif entre deux dicts.
+
+    Returns:
+        dict: Delta (vide si aucun changement)
+    """
+    delta = {}
+    for key, value in cur.items():
+        if key not in prev:
+            delta.setdefault("s", {})[key] = value
+            continue
+        old = prev[key]
+        if old == value:
+            continue
+        if isinstance(old, dict) and isinstance(value, dict):
+            delta.setdefault("u", {})[key] = diff_dicts(old, value)
+        elif isinstance(old, list) and isinstance(value, list) and len(old) == len(value):
+            delta.setdefault("l", {})[key] = _diff_lists(old, value)
+        else:
+            delta.setdefault("s", {})[key] = value
+    removed = [key for key in prev if key not in cur]
+    if removed:
+        delta["r"] = removed
+    return delta
+
+
+def _diff_lists(old, new):
+    """Delta élément par élément de deux listes de même longueur"""
+    changes = {}
+    for i, (a, b) in enumerate(zip(old, new)):
+        if a == b:
+            continue
+        if isinstance(a, dict) and isinstance(b, dict):
+            changes[str(i)] = {"u": diff_dicts(a, b)}
+        else:
+            changes[str(i)] = {"s": b}
+    return changes
+
+
+def apply_delta(base, delta):
+    """Applique un delta (diff_dicts) sur une copie de base"""
+    result = dict(base)
+    for key, value in delta.get("s", {}).items():
+        result[key] = value
+    for key, sub in delta.get("u", {}).items():
+        result[key] = apply_delta(result.get(key) or {}, sub)
+    for key, changes in delta.get("l", {}).items():
+        items = list(result.get(key) or [])
+        for i, change in changes.items():
+            i = int(i)
+            items[i] = change["s"] if "s" in change else apply_delta(items[i], change["u"])
+        result[key] = items
+    for key in delta.get("r", ()):
+        result.pop(key, None)
+    return result
+
+
+class DeltaEncoder:
+    """Encode les snapshots successifs d'un match en keyframes + deltas"""
+
+    def __init__(self, keyframe_every=20):
+        """
+        Args:
+            keyframe_every (int): Une image complète tous les N snapshots par match
+        """
+        self.keyframe_every = keyframe_every
+        self._last = {}
+        self._count = {}
+
+    def reset(self):
+        """Force une keyframe pour chaque match (après rotation)"""
+        self._last.clear()
+        self._count.clear()
+
+    def encode(self, snapshot):
+        """
+        Returns:
+            tuple: (enregistrement à écrire, KEYFRAME ou DELTA)
+        """
+        match_id = snapshot.get("id", "")
+        prev = self._last.get(match_id)
+        count = self._count.get(match_id, 0)
+        self._last[match_id] = copy.deepcopy(snapshot)
+
+        if prev is None or count % self.keyframe_every == 0:
+            self._count[match_id] = 1
+            return snapshot, KEYFRAME
+
+        self._count[match_id] = count + 1
+        return {
+            "id": match_id,
+            "scan_timestamp": snapshot.get("scan_timestamp", ""),
+            DELTA_KEY: diff_dicts(prev, snapshot)
+        }, DELTA
+
+
+class HistoryWriter:
+    """Writer bufferisé et rotatif pour l'historique des scans"""
+
+    def __init__(self, path, flush_interval=2.0, flush_every=50,
+                 fsync="interval", fsync_interval=30.0,
+                 max_bytes=50 * 1024 * 1024, rotate_interval=None,
+                 compress_closed=True, delta_keyframe_every=None,
+                 clock=time.monotonic):
+        """
+        Args:
+            path (str): Fichier actif (ex: match/2025-12-30/matchs_history_log.jsonl)
+            flush_interval (float): Délai max entre deux écritures disque (s)
+            flush_every (int): Nombre max de snapshots en buffer
+            fsync (str): "always", "interval" ou "never"
+            fsync_interval (float): Délai entre deux fsync en mode "interval" (s)
+            max_bytes (int): Taille déclenchant une rotation (None = jamais)
+            rotate_interval (float): Age déclenchant une rotation en s (None = jamais)
+            compress_closed (bool): Compresse en gzip les segments fermés
+            delta_keyframe_every (int): Active le mode delta (keyframe tous les N
+                snapshots par match). None = snapshots complets
+            clock: Horloge monotone (injectable)
+        """
+        self.path = path
+        self.flush_interval = flush_interval
+        self.flush_every = flush_every
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self.max_bytes = max_bytes
+        self.rotate_interval = rotate_interval
+        self.compress_closed = compress_closed
+        self.encoder = DeltaEncoder(delta_keyframe_every) if delta_keyframe_every else None
+        self.clock = clock
+
+        self._buffer = []
+        self._pending_index = []
+        self._buffered_bytes = 0
+        self._file = None
+        self._index_file = None
+        self._size = 0
+        self._opened_at = None
+        self._last_flush = clock()
+        self._last_fsync = clock()
+        self._compress_threads = []
+        self.metrics = {"snapshots": 0, "flushes": 0, "bytes_written": 0, "rotations": 0}
+
+    # ------------------------------------------------------------
+    # Fichier actif
+    # ------------------------------------------------------------
+
+    def _open(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Fichier existant écrit sans index (ancien format) : on l'indexe d'abord
+        if os.path.exists(self.path) and os.path.getsize(self.path) > 0 and \
+           not os.path.exists(self.path + INDEX_SUFFIX):
+            HistoryReader(self.path).build_index(self.path)
+        self._file = open(self.path, "ab")
+        self._index_file = open(self.path + INDEX_SUFFIX, "a", encoding="utf-8")
+        self._size = self._file.tell()
+        self._opened_at = self.clock()
+
+    def _close_files(self):
+        for f in (self._file, self._index_file):
+            if f is not None:
+                f.flush()
+                if self.fsync != "never":
+                    os.fsync(f.fileno())
+                f.close()
+        self._file = None
+        self._index_file = None
+
+    # ------------------------------------------------------------
+    # API
+    # ------------------------------------------------------------
+
+    def append(self, snapshot):
+        """
+        Ajoute un snapshot au buffer (écrit au prochain flush).
+
+        Args:
+            snapshot (dict): Snapshot complet (avec scan_timestamp et id)
+        """
+        if self._file is None:
+            self._open()
+
+        record, kind = self.encoder.encode(snapshot) if self.encoder else (snapshot, KEYFRAME)
+        line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+        offset = self._size + self._buffered_bytes
+        self._buffer.append(line)
+        self._pending_index.append((
+            snapshot.get("id", ""), snapshot.get("scan_timestamp", ""), offset, len(line), kind
+        ))
+        self._buffered_bytes += len(line)
+        self.metrics["snapshots"] += 1
+
+        if len(self._buffer) >= self.flush_every or \
+           self.clock() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """Ecrit le buffer sur disque (et fsync selon la politique)"""
+        now = self.clock()
+        self._last_flush = now
+        if not self._buffer:
+            return 0
+
+        data = b"".join(self._buffer)
+        self._file.write(data)
+        self._file.flush()
+        _write_index_lines(self._index_file, self._pending_index)
+        self._index_file.flush()
+
+        if self.fsync == "always" or \
+           (self.fsync == "interval" and now - self._last_fsync >= self.fsync_interval):
+            os.fsync(self._file.fileno())
+            os.fsync(self._index_file.fileno())
+            self._last_fsync = now
+
+        self._size += len(data)
+        self._buffer = []
+        self._pending_index = []
+        self._buffered_bytes = 0
+        self.metrics["flushes"] += 1
+        self.metrics["bytes_written"] += len(data)
+
+        if self._should_rotate(now):
+            self.rotate()
+        return len(data)
+
+    def maybe_flush(self):
+        """Flush si le délai est écoulé (à appeler périodiquement)"""
+        if self.clock() - self._last_flush >= self.flush_interval:
+            return self.flush()
+        return 0
+
+    def _should_rotate(self, now):
+        if self.max_bytes is not None and self._size >= self.max_bytes:
+            return True
+        if self.rotate_interval is not None and self._opened_at is not None and \
+           now - self._opened_at >= self.rotate_interval:
+            return True
+        return False
+
+    def _next_segment_path(self):
+        directory, stem, ext = _segment_paths(self.path)
+        numbers = [n for n, _ in list_closed_segments(self.path)]
+        number = (max(numbers) + 1) if numbers else 1
+        return os.path.join(directory, f"{stem}.{number:04d}{ext}")
+
+    def rotate(self):
+        """Ferme le segment actif, le renomme et le compresse si demandé"""
+        if self._buffer:
+            self.flush()
+            if self._file is None:
+                return  # flush() a déjà déclenché la rotation
+        if self._file is None:
+            return
+        self._close_files()
+
+        closed = self._next_segment_path()
+        os.replace(self.path, closed)
+        os.replace(self.path + INDEX_SUFFIX, closed + INDEX_SUFFIX)
+        self.metrics["rotations"] += 1
+        if self.encoder is not None:
+            self.encoder.reset()  # Chaque segment démarre par des keyframes
+
+        if self.compress_closed:
+            thread = threading.Thread(target=compress_segment, args=(closed,))
+            thread.start()
+            self._compress_threads.append(thread)
+
+    async def run_flusher(self, stop_event):
+        """Tâche asyncio : flush périodique jusqu'à stop_event"""
+        while not stop_event.is_set():
+            try:
+                await asyncio.wait_for(stop_event.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                self.maybe_flush()
+
+    def close(self):
+        """Flush final et fermeture (attend les compressions en cours)"""
+        self.flush()
+        self._close_files()
+        for thread in self._compress_threads:
+            thread.join()
+        self._compress_threads = []
+
+
+def compress_segment(path):
+    """Compresse un segment fermé en .gz (écriture temporaire puis rename)"""
+    tmp_path = path + ".gz.tmp"
+    with open(path, "rb") as src, gzip.open(tmp_path, "wb", compresslevel=6) as dst:
+        shutil.copyfileobj(src, dst)
+    os.replace(tmp_path, path + ".gz")
+    os.remove(path)
+
+
+def list_closed_segments(path):
+    """
+    Liste les segments fermés d'un historique, dans l'ordre.
+
+    Returns:
+        list: [(numéro, chemin du segment .jsonl ou .jsonl.gz)]
+    """
+    directory, stem, ext = _segment_paths(path)
+    pattern = re.compile(rf"^{re.escape(stem)}\.(\d+){re.escape(ext)}(\.gz)?$")
+    found = {}
+    for name in os.listdir(directory or "."):
+        m = pattern.match(name)
+        if not m:
+            continue
+        number = int(m.group(1))
+        # Pendant la compression, la version non compressée fait foi
+        if number not in found or not m.group(2):
+            found[number] = os.path.join(directory, name)
+    return sorted(found.items())
+
+
+class HistoryReader:
+    """Lecture de l'historique (segments fermés + fichier actif) via l'index"""
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): Fichier actif de l'historique
+        """
+        self.path = path
+
+    def segments(self):
+        """Tous les segments, du plus ancien au fichier actif"""
+        paths = [p for _, p in list_closed_segments(self.path)]
+        if os.path.exists(self.path):
+            paths.append(self.path)
+        return paths
+
+    @staticmethod
+    def _index_path(segment):
+        return (segment[:-3] if segment.endswith(".gz") else segment) + INDEX_SUFFIX
+
+    @staticmethod
+    def _open_segment(segment):
+        return gzip.open(segment, "rb") if segment.endswith(".gz") else open(segment, "rb")
+
+    def build_index(self, segment):
+        """Construit l'index d'un segment qui n'en a pas (fichiers historiques)"""
+        entries = []
+        offset = 0
+        with self._open_segment(segment) as f:
+            for line in f:
+                try:
+                    snap = json.loads(line)
+                    kind = DELTA if DELTA_KEY in snap else KEYFRAME
+                    entries.append((snap.get("id", ""), snap.get("scan_timestamp", ""), offset, len(line), kind))
+                except json.JSONDecodeError:
+                    pass
+                offset += len(line)
+        with open(self._index_path(segment), "w", encoding="utf-8") as idx:
+            _write_index_lines(idx, entries)
+        return entries
+
+    def load_index(self, segment):
+        """
+        Returns:
+            list: [(match_id, ts, offset, length, kind)]
+        """
+        index_path = self._index_path(segment)
+        if not os.path.exists(index_path):
+            return self.build_index(segment)
+        entries = []
+        with open(index_path, "r", encoding="utf-8") as f:
+            for line in f:
+                parts = line.rstrip("\n").split("\t")
+                if len(parts) == 5:
+                    entries.append((parts[0], parts[1], int(parts[2]), int(parts[3]), parts[4]))
+                elif len(parts) == 4:  # Index sans type : snapshots complets
+                    entries.append((parts[0], parts[1], int(parts[2]), int(parts[3]), KEYFRAME))
+        return entries
+
+    def match_ids(self):
+        """Ensemble des IDs de matchs présents dans l'historique"""
+        ids = set()
+        for segment in self.segments():
+            ids.update(e[0] for e in self.load_index(segment))
+        return ids
+
+    def iter_match(self, match_id, since=None, until=None):
+        """
+        Snapshots complets d'un match, lus directement aux offsets indexés.
+        En mode delta, la lecture repart de la dernière keyframe précédant
+        `since` et reconstruit chaque snapshot.
+
+        Args:
+            match_id (str): ID du match
+            since (str): Timestamp ISO minimal (inclus)
+            until (str): Timestamp ISO maximal (inclus)
+
+        Yields:
+            dict: Snapshot complet
+        """
+        match_id = str(match_id)
+        plan = []
+        for segment in self.segments():
+            for e in self.load_index(segment):
+                if e[0] != match_id or (until is not None and e[1] > until):
+                    continue
+                if since is not None and e[1] < since:
+                    # Avant la fenêtre : on ne garde que depuis la dernière keyframe
+                    if e[4] == KEYFRAME:
+                        plan = []
+                    plan.append((segment, e, False))
+                else:
+                    plan.append((segment, e, True))
+
+        current = None
+        handle, handle_segment = None, None
+        try:
+            for segment, (_, _, offset, length, _), wanted in plan:
+                if segment != handle_segment:
+                    if handle is not None:
+                        handle.close()
+                    handle, handle_segment = self._open_segment(segment), segment
+                handle.seek(offset)
+                try:
+                    record = json.loads(handle.read(length))
+                except json.JSONDecodeError:
+                    continue
+                current = self._resolve(record, current)
+                if wanted and current is not None:
+                    yield current
+        finally:
+            if handle is not None:
+                handle.close()
+
+    @staticmethod
+    def _resolve(record, previous):
+        """Snapshot complet à partir d'un enregistrement (keyframe ou delta)"""
+        if DELTA_KEY not in record:
+            return record
+        if previous is None:
+            return None  # Delta orphelin (keyframe perdue)
+        return apply_delta(previous, record[DELTA_KEY])
+
+    def iter_all(self):
+        """Tous les snapshots complets, dans l'ordre d'écriture"""
+        last_by_match = {}
+        for segment in self.segments():
+            with self._open_segment(segment) as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    match_id = record.get("id", "")
+                    snapshot = self._resolve(record, last_by_match.get(match_id))
+                    if snapshot is None:
+                        continue
+                    last_by_match[match_id] = snapshot
+                    yield snapshot
+
+    def tail(self, limit=1000):
+        """Les `limit` derniers snapshots complets"""
+        return list(deque(self.iter_all(), maxlen=limit))
+
+
+def make_snapshot(match_data):
+    """Snapshot horodaté tel qu'écrit dans l'historique"""
+    return {"scan_timestamp": datetime.now().isoformat(), **match_data}
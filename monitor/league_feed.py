@@ -0,0 +1,221 @@
+"""
+monitor/league_feed.py
+Collecte des matchs d'une ligue depuis le flux JSON qui alimente la page
+(LineFeed/Get1x2_VZip, LineFeed/GetChampZip), intercepté par 02_scrape.py.
+
+Chaque jeu du flux donne directement l'ID, les équipes, l'heure de coup
+d'envoi en epoch (champ S) et les cotes 1X2 (événements T=1/2/3) : ni
+parsing DOM ni comparaison de dates en texte ("29/12", "29 décembre").
+Si le flux de la ligue n'est pas capturé, 02_scrape.py revient au DOM.
+
+Les réponses brutes sont enregistrées avec SAVE_LEAGUE_FEED=True
+(match/YYYY-MM-DD/league_feed/<ligue>.json) et servent de fixtures :
+
+    python -m monitor.league_feed match/2025-12-30/league_feed --date 2025-12-30
+
+parse chaque fixture et, si la page HTML de la même ligue a été enregistrée
+(league_html/<ligue>.html, voir league_parser.py), compare les deux collectes.
+"""
+
+import argparse
+import os
+import re
+from datetime import date, datetime
+
+from .api_parser import decode_payload
+from .league_parser import BANNED_TEAMS, parse_league_html, today_tokens
+
+
+# Flux de la liste des matchs d'une ligue
+FEED_URL_MARKERS = ("Get1x2_VZip", "GetChampZip")
+
+# Evénements 1X2 : type -> clé de "odds"
+ODDS_EVENTS = {1: "1", 2: "X", 3: "2"}
+
+_SLUG_RE = re.compile(r"[^a-z0-9]+")
+
+
+def is_feed_url(url):
+    return any(marker in url for marker in FEED_URL_MARKERS)
+
+
+def league_id_from_url(league_url):
+    """'/fr/line/football/88637-england-premier-league' -> '88637'"""
+    last = str(league_url or "").rstrip("/").split("/")[-1]
+    head = last.split("-")[0]
+    return head if head.isdigit() else None
+
+
+def _slug(text):
+    return _SLUG_RE.sub("-", str(text or "").lower()).strip("-")
+
+
+def _format_odd(value):
+    # Même rendu que la page : 1.85, 4.265, 2 (et non 2.0)
+    try:
+        return f"{float(value):g}"
+    except (TypeError, ValueError):
+        return "-"
+
+
+def iter_feed_games(payload):
+    """
+    Jeux d'une réponse du flux (liste dans Value, ou Value.G pour GetChampZip).
+
+    Args:
+        payload (dict|bytes|str): Réponse brute ou décodée
+
+    Yields:
+        dict: Jeu brut
+    """
+    value = decode_payload(payload).get("Value")
+    if isinstance(value, dict):
+        value = value.get("G")
+    if not isinstance(value, list):
+        return
+    for game in value:
+        if isinstance(game, dict):
+            yield game
+
+
+def _iter_events(game):
+    for event in game.get("E") or ():
+        if isinstance(event, list):
+            yield from (e for e in event if isinstance(e, dict))
+        elif isinstance(event, dict):
+            yield event
+
+
+def game_to_match(game, league_name, league_url):
+    """
+    Convertit un jeu du flux au format de matchs_details.json.
+
+    Returns:
+        dict or None: Match (None si jeu incomplet ou pseudo-match statistique)
+    """
+    game_id, start_ts = game.get("I"), game.get("S")
+    home_team, away_team = game.get("O1"), game.get("O2")
+    if not game_id or not start_ts or not home_team or not away_team:
+        return None
+    if any(b in home_team.lower() for b in BANNED_TEAMS) or \
+       any(b in away_team.lower() for b in BANNED_TEAMS):
+        return None
+
+    odds = {"1": "-", "X": "-", "2": "-"}
+    for event in _iter_events(game):
+        key = ODDS_EVENTS.get(event.get("T"))
+        if key is not None and event.get("C") is not None:
+            odds[key] = _format_odd(event["C"])
+
+    kickoff = datetime.fromtimestamp(start_ts)
+    slug = "-".join(filter(None, (_slug(game.get("O1E") or home_team), _slug(game.get("O2E") or away_team))))
+    return {
+        "id": str(game_id),
+        "league": league_name,
+        "home": home_team,
+        "away": away_team,
+        "date": kickoff.strftime("%d/%m"),
+        "time": kickoff.strftime("%H:%M"),
+        "start_ts": int(start_ts),
+        "odds": odds,
+        "url": f"{league_url.rstrip('/')}/{game_id}-{slug}" if league_url else ""
+    }
+
+
+def parse_league_feed(payloads, league_name, league_url, day=None):
+    """
+    Matchs du jour d'une ligue depuis une ou plusieurs réponses du flux.
+
+    Args:
+        payloads (list): Réponses capturées (brutes ou décodées)
+        league_name (str): Nom de la ligue
+        league_url (str): URL relative de la ligue (ID et liens des matchs)
+        day (date): Jour retenu, comparé à la date locale du coup d'envoi
+
+    Returns:
+        list: Matchs triés par heure de coup d'envoi (IDs uniques)
+    """
+    day = day or date.today()
+    league_id = league_id_from_url(league_url)
+    matches = {}
+    for payload in payloads:
+        for game in iter_feed_games(payload):
+            # Le flux d'une page peut contenir d'autres ligues (bandeaux, tops)
+            if league_id and game.get("LI") is not None and str(game.get("LI")) != league_id:
+                continue
+            match = game_to_match(game, league_name, league_url)
+            if match and datetime.fromtimestamp(match["start_ts"]).date() == day:
+                matches.setdefault(match["id"], match)
+    return sorted(matches.values(), key=lambda m: m["start_ts"])
+
+
+def feed_mentions_league(url, payload, league_id):
+    """Vrai si une réponse du flux concerne la ligue (paramètre d'URL ou jeux)"""
+    if league_id and re.search(rf"champs?=([0-9,]*,)?{league_id}(\D|$)", url):
+        return True
+    try:
+        return any(str(g.get("LI")) == league_id for g in iter_feed_games(payload))
+    except Exception:
+        return False
+
+
+# ============================================================
+# 🧪 VÉRIFICATION SUR FIXTURES
+# ============================================================
+
+def check_fixtures(paths, day):
+    """
+    Parse les fixtures du flux et les compare aux pages HTML enregistrées.
+
+    Args:
+        paths (list): Fichiers .json ou dossiers league_feed
+        day (date): Jour d'enregistrement
+
+    Returns:
+        dict: {fixture: {"feed": n, "dom": n|None, "only_feed": [...], "only_dom": [...]}}
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(os.path.join(path, f) for f in sorted(os.listdir(path)) if f.endswith(".json"))
+        else:
+            files.append(path)
+
+    report = {}
+    tokens = today_tokens(datetime.combine(day, datetime.min.time()))
+    for path in files:
+        name = os.path.splitext(os.path.basename(path))[0]
+        with open(path, "rb") as f:
+            raw = f.read()
+        league_url = f"/fr/line/football/{name}"
+        feed = parse_league_feed([raw], name, league_url, day)
+        entry = {"feed": len(feed), "dom": None, "only_feed": [], "only_dom": []}
+
+        html_path = os.path.join(os.path.dirname(os.path.dirname(path)), "league_html", f"{name}.html")
+        if os.path.exists(html_path):
+            with open(html_path, "r", encoding="utf-8") as f:
+                dom = parse_league_html(f.read(), name, tokens)
+            feed_ids, dom_ids = {m["id"] for m in feed}, {m["id"] for m in dom}
+            entry.update(dom=len(dom), only_feed=sorted(feed_ids - dom_ids), only_dom=sorted(dom_ids - feed_ids))
+
+        report[name] = entry
+        status = "" if entry["dom"] is None else f" | DOM : {entry['dom']}"
+        diff = entry["only_feed"] or entry["only_dom"]
+        print(f"{'⚠️' if diff else '✅'} {name} : flux {entry['feed']} matchs{status}"
+              + (f" (flux seul : {entry['only_feed']}, DOM seul : {entry['only_dom']})" if diff else ""))
+    if not files:
+        print("❌ Aucune fixture trouvée")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vérification du collecteur de flux de ligue")
+    parser.add_argument("paths", nargs="+", help="Fichiers .json ou dossiers league_feed")
+    parser.add_argument("--date", help="Jour d'enregistrement YYYY-MM-DD (défaut : aujourd'hui)")
+    args = parser.parse_args()
+    day = datetime.strptime(args.date, "%Y-%m-%d").date() if args.date else date.today()
+    check_fixtures(args.paths, day)
+
+
+if __name__ == "__main__":
+    main()
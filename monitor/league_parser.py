@@ -0,0 +1,342 @@
+"""
+monitor/league_parser.py
+Parsing des pages de ligue (liste des matchs du jour) en un seul passage.
+
+Le navigateur renvoie en un aller-retour le HTML de tous les
+li.dashboard-game de la page ; lxml le parse une fois et des XPath
+précompilés (équivalents des sélecteurs CSS, cssselect n'étant pas une
+dépendance du projet) extraient chaque match.
+
+parse_match_html (BeautifulSoup, un fragment par match) est conservé comme
+référence : le benchmark vérifie que les deux chemins donnent les mêmes lignes.
+
+Usage :
+    python -m monitor.league_parser match/2025-12-30/league_html --date 2025-12-30
+"""
+
+import argparse
+import os
+import time
+from datetime import datetime
+
+from lxml import etree, html as lxml_html
+
+try:
+    from bs4 import BeautifulSoup
+except ImportError:  # Référence BeautifulSoup indisponible (benchmark seulement)
+    BeautifulSoup = None
+
+
+MOIS_FR = {
+    1: "janvier", 2: "février", 3: "mars", 4: "avril", 5: "mai", 6: "juin",
+    7: "juillet", 8: "août", 9: "septembre", 10: "octobre", 11: "novembre", 12: "décembre"
+}
+
+# Mots à bannir
+BANNED_TEAMS = [
+    "à domicile", "à l'extérieur", "home", "away",
+    "buts", "goals", "corner", "carton", "penalty",
+    "équipe", "team", "joueur", "player", "ace", "faute",
+    "first", "second", "period", "half"
+]
+
+# Script navigateur : HTML de tous les matchs en un seul appel CDP
+GAMES_HTML_JS = """
+() => Array.from(document.querySelectorAll("li.dashboard-game"), li => li.outerHTML).join("")
+"""
+
+
+def today_tokens(now=None):
+    """
+    Formats de la date du jour acceptés par le filtre strict.
+
+    Returns:
+        tuple: ("29/12", "29 décembre", "29.12")
+    """
+    now = now or datetime.now()
+    return now.strftime("%d/%m"), f"{now.day} {MOIS_FR[now.month]}", now.strftime("%d.%m")
+
+
+def is_today(raw_date, tokens):
+    """Filtre strict : une date affichée doit être celle du jour (vide = gardé)"""
+    if not raw_date:
+        return True
+    slash, long, dot = tokens
+    raw_date_clean = raw_date.lower().strip()
+
+    # Cas 1 : Format "29/12" (Slash détecté)
+    if "/" in raw_date_clean:
+        return slash in raw_date_clean
+    # Cas 2 : Format "29 décembre" (Pas de slash, mais texte)
+    if any(char.isalpha() for char in raw_date_clean):
+        return long.lower() in raw_date_clean
+    # Cas 3 : Format "29.12" (Point détecté - au cas où 1xbet change)
+    if "." in raw_date_clean:
+        return dot in raw_date_clean
+    return True
+
+
+def _is_banned(home_team, away_team):
+    home, away = home_team.lower(), away_team.lower()
+    return any(b in home for b in BANNED_TEAMS) or any(b in away for b in BANNED_TEAMS)
+
+
+def _match_id(match_url):
+    match_id = "N/A"
+    if match_url:
+        parts = match_url.split('/')
+        if parts:
+            last_part = parts[-1]
+            match_id = last_part.split('-')[0] if '-' in last_part else last_part
+    return match_id
+
+
+def _row(league_name, home_team, away_team, raw_date, start_time, odds, match_url, tokens):
+    return {
+        "id": _match_id(match_url),
+        "league": league_name,
+        "home": home_team,
+        "away": away_team,
+        "date": raw_date if raw_date else tokens[0], # On met la date du jour si vide
+        "time": start_time,
+        "odds": odds,
+        "url": match_url
+    }
+
+
+# ============================================================
+# ⚡ LXML + XPATH PRÉCOMPILÉS
+# ============================================================
+
+def _has_class(name):
+    # Equivalent XPath du sélecteur CSS ".name"
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+_XP_GAMES = etree.XPath(f"//li[{_has_class('dashboard-game')}]")
+_XP_TEAMS = etree.XPath(f".//*[{_has_class('dashboard-game-team-info__name')}]")
+_XP_DATE = etree.XPath(f"(.//*[{_has_class('dashboard-game-info__date')}])[1]")
+_XP_TIME = etree.XPath(f"(.//*[{_has_class('dashboard-game-info__time')}])[1]")
+_XP_LINK = etree.XPath(f"(.//*[{_has_class('dashboard-game-block__link')}])[1]/@href")
+_XP_MARKETS = etree.XPath(f".//*[{_has_class('dashboard-markets__market')}]")
+_XP_TOGGLE = etree.XPath(f"(.//*[{_has_class('ui-market__toggle')}])[1]")
+_XP_VALUE = etree.XPath(f"(.//*[{_has_class('ui-market__value')}])[1]")
+
+_ODD_LABELS = {"V1": "1", "X": "X", "V2": "2"}
+
+
+def _text(elements):
+    # Equivalent de get_text(strip=True) de BeautifulSoup
+    if not elements:
+        return ""
+    return "".join(s.strip() for s in elements[0].itertext())
+
+
+def _parse_game(li, league_name, tokens):
+    teams = _XP_TEAMS(li)
+    if len(teams) < 2:
+        return None
+    home_team = _text(teams[:1])
+    away_team = _text(teams[1:2])
+    if _is_banned(home_team, away_team):
+        return None
+
+    raw_date = _text(_XP_DATE(li))
+    time_elems = _XP_TIME(li)
+    start_time = _text(time_elems) if time_elems else "N/A"
+    if not is_today(raw_date, tokens):
+        return None
+
+    links = _XP_LINK(li)
+    match_url = str(links[0]) if links else ""
+
+    odds = {"1": "-", "X": "-", "2": "-"}
+    for market in _XP_MARKETS(li):
+        btn = _XP_TOGGLE(market)
+        val = _XP_VALUE(market)
+        if btn and val:
+            key = _ODD_LABELS.get(btn[0].get("aria-label"))
+            odd_value = _text(val)
+            if key and odd_value and odd_value != "-":
+                odds[key] = odd_value
+
+    return _row(league_name, home_team, away_team, raw_date, start_time, odds, match_url, tokens)
+
+
+def parse_league_html(games_html, league_name, tokens=None):
+    """
+    Parse en un passage le HTML de tous les matchs d'une ligue.
+
+    Args:
+        games_html (str): HTML de la page ou des li.dashboard-game (GAMES_HTML_JS)
+        league_name (str): Nom de la ligue
+        tokens (tuple): today_tokens() (calculé si absent)
+
+    Returns:
+        list: Matchs du jour avec une heure connue
+    """
+    if not games_html or not games_html.strip():
+        return []
+    tokens = tokens or today_tokens()
+    root = lxml_html.fromstring(f"<ul>{games_html}</ul>")
+    matches = []
+    for li in _XP_GAMES(root):
+        try:
+            match_data = _parse_game(li, league_name, tokens)
+        except Exception:
+            continue
+        if match_data and match_data['time'] != "N/A":
+            matches.append(match_data)
+    return matches
+
+
+# ============================================================
+# 🐢 RÉFÉRENCE : BEAUTIFULSOUP PAR FRAGMENT (ancien chemin)
+# ============================================================
+
+def parse_match_html(match_html, league_name, tokens=None):
+    """Analyse le HTML d'un match et filtre STRICTEMENT la date"""
+    tokens = tokens or today_tokens()
+    soup = BeautifulSoup(str(match_html), 'html.parser')
+
+    try:
+        # 1. Équipes
+        team_elements = soup.select(".dashboard-game-team-info__name")
+        if len(team_elements) < 2: return None
+
+        home_team = team_elements[0].get_text(strip=True)
+        away_team = team_elements[1].get_text(strip=True)
+
+        # 2. Filtrage Mots Bannis
+        if _is_banned(home_team, away_team):
+            return None
+
+        # 3. DATE ET HEURE (VÉRIFICATION STRICTE)
+        date_elem = soup.select_one(".dashboard-game-info__date")
+        time_elem = soup.select_one(".dashboard-game-info__time")
+        raw_date = date_elem.get_text(strip=True) if date_elem else ""
+        start_time = time_elem.get_text(strip=True) if time_elem else "N/A"
+        if not is_today(raw_date, tokens):
+            return None
+
+        # 4. ID et Lien
+        link_elem = soup.select_one(".dashboard-game-block__link")
+        match_url = link_elem.get('href') if link_elem else ""
+
+        # 5. Cotes
+        odds = {"1": "-", "X": "-", "2": "-"}
+        for market in soup.select(".dashboard-markets__market"):
+            btn = market.select_one(".ui-market__toggle")
+            val = market.select_one(".ui-market__value")
+
+            if btn and val:
+                label = btn.get("aria-label")
+                odd_value = val.get_text(strip=True)
+
+                if odd_value and odd_value != "-":
+                    if label == "V1": odds["1"] = odd_value
+                    elif label == "X": odds["X"] = odd_value
+                    elif label == "V2": odds["2"] = odd_value
+
+        return _row(league_name, home_team, away_team, raw_date, start_time, odds, match_url, tokens)
+    except: return None
+
+
+def parse_league_html_legacy(games_html, league_name, tokens=None):
+    """Ancien chemin : un BeautifulSoup par li.dashboard-game"""
+    tokens = tokens or today_tokens()
+    root = lxml_html.fromstring(f"<ul>{games_html}</ul>")
+    matches = []
+    for li in _XP_GAMES(root):
+        inner = (li.text or "") + "".join(
+            etree.tostring(child, encoding="unicode", method="html") for child in li
+        )
+        match_data = parse_match_html(inner, league_name, tokens)
+        if match_data and match_data['time'] != "N/A":
+            matches.append(match_data)
+    return matches
+
+
+# ============================================================
+# 📊 BENCHMARK SUR FIXTURES
+# ============================================================
+
+def _fixture_files(paths):
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(os.path.join(path, f) for f in sorted(os.listdir(path)) if f.endswith(".html"))
+        else:
+            files.append(path)
+    return files
+
+
+def benchmark(paths, repeat=20, tokens=None):
+    """
+    Compare le parseur lxml au chemin BeautifulSoup sur des pages enregistrées.
+
+    Les fixtures sont produites par 02_scrape.py avec SAVE_LEAGUE_HTML=True
+    (match/YYYY-MM-DD/league_html/<ligue>.html). `tokens` doit correspondre
+    au jour d'enregistrement, sinon le filtre de date rejette tous les matchs.
+
+    Returns:
+        dict: {"pages", "matches", "lxml_ms", "bs4_ms", "speedup", "mismatches"}
+    """
+    pages = []
+    for f in _fixture_files(paths):
+        with open(f, "r", encoding="utf-8") as fh:
+            pages.append((os.path.basename(f), fh.read()))
+    if not pages:
+        print("❌ Aucune fixture trouvée")
+        return {}
+    if BeautifulSoup is None:
+        print("❌ beautifulsoup4 requis pour la comparaison")
+        return {}
+    tokens = tokens or today_tokens()
+
+    mismatches = []
+    total = 0
+    for name, page in pages:
+        fast = parse_league_html(page, name, tokens)
+        slow = parse_league_html_legacy(page, name, tokens)
+        total += len(fast)
+        if fast != slow:
+            mismatches.append(name)
+
+    def timed(func):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for name, page in pages:
+                func(page, name, tokens)
+        return (time.perf_counter() - start) * 1000 / repeat
+
+    lxml_ms, bs4_ms = timed(parse_league_html), timed(parse_league_html_legacy)
+    report = {
+        "pages": len(pages), "matches": total,
+        "lxml_ms": lxml_ms, "bs4_ms": bs4_ms,
+        "speedup": bs4_ms / lxml_ms if lxml_ms else None,
+        "mismatches": mismatches,
+    }
+    print(f"📊 {len(pages)} pages, {total} matchs (x{repeat})")
+    print(f"   ⚡ lxml + XPath      : {lxml_ms:.1f} ms / passage")
+    print(f"   🐢 BeautifulSoup     : {bs4_ms:.1f} ms / passage (x{report['speedup']:.1f})")
+    if mismatches:
+        print(f"   ❌ Résultats différents : {', '.join(mismatches)}")
+    else:
+        print("   ✅ Résultats identiques")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du parseur de pages de ligue")
+    parser.add_argument("paths", nargs="+", help="Fichiers .html ou dossiers de fixtures")
+    parser.add_argument("--date", help="Jour d'enregistrement YYYY-MM-DD (défaut : aujourd'hui)")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    day = datetime.strptime(args.date, "%Y-%m-%d") if args.date else None
+    benchmark(args.paths, args.repeat, today_tokens(day))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""
+monitor/match_state.py
+Etat glissant par match : les N derniers scans dans un buffer circulaire,
+et des indicateurs de dynamique calculés en O(1) à chaque mise à jour.
+
+Indicateurs (fenêtre = premier et dernier échantillon du buffer) :
+- attaques, attaques dangereuses et tirs cadrés par minute (domicile/extérieur)
+- vitesse des cotes V1 / V2 (variation par minute de jeu)
+- minutes depuis le dernier but
+- mouvements des lignes de totaux depuis le scan précédent
+
+La mémoire est plafonnée : `capacity` échantillons par match et au plus
+`max_matches` matchs suivis (les moins récemment mis à jour sont oubliés).
+"""
+
+from collections import OrderedDict, deque
+
+from .api_parser import diff_totals
+
+
+def _stat_pair(stats, label):
+    """(domicile, extérieur) d'une statistique, None si absente ou illisible"""
+    group = stats.get(label)
+    if not isinstance(group, dict):
+        return None
+    try:
+        return tuple(int(str(group.get(side, "0")).replace("%", "")) for side in ("home", "away"))
+    except (TypeError, ValueError):
+        return None
+
+
+def _float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def game_minutes(game_time):
+    """'67:12' -> 67.2 (None si illisible)"""
+    try:
+        mm, _, ss = str(game_time).partition(":")
+        return int(mm) + (int(ss) / 60 if ss else 0)
+    except ValueError:
+        return None
+
+
+class Sample:
+    """Un scan réduit aux valeurs utiles (compact en mémoire)"""
+
+    __slots__ = ("minute", "home_goals", "away_goals", "attacks", "danger", "shots", "odd_v1", "odd_v2")
+
+    def __init__(self, minute, home_goals, away_goals, attacks, danger, shots, odd_v1, odd_v2):
+        self.minute = minute
+        self.home_goals = home_goals
+        self.away_goals = away_goals
+        self.attacks = attacks    # (home, away), None si stats absentes du scan
+        self.danger = danger      # (home, away), idem
+        self.shots = shots        # (home, away) tirs cadrés, idem
+        self.odd_v1 = odd_v1
+        self.odd_v2 = odd_v2
+
+    @classmethod
+    def from_match_data(cls, match_data):
+        minute = game_minutes(match_data.get("game_time"))
+        try:
+            home, away = map(int, match_data.get("score", "").replace(" ", "").split("-"))
+        except (AttributeError, ValueError):
+            return None
+        if minute is None:
+            return None
+        stats = match_data.get("stats") or {}
+        odds = match_data.get("live_odds") or {}
+        return cls(
+            minute, home, away,
+            _stat_pair(stats, "Attaques"),
+            _stat_pair(stats, "Attaques dangereuses"),
+            _stat_pair(stats, "Tirs cadrés"),
+            _float(odds.get("V1")), _float(odds.get("V2")),
+        )
+
+
+class MatchState:
+    """Buffer circulaire des derniers scans d'un match"""
+
+    def __init__(self, match_id, capacity=20):
+        self.match_id = match_id
+        self.samples = deque(maxlen=capacity)
+        self.last_goal_minute = None
+        self.updates = 0
+        self.last_totals = None
+        self.totals_moves = {}
+
+    def update(self, match_data):
+        """
+        Ajoute un scan LIVE (ignoré si score/minute illisibles ou minute en recul).
+
+        Returns:
+            bool: True si l'échantillon a été ajouté
+        """
+        sample = Sample.from_match_data(match_data)
+        if sample is None:
+            return False
+        if self.samples:
+            last = self.samples[-1]
+            if sample.minute < last.minute:
+                return False
+            if sample.home_goals + sample.away_goals > last.home_goals + last.away_goals:
+                self.last_goal_minute = sample.minute
+        elif sample.home_goals + sample.away_goals == 0:
+            self.last_goal_minute = 0.0
+        self.samples.append(sample)
+        self.updates += 1
+        totals = match_data.get("totals")
+        if totals:
+            if self.last_totals is not None:
+                self.totals_moves = diff_totals(self.last_totals, totals)
+            self.last_totals = totals
+        return True
+
+    @staticmethod
+    def _rate(first, last, attr, dt):
+        a, b = getattr(first, attr), getattr(last, attr)
+        if a is None or b is None:
+            return None  # Stat absente à un bout de la fenêtre : pas de taux (et non 0)
+        return tuple(round((b[i] - a[i]) / dt, 3) for i in (0, 1))
+
+    @staticmethod
+    def _velocity(a, b, dt):
+        if a is None or b is None:
+            return None
+        return round((b - a) / dt, 4)
+
+    def features(self):
+        """
+        Indicateurs de dynamique sur la fenêtre courante.
+
+        Returns:
+            dict: Taux par minute (home, away), vitesses de cotes, minutes depuis le dernier but,
+                  mouvements des totaux ({ligne: {seuil: {colonne: [avant, après]}}}).
+                  Les taux valent None tant que la fenêtre couvre moins d'une minute de jeu,
+                  ou si le premier ou le dernier scan de la fenêtre n'a pas la statistique.
+        """
+        if not self.samples:
+            return {}
+        first, last = self.samples[0], self.samples[-1]
+        dt = last.minute - first.minute
+        feats = {
+            "samples": len(self.samples),
+            "window_minutes": round(dt, 2),
+            "minutes_since_goal": (
+                round(last.minute - self.last_goal_minute, 2)
+                if self.last_goal_minute is not None else None
+            ),
+            "attacks_per_min": None,
+            "danger_per_min": None,
+            "shots_on_target_per_min": None,
+            "odd_v1_velocity": None,
+            "odd_v2_velocity": None,
+            "totals_moves": self.totals_moves,
+        }
+        if dt >= 1:
+            feats["attacks_per_min"] = self._rate(first, last, "attacks", dt)
+            feats["danger_per_min"] = self._rate(first, last, "danger", dt)
+            feats["shots_on_target_per_min"] = self._rate(first, last, "shots", dt)
+            feats["odd_v1_velocity"] = self._velocity(first.odd_v1, last.odd_v1, dt)
+            feats["odd_v2_velocity"] = self._velocity(first.odd_v2, last.odd_v2, dt)
+        return feats
+
+
+class MatchStateRegistry:
+    """Etats par match, nombre de matchs suivis plafonné (LRU)"""
+
+    def __init__(self, capacity=20, max_matches=500):
+        """
+        Args:
+            capacity (int): Echantillons gardés par match
+            max_matches (int): Matchs suivis au maximum
+        """
+        self.capacity = capacity
+        self.max_matches = max_matches
+        self.states = OrderedDict()
+
+    def update(self, match_data):
+        """
+        Met à jour l'état d'un match LIVE (un match terminé est oublié).
+
+        Returns:
+            MatchState | None
+        """
+        m_id = match_data.get("id")
+        if not m_id:
+            return None
+        if match_data.get("status") == "FINISHED":
+            self.states.pop(m_id, None)
+            return None
+        if match_data.get("status") != "LIVE":
+            return self.states.get(m_id)
+
+        state = self.states.get(m_id)
+        if state is None:
+            state = self.states[m_id] = MatchState(m_id, self.capacity)
+            while len(self.states) > self.max_matches:
+                self.states.popitem(last=False)
+        else:
+            self.states.move_to_end(m_id)
+        state.update(match_data)
+        return state
+
+    def features(self, match_id):
+        state = self.states.get(match_id)
+        return state.features() if state else {}
+
+    def __len__(self):
+        return len(self.states)
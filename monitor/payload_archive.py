@@ -0,0 +1,206 @@
+"""
+monitor/payload_archive.py
+Archive des réponses brutes GetGameZip (append-only, compressée, rejouable).
+
+Un segment par jour : match/YYYY-MM-DD/api_archive/payloads.{gz|zst}
+Chaque capture est une trame compressée indépendante (membre gzip ou trame
+zstd) contenant une ligne d'en-tête JSON puis le corps brut de la réponse.
+Un index JSONL (payloads.idx.jsonl) donne match_id, ts, offset et longueur
+de chaque trame pour un accès direct par match.
+"""
+
+import gzip
+import json
+import os
+from datetime import datetime
+
+try:
+    import zstandard
+except ImportError:  # zstandard est optionnel, gzip par défaut
+    zstandard = None
+
+
+ARCHIVE_DIRNAME = "api_archive"
+SEGMENT_NAME = "payloads"
+INDEX_SUFFIX = ".idx.jsonl"
+
+
+class PayloadArchive:
+    """Puits de capture des payloads API bruts, un segment par jour"""
+
+    def __init__(self, base_dir="match", compression="gzip"):
+        """
+        Initialise l'archive.
+
+        Args:
+            base_dir (str): Dossier racine des données (contient les dossiers YYYY-MM-DD)
+            compression (str): "gzip" ou "zstd" (si le module zstandard est installé)
+        """
+        if compression == "zstd" and zstandard is None:
+            print("⚠️ zstandard non installé, archive en gzip")
+            compression = "gzip"
+        self.base_dir = base_dir
+        self.compression = compression
+        self._compressor = zstandard.ZstdCompressor(level=3) if compression == "zstd" else None
+        self.records_written = 0
+        self.bytes_written = 0
+
+    # ------------------------------------------------------------
+    # Chemins
+    # ------------------------------------------------------------
+
+    def _extension(self, compression=None):
+        return "zst" if (compression or self.compression) == "zstd" else "gz"
+
+    def segment_path(self, date_str, compression=None):
+        """Chemin du segment compressé pour une date"""
+        return os.path.join(
+            self.base_dir, date_str, ARCHIVE_DIRNAME,
+            f"{SEGMENT_NAME}.{self._extension(compression)}"
+        )
+
+    def index_path(self, date_str, compression=None):
+        """Chemin de l'index JSONL associé au segment"""
+        return self.segment_path(date_str, compression) + INDEX_SUFFIX
+
+    # ------------------------------------------------------------
+    # Écriture
+    # ------------------------------------------------------------
+
+    def _compress(self, data):
+        if self._compressor is not None:
+            return self._compressor.compress(data)
+        return gzip.compress(data, compresslevel=6)
+
+    def append(self, match_id, raw_payload, ts=None):
+        """
+        Ajoute une réponse brute à l'archive du jour.
+
+        Args:
+            match_id (str): Identifiant du match
+            raw_payload (bytes|str|dict): Corps de la réponse API
+            ts (datetime): Horodatage de capture (défaut: maintenant)
+
+        Returns:
+            dict: Entrée d'index écrite (match_id, ts, offset, length)
+        """
+        ts = ts or datetime.now()
+        date_str = ts.strftime("%Y-%m-%d")
+
+        if isinstance(raw_payload, dict):
+            raw_payload = json.dumps(raw_payload, ensure_ascii=False, separators=(",", ":"))
+        if isinstance(raw_payload, str):
+            raw_payload = raw_payload.encode("utf-8")
+
+        header = json.dumps({"match_id": str(match_id), "ts": ts.isoformat()})
+        frame = self._compress(header.encode("utf-8") + b"\n" + raw_payload)
+
+        segment = self.segment_path(date_str)
+        os.makedirs(os.path.dirname(segment), exist_ok=True)
+
+        with open(segment, "ab") as f:
+            offset = f.tell()
+            f.write(frame)
+
+        entry = {
+            "match_id": str(match_id),
+            "ts": ts.isoformat(),
+            "offset": offset,
+            "length": len(frame)
+        }
+        with open(self.index_path(date_str), "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+
+        self.records_written += 1
+        self.bytes_written += len(frame)
+        return entry
+
+    # ------------------------------------------------------------
+    # Lecture
+    # ------------------------------------------------------------
+
+    @staticmethod
+    def _decompress(frame, compression):
+        if compression == "zstd":
+            if zstandard is None:
+                raise RuntimeError("Module zstandard requis pour lire une archive .zst")
+            return zstandard.ZstdDecompressor().decompress(frame)
+        return gzip.decompress(frame)
+
+    @staticmethod
+    def _split_record(data):
+        header, _, payload = data.partition(b"\n")
+        meta = json.loads(header)
+        return {"match_id": meta["match_id"], "ts": meta["ts"], "payload": payload}
+
+    def _existing_compression(self, date_str):
+        """Détecte le format du segment présent sur disque pour une date"""
+        for compression in (self.compression, "gzip", "zstd"):
+            if os.path.exists(self.segment_path(date_str, compression)):
+                return compression
+        return None
+
+    def load_index(self, date_str, match_id=None):
+        """
+        Lit l'index d'une journée.
+
+        Args:
+            date_str (str): Date YYYY-MM-DD
+            match_id (str): Filtre optionnel sur un match
+
+        Returns:
+            list: Entrées d'index (dans l'ordre d'écriture)
+        """
+        compression = self._existing_compression(date_str)
+        if compression is None:
+            return []
+
+        entries = []
+        path = self.index_path(date_str, compression)
+        if not os.path.exists(path):
+            return entries
+
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # Dernière ligne tronquée (crash pendant l'écriture)
+                if match_id is None or entry["match_id"] == str(match_id):
+                    entries.append(entry)
+        return entries
+
+    def iter_records(self, date_str, match_id=None):
+        """
+        Itère sur les payloads archivés d'une journée.
+
+        Args:
+            date_str (str): Date YYYY-MM-DD
+            match_id (str): Filtre optionnel (accès direct via l'index)
+
+        Yields:
+            dict: {"match_id", "ts", "payload" (bytes bruts)}
+        """
+        compression = self._existing_compression(date_str)
+        if compression is None:
+            return
+
+        # Ordre chronologique (stable : l'ordre d'écriture départage les égalités)
+        entries = sorted(self.load_index(date_str, match_id), key=lambda e: e.get("ts", ""))
+        with open(self.segment_path(date_str, compression), "rb") as f:
+            for entry in entries:
+                f.seek(entry["offset"])
+                frame = f.read(entry["length"])
+                if len(frame) < entry["length"]:
+                    break  # Segment tronqué
+                yield self._split_record(self._decompress(frame, compression))
+
+    def available_dates(self):
+        """Liste les dates pour lesquelles une archive existe"""
+        dates = []
+        if not os.path.isdir(self.base_dir):
+            return dates
+        for name in sorted(os.listdir(self.base_dir)):
+            if self._existing_compression(name):
+                dates.append(name)
+        return dates
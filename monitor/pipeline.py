@@ -0,0 +1,264 @@
+"""
+monitor/pipeline.py
+Exécution en flux d'une chaîne d'étapes asynchrones (arbre orienté).
+
+Chaque étape est un générateur asynchrone : la source ne prend rien, les
+autres reçoivent un élément et produisent 0..n éléments pour leurs étapes
+filles. Les étapes sont reliées par des asyncio.Queue bornées : une étape
+lente fait patienter celles qui l'alimentent (contre-pression) au lieu
+d'accumuler en mémoire, et un élément est traité dès qu'il est produit.
+
+Reprise : une étape déclarant `key` marque chaque élément terminé dans un
+checkpoint JSON ; au redémarrage les éléments déjà faits sont sautés.
+Le traitement est « au moins une fois » (les stores dédoublonnent par ID),
+et `backlog` réinjecte au démarrage les éléments durables encore en attente.
+
+Métriques par étape : entrées, sorties, sautés, erreurs, temps actif,
+profondeur maximale de la file et délai de la première sortie.
+"""
+
+import asyncio
+import json
+import time
+
+from .state_store import atomic_write_json
+
+
+_END = object()  # Fin de flux (une par worker de l'étape fille)
+
+
+class StageMetrics:
+    """Compteurs d'une étape"""
+
+    def __init__(self, name):
+        self.name = name
+        self.items_in = 0
+        self.items_out = 0
+        self.skipped = 0
+        self.errors = 0
+        self.busy_s = 0.0
+        self.queue_max = 0
+        self.first_out_s = None
+        self.finished_s = None
+
+    def as_dict(self):
+        return {
+            "in": self.items_in,
+            "out": self.items_out,
+            "skipped": self.skipped,
+            "errors": self.errors,
+            "busy_s": round(self.busy_s, 2),
+            "queue_max": self.queue_max,
+            "first_out_s": None if self.first_out_s is None else round(self.first_out_s, 2),
+            "finished_s": None if self.finished_s is None else round(self.finished_s, 2),
+        }
+
+
+class Checkpoint:
+    """Clés des éléments terminés par étape, écrites de façon atomique et groupée"""
+
+    def __init__(self, path, flush_interval=1.0):
+        """
+        Args:
+            path (str): Fichier JSON du checkpoint (None = pas de persistance)
+            flush_interval (float): Ecart minimal entre deux écritures (s)
+        """
+        self.path = path
+        self.flush_interval = flush_interval
+        self.done = {}
+        self._dirty = False
+        self._last_flush = 0.0
+        if path:
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self.done = {stage: set(keys) for stage, keys in json.load(f).items()}
+            except (OSError, json.JSONDecodeError, AttributeError):
+                self.done = {}
+
+    def seed(self, stage, keys):
+        """Ajoute des clés déjà connues ailleurs (ex: progression de 02_scrape.py)"""
+        self.done.setdefault(stage, set()).update(keys)
+
+    def is_done(self, stage, key):
+        return key in self.done.get(stage, ())
+
+    def mark(self, stage, key):
+        self.done.setdefault(stage, set()).add(key)
+        self._dirty = True
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def clear(self, stage):
+        """Oublie les clés d'une étape (fin de cycle : elles seront refaites au suivant)"""
+        if self.done.pop(stage, None) is not None:
+            self._dirty = True
+            self.flush()
+
+    def flush(self):
+        if not self.path or not self._dirty:
+            return
+        atomic_write_json(self.path, {stage: sorted(keys) for stage, keys in self.done.items()})
+        self._dirty = False
+        self._last_flush = time.monotonic()
+
+
+class Stage:
+    """
+    Etape du pipeline.
+
+    Args:
+        name (str): Nom unique
+        func: Générateur asynchrone (`func()` pour la source, `func(item)` sinon)
+        after (str): Etape amont (None = source)
+        workers (int): Exécutions concurrentes
+        maxsize (int): Taille de la file d'entrée (contre-pression)
+        key: item -> clé de checkpoint (None = pas de reprise)
+        backlog: Callable renvoyant les éléments à réinjecter au démarrage
+    """
+
+    def __init__(self, name, func, after=None, workers=1, maxsize=100, key=None, backlog=None):
+        self.name = name
+        self.func = func
+        self.after = after
+        self.workers = max(1, workers)
+        self.maxsize = maxsize
+        self.key = key
+        self.backlog = backlog
+        self.children = []
+        self.queue = None
+        self.backlog_done = None
+        self.metrics = StageMetrics(name)
+
+
+class Pipeline:
+    """Relie les étapes par des files bornées et les exécute en parallèle"""
+
+    def __init__(self, stages, checkpoint=None):
+        """
+        Args:
+            stages (list): Etapes (une seule source)
+            checkpoint (Checkpoint): Reprise (optionnelle)
+        """
+        self.stages = {s.name: s for s in stages}
+        self.checkpoint = checkpoint
+        sources = [s for s in stages if s.after is None]
+        if len(sources) != 1:
+            raise ValueError(f"Une seule étape source attendue ({len(sources)} trouvées)")
+        self.source = sources[0]
+        for stage in stages:
+            if stage.after is not None:
+                if stage.after not in self.stages:
+                    raise ValueError(f"Etape amont inconnue : {stage.after} (pour {stage.name})")
+                self.stages[stage.after].children.append(stage)
+        self.started = None
+
+    def _elapsed(self):
+        return time.perf_counter() - self.started
+
+    async def _emit(self, stage, item):
+        metrics = stage.metrics
+        metrics.items_out += 1
+        if metrics.first_out_s is None:
+            metrics.first_out_s = self._elapsed()
+        for child in stage.children:
+            await child.queue.put(item)  # Bloque si la fille est saturée
+            child.metrics.queue_max = max(child.metrics.queue_max, child.queue.qsize())
+
+    async def _run_generator(self, stage, agen):
+        # Le temps passé à attendre une file pleine n'est pas compté comme actif
+        metrics = stage.metrics
+        while True:
+            t0 = time.perf_counter()
+            try:
+                out = await agen.__anext__()
+            except StopAsyncIteration:
+                metrics.busy_s += time.perf_counter() - t0
+                return
+            metrics.busy_s += time.perf_counter() - t0
+            await self._emit(stage, out)
+
+    async def _worker(self, stage):
+        metrics = stage.metrics
+        while True:
+            item = await stage.queue.get()
+            if item is _END:
+                return
+            metrics.items_in += 1
+            key = stage.key(item) if stage.key else None
+            if key is not None and self.checkpoint and self.checkpoint.is_done(stage.name, key):
+                metrics.skipped += 1
+                continue
+            try:
+                await self._run_generator(stage, stage.func(item))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                metrics.errors += 1
+                print(f"   ⚠️ [{stage.name}] {e}")
+                continue
+            if key is not None and self.checkpoint:
+                self.checkpoint.mark(stage.name, key)
+
+    async def _run_source(self, stage):
+        try:
+            await self._run_generator(stage, stage.func())
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            stage.metrics.errors += 1
+            print(f"   ⚠️ [{stage.name}] {e}")
+
+    async def _run_stage(self, stage):
+        if stage is self.source:
+            await self._run_source(stage)
+        else:
+            await asyncio.gather(
+                self._inject_backlog(stage),
+                *(self._worker(stage) for _ in range(stage.workers))
+            )
+        stage.metrics.finished_s = self._elapsed()
+        for child in stage.children:
+            # La fin de flux ne doit pas doubler le backlog de la fille
+            await child.backlog_done.wait()
+            for _ in range(child.workers):
+                await child.queue.put(_END)
+
+    async def _inject_backlog(self, stage):
+        try:
+            items = list(stage.backlog() or []) if stage.backlog else []
+            for item in items:
+                await stage.queue.put(item)
+            if items:
+                print(f"   🔁 [{stage.name}] {len(items)} éléments en attente réinjectés")
+        finally:
+            stage.backlog_done.set()
+
+    async def run(self):
+        """
+        Exécute le pipeline jusqu'à épuisement de la source.
+
+        Returns:
+            dict: Métriques par étape
+        """
+        self.started = time.perf_counter()
+        for stage in self.stages.values():
+            stage.queue = asyncio.Queue(maxsize=stage.maxsize) if stage is not self.source else None
+            stage.backlog_done = asyncio.Event()
+            stage.metrics = StageMetrics(stage.name)
+        try:
+            await asyncio.gather(*(self._run_stage(s) for s in self.stages.values()))
+        finally:
+            if self.checkpoint:
+                self.checkpoint.flush()
+        return self.metrics()
+
+    def metrics(self):
+        return {name: stage.metrics.as_dict() for name, stage in self.stages.items()}
+
+    def print_metrics(self):
+        print(f"\n{'étape':<12}{'entrées':>9}{'sorties':>9}{'sautés':>8}{'erreurs':>9}"
+              f"{'actif(s)':>10}{'file max':>10}{'1re sortie':>12}")
+        for name, m in self.metrics().items():
+            first = "-" if m["first_out_s"] is None else f"{m['first_out_s']:.1f}s"
+            print(f"{name:<12}{m['in']:>9}{m['out']:>9}{m['skipped']:>8}{m['errors']:>9}"
+                  f"{m['busy_s']:>10.1f}{m['queue_max']:>10}{first:>12}")
@@ -0,0 +1,328 @@
+"""
+monitor/polling_scheduler.py
+Planificateur de scans adaptatif par match (file de priorité).
+
+Chaque match a sa propre échéance de scan, recalculée après chaque passage :
+- LIVE proche des seuils de BettingAnalyzer (minute >= 45, favori mené ou
+  à égalité) : toutes les quelques secondes
+- LIVE "calme" : moins souvent
+- UPCOMING : une seule fois juste avant le coup d'envoi
+- FINISHED : plus jamais
+Un budget global (token bucket) plafonne le nombre de scans par minute.
+"""
+
+import asyncio
+import heapq
+import itertools
+from datetime import datetime
+
+from .rule_engine import default_engine
+from .rate_limit import SimulatedClock, SystemClock, TokenBucket
+
+
+def kickoff_timestamp(heure, now_ts):
+    """
+    Convertit l'heure "HH:MM" du match en timestamp (date du jour).
+
+    Args:
+        heure (str): Heure de début au format HH:MM
+        now_ts (float): Timestamp courant (horloge du planificateur)
+
+    Returns:
+        float or None: Timestamp du coup d'envoi
+    """
+    try:
+        h, m = map(int, str(heure).split(":"))
+        now = datetime.fromtimestamp(now_ts)
+        return now.replace(hour=h, minute=m, second=0, microsecond=0).timestamp()
+    except (ValueError, TypeError):
+        return None
+
+
+class PollingPolicy:
+    """Calcule le délai avant le prochain scan d'un match"""
+
+    HOT_INTERVAL = 5          # LIVE proche des seuils d'alerte
+    LIVE_INTERVAL = 45        # LIVE sans enjeu immédiat
+    UPCOMING_LEAD = 120       # Scan 2 min avant le coup d'envoi
+    UPCOMING_RECHECK = 300    # Coup d'envoi passé mais match pas encore LIVE
+    RETRY_INTERVAL = 120      # NOT_READY / UNKNOWN
+    HOT_LEAD_MINUTES = 5      # On accélère 5 min avant les seuils
+
+    def __init__(self, rule_params=None):
+        params = rule_params or default_engine().params
+        self.hot_minute = min(
+            params["MIN_MINUTE_TRAILING"], params["MIN_MINUTE_DRAW"]
+        ) - self.HOT_LEAD_MINUTES
+
+    def initial_delay(self, match, now):
+        """Délai avant le premier scan (avant toute donnée live)"""
+        kickoff = kickoff_timestamp(match.get("heure"), now)
+        if kickoff is None:
+            return 0.0
+        return max(0.0, kickoff - self.UPCOMING_LEAD - now)
+
+    def is_hot(self, match_data):
+        """Vrai si le match est LIVE, tardif et le favori ne mène pas"""
+        try:
+            home, away = map(int, match_data.get("score", "0-0").replace(" ", "").split("-"))
+            game_time = match_data.get("game_time", "00:00")
+            minutes = int(game_time.split(":")[0]) if ":" in game_time else 0
+        except (ValueError, AttributeError):
+            return False
+
+        pronostic = match_data.get("pronostic")
+        if pronostic == "V1":
+            score_fav, score_adv = home, away
+        elif pronostic == "V2":
+            score_fav, score_adv = away, home
+        else:
+            return False
+        return minutes >= self.hot_minute and score_adv >= score_fav
+
+    def next_delay(self, match_data, now):
+        """
+        Args:
+            match_data (dict): Résultat du dernier scan
+            now (float): Timestamp courant
+
+        Returns:
+            float or None: Délai en secondes, None = ne plus scanner
+        """
+        status = match_data.get("status")
+        if status == "FINISHED":
+            return None
+        if status == "LIVE":
+            return self.HOT_INTERVAL if self.is_hot(match_data) else self.LIVE_INTERVAL
+        if status == "UPCOMING":
+            kickoff = kickoff_timestamp(match_data.get("heure"), now)
+            if kickoff is not None and kickoff - self.UPCOMING_LEAD > now:
+                return kickoff - self.UPCOMING_LEAD - now
+            return self.UPCOMING_RECHECK
+        return self.RETRY_INTERVAL
+
+
+class PollingScheduler:
+    """File de priorité d'échéances de scan avec budget global"""
+
+    def __init__(self, policy=None, clock=None, max_polls_per_minute=30, burst=5):
+        """
+        Args:
+            policy (PollingPolicy): Politique d'intervalles
+            clock: SystemClock ou SimulatedClock
+            max_polls_per_minute (int): Budget global de scans
+            burst (int): Rafale maximale autorisée par le budget
+        """
+        self.policy = policy or PollingPolicy()
+        self.clock = clock or SystemClock()
+        self.budget = TokenBucket(max_polls_per_minute / 60.0, burst, self.clock)
+        self.matches = {}
+        self.poll_counts = {}
+        self.retired = set()  # IDs retirés : ignorés aux rechargements suivants
+        self._heap = []
+        self._versions = {}
+        self._seq = itertools.count()
+
+    def __len__(self):
+        return len(self._versions)
+
+    # ------------------------------------------------------------
+    # Gestion de la file
+    # ------------------------------------------------------------
+
+    def schedule(self, match_id, delay):
+        """Programme (ou reprogramme) un match dans `delay` secondes"""
+        version = self._versions.get(match_id, 0) + 1
+        self._versions[match_id] = version
+        due = self.clock.now() + delay
+        heapq.heappush(self._heap, (due, next(self._seq), match_id, version))
+
+    def remove(self, match_id):
+        """Retire un match de la file (les entrées restantes deviennent obsolètes)"""
+        self._versions.pop(match_id, None)
+        self.matches.pop(match_id, None)
+        self.poll_counts.pop(match_id, None)
+        self.retired.add(match_id)
+
+    def add(self, match):
+        """Ajoute un match à surveiller (ignoré s'il est déjà suivi ou retiré)"""
+        match_id = match.get("id")
+        if not match_id or match_id in self.matches or match_id in self.retired:
+            return False
+        self.matches[match_id] = match
+        self.schedule(match_id, self.policy.initial_delay(match, self.clock.now()))
+        return True
+
+    def upsert(self, match):
+        """
+        Ajoute un match ou met à jour un match suivi (cote, pronostic, heure...).
+        Un changement d'heure de coup d'envoi reprogramme le match.
+
+        Returns:
+            str or None: "new", "changed" ou None (identique ou retiré)
+        """
+        match_id = match.get("id")
+        previous = self.matches.get(match_id)
+        if previous is None:
+            return "new" if self.add(match) else None
+        if previous == match:
+            return None
+        self.matches[match_id] = match
+        if match.get("heure") != previous.get("heure"):
+            self.schedule(match_id, self.policy.initial_delay(match, self.clock.now()))
+        return "changed"
+
+    def sync(self, matches):
+        """
+        Upsert par ID des matchs d'une liste rechargée.
+
+        Returns:
+            tuple: (nombre ajouté, nombre mis à jour)
+        """
+        statuses = [self.upsert(m) for m in matches]
+        return statuses.count("new"), statuses.count("changed")
+
+    def update(self, match_id, match_data):
+        """Reprogramme un match selon le résultat de son dernier scan"""
+        delay = self.policy.next_delay(match_data, self.clock.now())
+        if delay is None:
+            self.remove(match_id)
+        else:
+            self.schedule(match_id, delay)
+        return delay
+
+    def _peek(self):
+        """Prochaine entrée valide (due, match_id, version), purge les entrées obsolètes"""
+        while self._heap:
+            due, _, match_id, version = self._heap[0]
+            if self._versions.get(match_id) == version:
+                return due, match_id, version
+            heapq.heappop(self._heap)
+        return None
+
+    def next_due(self):
+        entry = self._peek()
+        return entry[0] if entry else None
+
+    # ------------------------------------------------------------
+    # Boucle
+    # ------------------------------------------------------------
+
+    async def run(self, poll_fn, until=None, stop_event=None, max_sleep=1.0):
+        """
+        Boucle principale : attend la prochaine échéance, consomme un jeton
+        du budget global puis appelle poll_fn(match).
+
+        Args:
+            poll_fn: Coroutine async (match) -> match_data
+            until (float): Timestamp d'arrêt (optionnel)
+            stop_event (asyncio.Event): Arrêt externe (optionnel)
+            max_sleep (float): Attente max avant de réexaminer la file
+        """
+        while not (stop_event and stop_event.is_set()):
+            now = self.clock.now()
+            if until is not None and now >= until:
+                break
+
+            entry = self._peek()
+            if entry is None:
+                if until is None and stop_event is None:
+                    break  # Plus rien à surveiller
+                await self.clock.sleep(max_sleep)
+                continue
+
+            due, match_id, version = entry
+            if due > now:
+                wait = due - now
+                if until is not None:
+                    wait = min(wait, until - now)
+                await self.clock.sleep(min(wait, max_sleep) if stop_event else wait)
+                continue
+
+            await self.budget.acquire()
+            # La file a pu changer pendant l'attente du budget (sync, schedule, remove) :
+            # on ne dépile que si la tête est toujours la même entrée, sinon on réexamine
+            if self._peek() != entry:
+                self.budget.refund()
+                continue
+            heapq.heappop(self._heap)
+            match = self.matches[match_id]
+            self.poll_counts[match_id] = self.poll_counts.get(match_id, 0) + 1
+
+            try:
+                match_data = await poll_fn(match)
+            except Exception as e:
+                print(f"      ❌ Erreur scan {match_id} : {e}")
+                match_data = {"status": "UNKNOWN"}
+
+            self.update(match_id, match_data or {"status": "UNKNOWN"})
+
+
+# ============================================================
+# 🧪 HARNAIS DE SIMULATION (horloge simulée)
+# ============================================================
+
+def _simulated_state(match, now):
+    """Etat d'un match synthétique à l'instant `now` (horloge simulée)"""
+    kickoff = kickoff_timestamp(match["heure"], now)
+    elapsed_min = (now - kickoff) / 60
+    data = {**match}
+    if elapsed_min < 0:
+        data["status"] = "UPCOMING"
+    elif elapsed_min > 110:
+        data["status"] = "FINISHED"
+    else:
+        data["status"] = "LIVE"
+        data["game_time"] = f"{int(elapsed_min)}:00"
+        # Le favori encaisse un but à la 30e (scénario "favori mené")
+        trailing = match.get("trailing_after", 999) <= elapsed_min
+        data["score"] = ("0-1" if match["pronostic"] == "V1" else "1-0") if trailing else "0-0"
+        if not trailing and match.get("leading"):
+            data["score"] = "1-0" if match["pronostic"] == "V1" else "0-1"
+    return data
+
+
+SIMULATION_MATCHES = [
+    {"id": "hot", "heure": "12:00", "pronostic": "V1", "trailing_after": 30},
+    {"id": "calm", "heure": "12:00", "pronostic": "V2", "leading": True},
+    {"id": "later", "heure": "14:00", "pronostic": "V1"},
+    {"id": "tonight", "heure": "22:00", "pronostic": "V2"},
+    {"id": "morning", "heure": "08:00", "pronostic": "V1"},
+]
+
+
+def simulate(hours=3.0, max_polls_per_minute=30, matches=SIMULATION_MATCHES):
+    """
+    Déroule quelques heures de surveillance en accéléré (départ à 12:00).
+
+    Les invariants (budget, intervalle des matchs chauds, matchs terminés
+    ou futurs) sont vérifiés par tests/test_polling_scheduler.py.
+
+    Returns:
+        tuple: (scheduler, {match_id: [timestamps des scans]}, timestamp de 12:00)
+    """
+    start = datetime.now().replace(hour=12, minute=0, second=0, microsecond=0)
+    clock = SimulatedClock(start.timestamp())
+    scheduler = PollingScheduler(clock=clock, max_polls_per_minute=max_polls_per_minute)
+    scheduler.sync(matches)
+    polls = {m["id"]: [] for m in matches}
+
+    async def poll(match):
+        polls[match["id"]].append(clock.now())
+        return _simulated_state(match, clock.now())
+
+    asyncio.run(scheduler.run(poll, until=clock.now() + hours * 3600))
+    return scheduler, polls, start.timestamp()
+
+
+def run_simulation(hours=3.0, max_polls_per_minute=30):
+    """Simulation en console : nombre de scans par match"""
+    _, polls, _ = simulate(hours, max_polls_per_minute)
+    print(f"🧪 Simulation {hours}h (budget {max_polls_per_minute}/min)")
+    for m in SIMULATION_MATCHES:
+        print(f"   {m['id']:8s} ({m['heure']}) : {len(polls[m['id']])} scans")
+    return polls
+
+
+if __name__ == "__main__":
+    run_simulation()
@@ -0,0 +1,88 @@
+"""
+monitor/rate_limit.py
+Limiteur de débit (token bucket) et horloges interchangeables.
+
+L'horloge est injectée pour pouvoir dérouler un planning complet en
+accéléré avec SimulatedClock (aucune attente réelle).
+"""
+
+import asyncio
+import time
+
+
+class SystemClock:
+    """Horloge réelle (time.time + asyncio.sleep)"""
+
+    def now(self):
+        return time.time()
+
+    async def sleep(self, seconds):
+        await asyncio.sleep(max(0.0, seconds))
+
+
+class SimulatedClock:
+    """Horloge simulée : sleep() avance le temps instantanément"""
+
+    def __init__(self, start=0.0):
+        self._now = float(start)
+
+    def now(self):
+        return self._now
+
+    def advance(self, seconds):
+        self._now += max(0.0, seconds)
+
+    async def sleep(self, seconds):
+        self.advance(seconds)
+        # Rend la main à la boucle pour garder un ordonnancement réaliste
+        await asyncio.sleep(0)
+
+
+class TokenBucket:
+    """
+    Token bucket classique.
+
+    Args:
+        rate (float): Jetons rechargés par seconde
+        capacity (float): Taille maximale du seau (rafale autorisée)
+        clock: Horloge (SystemClock par défaut)
+    """
+
+    def __init__(self, rate, capacity=None, clock=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self.clock = clock or SystemClock()
+        self.tokens = self.capacity
+        self._last = self.clock.now()
+
+    def _refill(self):
+        now = self.clock.now()
+        elapsed = now - self._last
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+            self._last = now
+
+    def try_acquire(self, tokens=1.0):
+        """Consomme des jetons si disponibles, sans attendre"""
+        self._refill()
+        if self.tokens >= tokens:
+            self.tokens -= tokens
+            return True
+        return False
+
+    def time_until_available(self, tokens=1.0):
+        """Secondes à attendre avant que `tokens` jetons soient disponibles"""
+        self._refill()
+        missing = tokens - self.tokens
+        if missing <= 0:
+            return 0.0
+        return missing / self.rate if self.rate > 0 else float("inf")
+
+    def refund(self, tokens=1.0):
+        """Rend des jetons consommés mais non utilisés"""
+        self.tokens = min(self.capacity, self.tokens + tokens)
+
+    async def acquire(self, tokens=1.0):
+        """Attend (via l'horloge) puis consomme des jetons"""
+        while not self.try_acquire(tokens):
+            await self.clock.sleep(self.time_until_available(tokens))
@@ -0,0 +1,119 @@
+"""
+monitor/replay.py
+Rejoue hors-ligne les payloads archivés à travers parse_api_data et
+BettingAnalyzer, sans navigateur ni pause (vitesse CPU).
+
+Usage :
+    python -m monitor.replay 2025-12-30
+    python -m monitor.replay 2025-12-30 --match 294319975
+"""
+
+import argparse
+import json
+import os
+import time
+
+from .api_parser import parse_api_data
+from .betting_logic import BettingAnalyzer
+from .payload_archive import PayloadArchive
+
+
+def load_match_infos(base_dir, date_str):
+    """
+    Charge les infos de base des favoris du jour (pronostic, cote, favori...).
+
+    Returns:
+        dict: {match_id: match_info}
+    """
+    path = os.path.join(base_dir, date_str, "matchs_tries_favoris.json")
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return {str(m.get("id")): m for m in json.load(f) if m.get("id")}
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def build_match_data(match_info, api_data, ts):
+    """
+    Reconstitue un match_data équivalent à celui produit par le scraper
+    à partir des seules données API (les stats DOM ne sont pas archivées).
+    """
+    is_live = api_data.get("current_time") is not None
+    return {
+        **match_info,
+        "status": "LIVE" if is_live else "UPCOMING",
+        "timestamp": ts,
+        "score": api_data.get("current_score") or "0-0",
+        "game_time": api_data.get("current_time") or "00:00",
+        "half_time_score": {"home": None, "away": None},
+        "stats": {},
+        "live_odds": api_data.get("live_odds", {}),
+        "probabilities": api_data.get("probabilities", {}),
+        "totals": api_data.get("totals", {})
+    }
+
+
+def replay(date_str, match_id=None, base_dir="match", analyzer=None):
+    """
+    Rejoue une journée d'archive.
+
+    Args:
+        date_str (str): Date YYYY-MM-DD
+        match_id (str): Filtre optionnel sur un match
+        base_dir (str): Dossier racine des données
+        analyzer (BettingAnalyzer): Analyseur à utiliser (défaut: neuf)
+
+    Returns:
+        dict: Résumé (payloads, alertes, débit)
+    """
+    archive = PayloadArchive(base_dir=base_dir)
+    analyzer = analyzer or BettingAnalyzer()
+    match_infos = load_match_infos(base_dir, date_str)
+
+    count = 0
+    start = time.perf_counter()
+
+    for record in archive.iter_records(date_str, match_id):
+        info = match_infos.get(record["match_id"], {"id": record["match_id"]})
+        api_data = parse_api_data(record["payload"])
+        match_data = build_match_data(info, api_data, record["ts"])
+
+        features = analyzer.observe(match_data)
+        if match_data["status"] == "LIVE":
+            opportunity = analyzer.calculate_opportunity_score(match_data, features)
+            analyzer.add_alert(match_data, opportunity)
+        count += 1
+
+    elapsed = time.perf_counter() - start
+    summary = {
+        "date": date_str,
+        "payloads": count,
+        "alerts": len(analyzer.get_alerts()),
+        "elapsed_s": elapsed,
+        "payloads_per_s": count / elapsed if elapsed > 0 else 0.0
+    }
+
+    print(f"🔁 Replay {date_str} : {count} payloads en {elapsed:.2f}s "
+          f"({summary['payloads_per_s']:.0f}/s)")
+    print(f"🚨 Alertes générées : {summary['alerts']}")
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay des payloads API archivés")
+    parser.add_argument("date", help="Date YYYY-MM-DD")
+    parser.add_argument("--match", dest="match_id", default=None, help="ID de match")
+    parser.add_argument("--base-dir", default="match")
+    parser.add_argument("--dump-alerts", action="store_true", help="Affiche les alertes en JSON")
+    args = parser.parse_args()
+
+    analyzer = BettingAnalyzer()
+    replay(args.date, args.match_id, args.base_dir, analyzer)
+    if args.dump_alerts:
+        print(json.dumps(analyzer.get_alerts(), indent=4, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
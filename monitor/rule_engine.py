@@ -0,0 +1,742 @@
+"""
+monitor/rule_engine.py
+Moteur de règles déclaratives pour les scénarios de paris.
+
+Les règles (conditions + effets) et leurs seuils sont décrits dans un fichier
+JSON ou YAML (monitor/betting_rules.json par défaut, ou BETTING_RULES_FILE).
+Au chargement, chaque condition est compilée une seule fois :
+- en closure Python pour l'évaluation d'un scan (BettingAnalyzer, API),
+- en expression numpy pour l'évaluation d'un lot (batch_scoring, backtest).
+Le fichier est relu dès qu'il change (rechargement à chaud) ; un fichier
+invalide est signalé et les règles précédentes restent actives.
+
+Format :
+    {
+      "params": {"MIN_MINUTE_TRAILING": 45, ...},
+      "rulesets": {
+        "opportunite": {
+          "outputs": {"score": 0, "niveau": "AUCUNE", "raisons": [], ...},
+          "variables": {"minutes": "Minute de jeu", ...},
+          "rules": [
+            {"name": "favori_perdant_tardif", "group": "scenario",
+             "when": "ecart == 1 and minutes >= MIN_MINUTE_LATE_GAME",
+             "set": {"niveau": "🔴 ALERTE ROUGE", "action_suggeree": "Cote : {cote_live}"},
+             "add": {"score": 10}, "clamp": {"score": [0, 100]},
+             "default": {"action_suggeree": "..."},
+             "append": {"raisons": "..."}}
+          ]
+        }
+      }
+    }
+
+Expressions : comparaisons, and/or/not, + - * /, `a if c else b`, abs/min/max,
+`out.<sortie>` (valeur courante d'une sortie). Une valeur absente (None, NaN)
+rend toute comparaison fausse. Les chaînes de set/default/append sont des
+gabarits dont les champs {...} sont eux aussi des expressions ;
+{"expr": "..."} donne une valeur calculée. Dans un même `group`, seule la
+première règle vraie s'applique. Effets appliqués dans l'ordre :
+set, add, clamp, default, append.
+"""
+
+import ast
+import json
+import operator
+import os
+import string
+import time
+from functools import reduce
+
+try:
+    import numpy as np
+except ImportError:  # Evaluation par lot indisponible
+    np = None
+
+try:
+    import yaml
+except ImportError:  # Règles YAML indisponibles (JSON uniquement)
+    yaml = None
+
+
+DEFAULT_RULES_PATH = os.getenv(
+    "BETTING_RULES_FILE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "betting_rules.json")
+)
+
+_COMPARE = {
+    ast.Eq: operator.eq, ast.NotEq: operator.ne,
+    ast.Lt: operator.lt, ast.LtE: operator.le,
+    ast.Gt: operator.gt, ast.GtE: operator.ge,
+}
+_ARITH = {ast.Add: operator.add, ast.Sub: operator.sub,
+          ast.Mult: operator.mul, ast.Div: operator.truediv}
+_FUNCS = {"abs": abs, "min": min, "max": max}
+_VECTOR_FUNCS = {
+    "abs": lambda x: np.abs(x),
+    "min": lambda *xs: reduce(np.fmin, xs),
+    "max": lambda *xs: reduce(np.fmax, xs),
+}
+_EFFECTS = ("set", "add", "clamp", "default", "append")
+
+
+class RuleError(ValueError):
+    """Fichier de règles invalide (expression, variable ou paramètre inconnu)"""
+
+
+# ============================================================
+# 🧮 EXPRESSIONS
+# ============================================================
+
+def _is_missing(value):
+    return value is None or (isinstance(value, float) and value != value)
+
+
+def _as_mask(value, n):
+    """Valeur vectorielle -> masque booléen (NaN et None sont faux)"""
+    arr = np.asarray(value)
+    if arr.dtype == bool:
+        return np.broadcast_to(arr, (n,))
+    if arr.dtype.kind == "f":
+        return np.broadcast_to((arr == arr) & (arr != 0), (n,))
+    if arr.dtype == object:
+        return np.broadcast_to(np.array([bool(v) and not _is_missing(v) for v in arr.ravel()],
+                                        dtype=bool).reshape(arr.shape), (n,))
+    return np.broadcast_to(arr.astype(bool), (n,))
+
+
+def _py(value):
+    """Scalaire numpy -> Python (NaN -> None), pour le formatage des gabarits"""
+    if np is not None:
+        if isinstance(value, np.floating):
+            value = float(value)
+        elif isinstance(value, np.integer):
+            return int(value)
+        elif isinstance(value, np.bool_):
+            return bool(value)
+    return None if _is_missing(value) else value
+
+
+class Expression:
+    """Expression compilée (chemin scalaire et chemin vectoriel)"""
+
+    def __init__(self, source, params, names, outputs):
+        """
+        Args:
+            source (str): Texte de l'expression
+            params (dict): Paramètres (remplacés par leur valeur à la compilation)
+            names (set): Variables autorisées (lues dans le contexte)
+            outputs (set): Sorties accessibles via out.<nom>
+        """
+        self.source = source
+        try:
+            tree = ast.parse(str(source).strip(), mode="eval")
+        except SyntaxError as e:
+            raise RuleError(f"Expression invalide '{source}' : {e.msg}")
+        self._params, self._names, self._outputs = params, names, outputs
+        self.scalar = self._scalar(tree.body)
+        self.vector = self._vector(tree.body) if np is not None else None
+
+    def _check_name(self, node):
+        if node.id in self._params or node.id in self._names:
+            return
+        raise RuleError(f"Nom inconnu '{node.id}' dans '{self.source}'")
+
+    def _check_output(self, node):
+        if isinstance(node.value, ast.Name) and node.value.id == "out" and node.attr in self._outputs:
+            return node.attr
+        raise RuleError(f"Attribut non autorisé dans '{self.source}' (seul out.<sortie> l'est)")
+
+    def _unsupported(self, node):
+        raise RuleError(f"Construction non autorisée ({type(node).__name__}) dans '{self.source}'")
+
+    # --- Chemin scalaire : closures (ctx, out) -> valeur ---
+
+    def _scalar(self, node):
+        if isinstance(node, ast.Constant):
+            value = node.value
+            return lambda ctx, out: value
+
+        if isinstance(node, ast.Name):
+            self._check_name(node)
+            if node.id in self._params:
+                value = self._params[node.id]
+                return lambda ctx, out: value
+            key = node.id
+            return lambda ctx, out: ctx.get(key)
+
+        if isinstance(node, ast.Attribute):
+            field = self._check_output(node)
+            return lambda ctx, out: out.get(field)
+
+        if isinstance(node, ast.BoolOp):
+            parts = [self._scalar(v) for v in node.values]
+            if isinstance(node.op, ast.And):
+                def and_(ctx, out):
+                    for part in parts:
+                        value = part(ctx, out)
+                        if not value or _is_missing(value):
+                            return False
+                    return True
+                return and_
+
+            def or_(ctx, out):
+                for part in parts:
+                    value = part(ctx, out)
+                    if value and not _is_missing(value):
+                        return True
+                return False
+            return or_
+
+        if isinstance(node, ast.UnaryOp):
+            operand = self._scalar(node.operand)
+            if isinstance(node.op, ast.Not):
+                def not_(ctx, out):
+                    value = operand(ctx, out)
+                    return not value or _is_missing(value)
+                return not_
+            if isinstance(node.op, ast.USub):
+                def neg(ctx, out):
+                    value = operand(ctx, out)
+                    return None if _is_missing(value) else -value
+                return neg
+            self._unsupported(node.op)
+
+        if isinstance(node, ast.BinOp) and type(node.op) in _ARITH:
+            op = _ARITH[type(node.op)]
+            left, right = self._scalar(node.left), self._scalar(node.right)
+
+            def binop(ctx, out):
+                a, b = left(ctx, out), right(ctx, out)
+                if _is_missing(a) or _is_missing(b):
+                    return None
+                try:
+                    return op(a, b)
+                except (ZeroDivisionError, TypeError):
+                    return None
+            return binop
+
+        if isinstance(node, ast.Compare):
+            left = self._scalar(node.left)
+            chain = [(_COMPARE[type(op)], self._scalar(comp))
+                     for op, comp in zip(node.ops, node.comparators)
+                     if type(op) in _COMPARE]
+            if len(chain) != len(node.ops):
+                self._unsupported(node.ops[0])
+
+            def compare(ctx, out):
+                a = left(ctx, out)
+                for op, right in chain:
+                    b = right(ctx, out)
+                    if _is_missing(a) or _is_missing(b):
+                        return False
+                    try:
+                        if not op(a, b):
+                            return False
+                    except TypeError:
+                        return False
+                    a = b
+                return True
+            return compare
+
+        if isinstance(node, ast.IfExp):
+            test, body, orelse = self._scalar(node.test), self._scalar(node.body), self._scalar(node.orelse)
+
+            def ifexp(ctx, out):
+                value = test(ctx, out)
+                return body(ctx, out) if value and not _is_missing(value) else orelse(ctx, out)
+            return ifexp
+
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) \
+                and node.func.id in _FUNCS and node.args and not node.keywords:
+            func = _FUNCS[node.func.id]
+            args = [self._scalar(a) for a in node.args]
+
+            def call(ctx, out):
+                values = [a(ctx, out) for a in args]
+                if any(_is_missing(v) for v in values):
+                    return None
+                return func(*values)
+            return call
+
+        self._unsupported(node)
+
+    # --- Chemin vectoriel : fonctions (cols, out, n) -> tableau ou scalaire ---
+
+    def _vector(self, node):
+        if isinstance(node, ast.Constant):
+            value = node.value
+            return lambda cols, out, n: value
+
+        if isinstance(node, ast.Name):
+            if node.id in self._params:
+                value = self._params[node.id]
+                return lambda cols, out, n: value
+            key = node.id
+
+            def column(cols, out, n):
+                arr = cols.get(key)
+                return np.full(n, np.nan) if arr is None else arr
+            return column
+
+        if isinstance(node, ast.Attribute):
+            field = self._check_output(node)
+            return lambda cols, out, n: out[field]
+
+        if isinstance(node, ast.BoolOp):
+            parts = [self._vector(v) for v in node.values]
+            combine = np.logical_and if isinstance(node.op, ast.And) else np.logical_or
+
+            def boolop(cols, out, n):
+                return reduce(combine, (_as_mask(p(cols, out, n), n) for p in parts))
+            return boolop
+
+        if isinstance(node, ast.UnaryOp):
+            operand = self._vector(node.operand)
+            if isinstance(node.op, ast.Not):
+                return lambda cols, out, n: ~_as_mask(operand(cols, out, n), n)
+            return lambda cols, out, n: -np.asarray(operand(cols, out, n), dtype=float)
+
+        if isinstance(node, ast.BinOp):
+            op = _ARITH[type(node.op)]
+            left, right = self._vector(node.left), self._vector(node.right)
+
+            def binop(cols, out, n):
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    return op(left(cols, out, n), right(cols, out, n))
+            return binop
+
+        if isinstance(node, ast.Compare):
+            left = self._vector(node.left)
+            chain = [(_COMPARE[type(op)], self._vector(comp))
+                     for op, comp in zip(node.ops, node.comparators)]
+
+            def compare(cols, out, n):
+                a = left(cols, out, n)
+                mask = np.ones(n, dtype=bool)
+                for op, right in chain:
+                    b = right(cols, out, n)
+                    with np.errstate(invalid="ignore"):
+                        mask &= _as_mask(op(a, b), n)
+                    a = b
+                return mask
+            return compare
+
+        if isinstance(node, ast.IfExp):
+            test, body, orelse = self._vector(node.test), self._vector(node.body), self._vector(node.orelse)
+            return lambda cols, out, n: np.where(
+                _as_mask(test(cols, out, n), n), body(cols, out, n), orelse(cols, out, n)
+            )
+
+        # ast.Call (déjà validé par le chemin scalaire)
+        func = _VECTOR_FUNCS[node.func.id]
+        args = [self._vector(a) for a in node.args]
+        return lambda cols, out, n: func(*(a(cols, out, n) for a in args))
+
+
+class Value:
+    """Valeur d'un effet : constante, gabarit str.format ou {"expr": ...}"""
+
+    def __init__(self, spec, params, names, outputs):
+        self.constant = None
+        self.expr = None
+        self.fields = []
+        self.fmt = None
+
+        if isinstance(spec, dict) and "expr" in spec:
+            self.expr = Expression(spec["expr"], params, names, outputs)
+        elif isinstance(spec, str) and "{" in spec:
+            parts = []
+            try:
+                parsed = list(string.Formatter().parse(spec))
+            except ValueError as e:
+                raise RuleError(f"Gabarit invalide '{spec}' : {e}")
+            for literal, field, fmt_spec, conversion in parsed:
+                parts.append(literal.replace("{", "{{").replace("}", "}}"))
+                if field is None:
+                    continue
+                parts.append("{%d%s%s}" % (
+                    len(self.fields),
+                    f"!{conversion}" if conversion else "",
+                    f":{fmt_spec}" if fmt_spec else "",
+                ))
+                self.fields.append(Expression(field, params, names, outputs))
+            self.fmt = "".join(parts)
+        else:
+            self.constant = spec
+
+    def scalar(self, ctx, out):
+        if self.expr is not None:
+            return self.expr.scalar(ctx, out)
+        if self.fmt is not None:
+            return self.fmt.format(*(f.scalar(ctx, out) for f in self.fields))
+        return self.constant
+
+    def vector(self, cols, out, n, mask):
+        """Valeurs pour les lignes de `mask` (tableau de longueur n ou scalaire)"""
+        if self.expr is not None:
+            return np.broadcast_to(self.expr.vector(cols, out, n), (n,))
+        if self.fmt is not None:
+            # Formatage uniquement sur les lignes concernées
+            columns = [np.broadcast_to(np.asarray(f.vector(cols, out, n), dtype=object), (n,))
+                       for f in self.fields]
+            result = np.full(n, None, dtype=object)
+            for i in np.flatnonzero(mask):
+                result[i] = self.fmt.format(*(_py(c[i]) for c in columns))
+            return result
+        return self.constant
+
+
+# ============================================================
+# 📜 REGLES
+# ============================================================
+
+class Rule:
+    """Règle compilée : condition + effets"""
+
+    __slots__ = ("name", "group", "when", "set", "add", "clamp", "default", "append")
+
+    def __init__(self, spec, params, names, outputs):
+        unknown = set(spec) - {"name", "group", "when", "description", *_EFFECTS}
+        if unknown:
+            raise RuleError(f"Clés inconnues {sorted(unknown)} dans la règle {spec.get('name')}")
+        self.name = spec.get("name", "?")
+        self.group = spec.get("group")
+        self.when = Expression(spec.get("when", "True"), params, names, outputs)
+
+        def values(key, build):
+            effects = spec.get(key) or {}
+            bad = set(effects) - set(outputs)
+            if bad:
+                raise RuleError(f"Sorties inconnues {sorted(bad)} dans la règle {self.name}")
+            return [(field, build(v)) for field, v in effects.items()]
+
+        value = lambda v: Value(v, params, names, outputs)
+        expression = lambda v: Expression(v, params, names, outputs)
+        bound = lambda v: None if v is None else expression(v)
+        self.set = values("set", value)
+        self.add = values("add", expression)
+        self.clamp = values("clamp", lambda v: (bound(v[0]), bound(v[1])))
+        self.default = values("default", value)
+        self.append = values("append", value)
+
+
+class RuleSet:
+    """Ensemble ordonné de règles compilées partageant un schéma de sorties"""
+
+    def __init__(self, name, spec, params):
+        """
+        Args:
+            name (str): Nom de l'ensemble (ex: "opportunite")
+            spec (dict): Section du fichier (outputs, variables, rules)
+            params (dict): Paramètres effectifs
+        """
+        self.name = name
+        self.outputs = dict(spec.get("outputs") or {})
+        self.variables = dict(spec.get("variables") or {})
+        names, outputs = set(self.variables), set(self.outputs)
+        self.rules = [Rule(r, params, names, outputs) for r in spec.get("rules", [])]
+
+    def new_result(self):
+        return {k: (list(v) if isinstance(v, list) else v) for k, v in self.outputs.items()}
+
+    @staticmethod
+    def _apply(rule, ctx, out):
+        for field, value in rule.set:
+            out[field] = value.scalar(ctx, out)
+        for field, expr in rule.add:
+            delta = expr.scalar(ctx, out)
+            if delta is not None:
+                out[field] = (out.get(field) or 0) + delta
+        for field, (low, high) in rule.clamp:
+            if low is not None:
+                out[field] = max(low.scalar(ctx, out), out[field])
+            if high is not None:
+                out[field] = min(high.scalar(ctx, out), out[field])
+        for field, value in rule.default:
+            if out.get(field) is None:
+                out[field] = value.scalar(ctx, out)
+        for field, value in rule.append:
+            out.setdefault(field, []).append(value.scalar(ctx, out))
+
+    def _fired(self, ctx, out):
+        taken = set()
+        for rule in self.rules:
+            if rule.group is not None and rule.group in taken:
+                continue
+            if not rule.when.scalar(ctx, out):
+                continue
+            if rule.group is not None:
+                taken.add(rule.group)
+            yield rule
+
+    def evaluate(self, ctx, result=None):
+        """
+        Applique les règles à un contexte (un scan) en cumulant leurs effets.
+
+        Args:
+            ctx (dict): Variables (absentes = None)
+            result (dict): Résultat à compléter (défaut : sorties initiales)
+
+        Returns:
+            dict: Résultat
+        """
+        out = self.new_result() if result is None else result
+        for rule in self._fired(ctx, out):
+            self._apply(rule, ctx, out)
+        return out
+
+    def fire(self, ctx):
+        """
+        Un résultat séparé par règle déclenchée (ex: alertes d'activité de l'API).
+
+        Returns:
+            list: [{"rule": nom, **sorties}, ...]
+        """
+        results = []
+        out = self.new_result()
+        for rule in self._fired(ctx, out):
+            single = self.new_result()
+            self._apply(rule, ctx, single)
+            results.append({"rule": rule.name, **single})
+        return results
+
+    def evaluate_batch(self, cols, mask=None):
+        """
+        Evaluation vectorisée sur des colonnes numpy (valeur absente = NaN).
+
+        Les sorties de type liste (append) ne sont pas produites.
+
+        Args:
+            cols (dict): Variables -> tableaux de même longueur
+            mask (ndarray): Lignes à évaluer (défaut : toutes)
+
+        Returns:
+            dict: Sorties -> tableaux (numériques ou objets)
+        """
+        if np is None:
+            raise RuleError("numpy est requis pour l'évaluation par lot")
+        n = len(mask) if mask is not None else len(next(iter(cols.values())))
+        active = np.ones(n, dtype=bool) if mask is None else np.asarray(mask, dtype=bool)
+
+        out = {}
+        for field, default in self.outputs.items():
+            if isinstance(default, list):
+                continue
+            if isinstance(default, (int, float)) and not isinstance(default, bool):
+                out[field] = np.full(n, default)
+            else:
+                out[field] = np.full(n, default, dtype=object)
+
+        taken = {}
+        for rule in self.rules:
+            rows = active & _as_mask(rule.when.vector(cols, out, n), n)
+            if rule.group is not None:
+                group_taken = taken.setdefault(rule.group, np.zeros(n, dtype=bool))
+                rows &= ~group_taken
+                group_taken |= rows
+            if not rows.any():
+                continue
+
+            for field, value in rule.set:
+                if field not in out:
+                    continue
+                values = value.vector(cols, out, n, rows)
+                if isinstance(values, np.ndarray):
+                    out[field][rows] = values[rows]
+                else:
+                    out[field][rows] = values
+            for field, expr in rule.add:
+                delta = np.broadcast_to(expr.vector(cols, out, n), (n,))
+                out[field] = np.where(rows, out[field] + delta, out[field])
+            for field, (low, high) in rule.clamp:
+                clipped = out[field]
+                if low is not None:
+                    clipped = np.maximum(clipped, low.vector(cols, out, n))
+                if high is not None:
+                    clipped = np.minimum(clipped, high.vector(cols, out, n))
+                out[field] = np.where(rows, clipped, out[field])
+            for field, value in rule.default:
+                if field not in out:
+                    continue
+                empty = rows & np.array([v is None for v in out[field]], dtype=bool)
+                if empty.any():
+                    values = value.vector(cols, out, n, empty)
+                    out[field][empty] = values[empty] if isinstance(values, np.ndarray) else values
+        return out
+
+
+# ============================================================
+# 🔄 CHARGEMENT ET RECHARGEMENT A CHAUD
+# ============================================================
+
+def load_rules_file(path):
+    """
+    Lit un fichier de règles (.json, .yaml, .yml).
+
+    Returns:
+        dict: Contenu brut
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith((".yaml", ".yml")):
+            if yaml is None:
+                raise RuleError("PyYAML est requis pour les règles YAML")
+            return yaml.safe_load(f) or {}
+        return json.load(f)
+
+
+def compile_rules(spec, overrides=None):
+    """
+    Compile toutes les sections d'un fichier de règles.
+
+    Args:
+        spec (dict): Contenu du fichier
+        overrides (dict): Paramètres remplaçant ceux du fichier
+
+    Returns:
+        tuple: (params effectifs, {nom: RuleSet})
+    """
+    params = dict(spec.get("params") or {})
+    unknown = set(overrides or {}) - set(params)
+    if unknown:
+        raise RuleError(f"Paramètres inconnus : {sorted(unknown)}")
+    params.update(overrides or {})
+    rulesets = {name: RuleSet(name, section, params)
+                for name, section in (spec.get("rulesets") or {}).items()}
+    return params, rulesets
+
+
+class RuleEngine:
+    """Règles compilées depuis un fichier, rechargées quand il change"""
+
+    def __init__(self, path=None, params=None, check_every=2.0):
+        """
+        Args:
+            path (str): Fichier de règles (défaut : DEFAULT_RULES_PATH)
+            params (dict): Paramètres remplaçant ceux du fichier (ex: backtest)
+            check_every (float): Vérification de la date du fichier au plus toutes les N s
+
+        Raises:
+            RuleError: Si le fichier initial est invalide
+        """
+        self.path = path or DEFAULT_RULES_PATH
+        self.overrides = dict(params or {})
+        self.check_every = check_every
+        self.version = 0
+        self._variants = {}
+        self._mtime = None
+        self._last_check = 0.0
+        self._load(os.path.getmtime(self.path))
+
+    def _load(self, mtime):
+        spec = load_rules_file(self.path)
+        self.params, self.rulesets = compile_rules(spec, self.overrides)
+        self._spec = spec
+        self._variants = {}
+        self._mtime = mtime
+        self.version += 1
+
+    def maybe_reload(self):
+        """
+        Recompile les règles si le fichier a changé (vérification espacée).
+
+        Returns:
+            bool: True si de nouvelles règles ont été chargées
+        """
+        now = time.monotonic()
+        if now - self._last_check < self.check_every:
+            return False
+        self._last_check = now
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return False
+        if mtime == self._mtime:
+            return False
+        try:
+            self._load(mtime)
+        except Exception as e:
+            self._mtime = mtime  # Pas de nouvel avertissement avant la prochaine modification
+            print(f"⚠️ Règles invalides, anciennes règles conservées : {e}")
+            return False
+        print(f"🔄 Règles rechargées ({self.path}, v{self.version})")
+        return True
+
+    def ruleset(self, name, params=None):
+        """
+        Ensemble de règles compilé (rechargé si le fichier a changé).
+
+        Args:
+            name (str): Section du fichier
+            params (dict): Paramètres ponctuels (ex: seuils passés à l'API) ;
+                           chaque combinaison est compilée une fois puis gardée
+
+        Returns:
+            RuleSet
+        """
+        self.maybe_reload()
+        if not params:
+            return self.rulesets[name]
+        key = (name, tuple(sorted(params.items())))
+        ruleset = self._variants.get(key)
+        if ruleset is None:
+            merged = {**self.overrides, **params}
+            ruleset = compile_rules(self._spec, merged)[1][name]
+            if len(self._variants) >= 64:
+                self._variants.clear()
+            self._variants[key] = ruleset
+        return ruleset
+
+
+_default_engine = None
+
+
+def default_engine():
+    """Moteur partagé sur le fichier par défaut (créé au premier appel)"""
+    global _default_engine
+    if _default_engine is None:
+        _default_engine = RuleEngine()
+    return _default_engine
+
+
+def opportunity_context(home_score, away_score, minutes, pronostic, cote_init=None,
+                        odd_v1=None, odd_v2=None, att_home=None, att_away=None,
+                        favori="Favori", score_str=None, features=None):
+    """
+    Variables de l'ensemble "opportunite", vues du favori.
+
+    Construit de la même façon par le monitor (scan) et l'API (ligne en base).
+
+    Returns:
+        dict or None: Contexte (None si le pronostic n'est ni V1 ni V2)
+    """
+    if pronostic == "V1":
+        fav, adv = 0, 1
+        score_fav, score_adv, cote_live = home_score, away_score, odd_v1
+        att_fav, att_adv = att_home, att_away
+    elif pronostic == "V2":
+        fav, adv = 1, 0
+        score_fav, score_adv, cote_live = away_score, home_score, odd_v2
+        att_fav, att_adv = att_away, att_home
+    else:
+        return None
+
+    ctx = {
+        "minutes": minutes,
+        "score_fav": score_fav,
+        "score_adv": score_adv,
+        "ecart": score_adv - score_fav,
+        "cote_live": cote_live,
+        "cote_init": cote_init,
+        "favori": favori,
+        "pronostic": pronostic,
+        "score_str": score_str if score_str is not None else f"{home_score}-{away_score}",
+        "att_fav": att_fav,
+        "att_adv": att_adv,
+    }
+    features = features or {}
+    danger = features.get("danger_per_min")
+    ctx["danger_fav"] = danger[fav] if danger else None
+    ctx["danger_adv"] = danger[adv] if danger else None
+    ctx["window_minutes"] = features.get("window_minutes")
+    ctx["minutes_since_goal"] = features.get("minutes_since_goal")
+    ctx["odd_fav_velocity"] = features.get("odd_v1_velocity" if fav == 0 else "odd_v2_velocity")
+    return ctx
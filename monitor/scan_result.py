@@ -0,0 +1,69 @@
+"""
+monitor/scan_result.py
+Traitement d'un scan de match, commun à 04_monitor_favoris.py et au démon :
+analyse -> alerte -> historique -> dashboard.
+"""
+
+from .history_log import make_snapshot
+
+
+ALERT_MIN_SCORE = 50  # Score d'opportunité à partir duquel on alerte
+
+
+def append_to_history(match_data, history, db=None, date_str=None):
+    """
+    Ajoute une capture (snapshot) du match dans l'historique.
+
+    Args:
+        match_data (dict): Résultat du scan
+        history (HistoryWriter): Historique JSONL
+        db (SQLiteStore): Base optionnelle (snapshots)
+        date_str (str): Date YYYY-MM-DD (base SQLite)
+    """
+    snapshot = make_snapshot(match_data)
+    history.append(snapshot)
+    if db is not None:
+        db.add("snapshots", date_str, [snapshot])
+
+
+def process_scan_result(match_data, analyzer, store, history, db=None, date_str=None, verbose=False):
+    """
+    Traite le résultat d'un scan : analyse, alertes, historique, dashboard.
+
+    Args:
+        match_data (dict): Résultat de MatchScraper.extract_match_data (enrichi en place)
+        analyzer (BettingAnalyzer): Analyseur (état glissant + alertes)
+        store (DashboardStore): Dashboard en mémoire (écriture groupée)
+        history (HistoryWriter): Historique JSONL
+        db (SQLiteStore): Base optionnelle (snapshots)
+        date_str (str): Date YYYY-MM-DD (base SQLite)
+        verbose (bool): Trace console de l'historisation
+
+    Returns:
+        dict: match_data
+    """
+    # 1. ANALYSE (Seulement si LIVE)
+    if match_data.get("status") == "LIVE":
+        features = analyzer.observe(match_data)
+        opportunity = analyzer.calculate_opportunity_score(match_data, features)
+        match_data["opportunity"] = opportunity
+
+        # Gestion Alertes
+        if opportunity.get("score", 0) >= ALERT_MIN_SCORE:
+            alert_msg = analyzer.generate_alert_message(match_data, opportunity)
+            if alert_msg:
+                print(alert_msg)  # Affiche en console
+                analyzer.add_alert(match_data, opportunity)  # Ajoute au JSON
+    else:
+        analyzer.observe(match_data)  # Oublie l'état des matchs terminés
+        match_data["opportunity"] = {}
+
+    # 2. HISTORIQUE
+    if match_data.get("status") != "NOT_READY":
+        append_to_history(match_data, history, db, date_str)
+        if verbose:
+            print(f"      📚 Historisé")
+
+    # 3. DASHBOARD + ALERTES (écriture groupée, au plus toutes les N secondes)
+    store.update_match(match_data)
+    return match_data
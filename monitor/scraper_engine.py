@@ -2,31 +2,141 @@
 monitor/scraper_engine.py
 Module contenant toute la logique technique de scraping.
 Gère Playwright, popups, extraction HTML et parsing API.
+
+Benchmark extracteur JS / locators + BeautifulSoup (page de match LIVE) :
+    python -m monitor.scraper_engine /fr/live/football/.../294319975-... --runs 10
 """
 
+import argparse
 import asyncio
+import json
 import time
 from datetime import datetime
 from playwright.async_api import async_playwright
 from bs4 import BeautifulSoup
 
+from . import api_parser
+
+
+# Extracteur DOM injecté : score, chrono, score MT, statut et stats en un seul
+# aller-retour CDP. Reproduit les sélecteurs des méthodes Python ci-dessous.
+LIVE_SNAPSHOT_JS = """
+() => {
+    const isVisible = (el) => !!el && !!(el.offsetWidth || el.offsetHeight || el.getClientRects().length);
+    // Equivalent de BeautifulSoup.get_text(strip=True)
+    const text = (el) => {
+        if (!el) return "";
+        const walker = document.createTreeWalker(el, NodeFilter.SHOW_TEXT);
+        const parts = [];
+        while (walker.nextNode()) {
+            const t = walker.currentNode.nodeValue.trim();
+            if (t) parts.push(t);
+        }
+        return parts.join("");
+    };
+
+    const snapshot = {
+        status: "UNKNOWN",
+        score: {home: "0", away: "0", time: "00:00"},
+        half_time_score: {home: null, away: null},
+        stats: {}
+    };
+
+    if (isVisible(document.querySelector(".game-over-loaders-progress"))) snapshot.status = "FINISHED";
+    else if (isVisible(document.querySelector(".scoreboard-countdown"))) snapshot.status = "UPCOMING";
+    else if (isVisible(document.querySelector(".ui-game-timer"))) snapshot.status = "LIVE";
+
+    const scores = document.querySelectorAll(".scoreboard-scores__score");
+    if (scores.length >= 2) {
+        snapshot.score.home = scores[0].innerText.trim();
+        snapshot.score.away = scores[1].innerText.trim();
+    }
+    const timer = document.querySelector(".ui-game-timer__time");
+    if (isVisible(timer)) snapshot.score.time = timer.innerText;
+
+    for (const row of document.querySelectorAll(".scoreboard-table-row")) {
+        if (row.innerText.includes("Mi-temps 1")) {
+            const cells = row.querySelectorAll(".scoreboard-table-cell");
+            if (cells.length >= 6) {
+                snapshot.half_time_score.home = text(cells[4]);
+                snapshot.half_time_score.away = text(cells[5]);
+            }
+            break;
+        }
+    }
+
+    const body = document.querySelector(".scoreboard-stats__body");
+    if (isVisible(body)) {
+        for (const item of body.querySelectorAll(".scoreboard-list__item")) {
+            const label = item.querySelector(".scoreboard-stats-table-view-name__label");
+            const v1 = item.querySelector(".scoreboard-stats-value--team-1");
+            const v2 = item.querySelector(".scoreboard-stats-value--team-2");
+            if (label && v1 && v2) {
+                snapshot.stats[text(label)] = {
+                    home: text(v1).replace(/%/g, ""),
+                    away: text(v2).replace(/%/g, "")
+                };
+            }
+        }
+    }
+    return snapshot;
+}
+"""
+
+
+class _CountingProxy:
+    """
+    Proxy de page/locator Playwright qui compte les appels asynchrones.
+    Utilisé uniquement par le benchmark pour mesurer les allers-retours CDP.
+    """
+
+    def __init__(self, target, counter):
+        self._target = target
+        self._counter = counter
+
+    def _wrap(self, value):
+        if isinstance(value, list):
+            return [self._wrap(v) for v in value]
+        if type(value).__name__ == "Locator":
+            return _CountingProxy(value, self._counter)
+        return value
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        if not callable(attr):
+            return self._wrap(attr)
+
+        def call(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            if asyncio.iscoroutine(result):
+                async def counted():
+                    self._counter["round_trips"] += 1
+                    return self._wrap(await result)
+                return counted()
+            return self._wrap(result)
+
+        return call
+
 
 class MatchScraper:
     """Moteur de scraping pour extraire les données de matchs sur 1xbet"""
     
-    def __init__(self, base_url="https://1xbet.cm", headless=False):
+    def __init__(self, base_url="https://1xbet.cm", headless=False, archive=None):
         """
         Initialise le scraper.
         
         Args:
             base_url (str): URL de base du site
             headless (bool): Mode sans interface graphique
+            archive (PayloadArchive): Archive optionnelle des payloads API bruts
         """
         self.base_url = base_url
         self.headless = headless
+        self.archive = archive
         self.browser = None
         self.context = None
         self.page = None
+        self.use_js_extractor = True
     
     async def start(self):
         """Initialise et démarre le navigateur Chromium"""
@@ -260,6 +370,83 @@ class MatchScraper:
         
         return stats
     
+    async def extract_live_snapshot(self, page):
+        """
+        Extrait score, chrono, score MT, statut et stats en un seul appel
+        page.evaluate (un aller-retour CDP au lieu d'une dizaine).
+        
+        Args:
+            page: Instance de la page Playwright
+            
+        Returns:
+            dict or None: {"status", "score", "half_time_score", "stats"}
+                          ou None si l'évaluation JS échoue
+        """
+        try:
+            snapshot = await page.evaluate(LIVE_SNAPSHOT_JS)
+            if isinstance(snapshot, dict) and "score" in snapshot:
+                return snapshot
+        except Exception as e:
+            print(f"      ⚠️ Extracteur JS indisponible ({e}), fallback DOM")
+        return None
+    
+    async def _extract_live_snapshot_legacy(self, page, status=None):
+        """
+        Chemin historique (locators + BeautifulSoup), conservé en fallback.
+        
+        Args:
+            page: Instance de la page Playwright
+            status (str): Statut déjà connu (évite les allers-retours de determine_match_status)
+            
+        Returns:
+            dict: Même structure que extract_live_snapshot
+        """
+        return {
+            "status": status or await self.determine_match_status(page),
+            "score": await self.extract_current_score_and_time(page),
+            "half_time_score": await self.get_half_time_score(page),
+            "stats": await self.extract_detailed_stats(page)
+        }
+    
+    async def benchmark_live_extraction(self, page=None, runs=5):
+        """
+        Compare les allers-retours CDP et la latence par match entre
+        l'extracteur JS et le chemin locators + BeautifulSoup.
+        A lancer sur une page de match LIVE déjà chargée.
+        
+        Args:
+            page: Instance de la page Playwright (défaut: self.page)
+            runs (int): Nombre de mesures par méthode
+            
+        Returns:
+            dict: {"js": {...}, "legacy": {...}} avec round_trips et latence (ms)
+        """
+        page = page or self.page
+        report = {}
+        
+        for name in ("js", "legacy"):
+            counter = {"round_trips": 0}
+            proxy = _CountingProxy(page, counter)
+            timings = []
+            for _ in range(runs):
+                start = time.perf_counter()
+                if name == "js":
+                    await self.extract_live_snapshot(proxy)
+                else:
+                    await self._extract_live_snapshot_legacy(proxy)
+                timings.append((time.perf_counter() - start) * 1000)
+            
+            timings.sort()
+            report[name] = {
+                "round_trips": counter["round_trips"] / runs,
+                "latency_ms_median": timings[len(timings) // 2],
+                "latency_ms_max": timings[-1]
+            }
+            print(f"      ⏱️ {name:6s} : {report[name]['round_trips']:.0f} allers-retours, "
+                  f"{report[name]['latency_ms_median']:.1f} ms (médiane)")
+        
+        return report
+    
     def organize_totals(self, raw_list):
         """
         Organise les totaux de buts par seuil.
@@ -268,7 +455,7 @@ class MatchScraper:
             raw_list (list): Liste brute de totaux
             
         Returns:
-            list: Liste organisée [{"Seuil": 2.5, "Plus": 1.80, "Moins": 2.10}, ...]
+            TotalsLine: Liste organisée [{"Seuil": 2.5, "Plus": 1.80, "Moins": 2.10}, ...]
         """
         mapped = {}
         for item in raw_list:
@@ -289,60 +476,12 @@ class MatchScraper:
                 "Moins": mapped[threshold]["Moins"]
             })
         
-        return sorted_result
-    
-    def process_event_item(self, item, info, raw_totals_global, 
-                          raw_totals_t1, raw_totals_t2):
-        """
-        Traite un élément d'événement et extrait les cotes/totaux.
-        
-        Args:
-            item (dict): Item d'événement de l'API
-            info (dict): Objet info à enrichir
-            raw_totals_global (list): Liste des totaux globaux
-            raw_totals_t1 (list): Liste des totaux équipe 1
-            raw_totals_t2 (list): Liste des totaux équipe 2
-        """
-        if not isinstance(item, dict):
-            return
-        
-        t = item.get("T")  # Type d'événement
-        c = item.get("C")  # Cote
-        p = item.get("P")  # Paramètre (seuil pour les totaux)
-        
-        if t is None or c is None:
-            return
-        
-        # Mapping des types d'événements
-        event_mapping = {
-            1: ("live_odds", "V1"),
-            2: ("live_odds", "X"),
-            3: ("live_odds", "V2"),
-            180: ("live_odds", "BTS_Oui"),
-            181: ("live_odds", "BTS_Non")
-        }
-        
-        if t in event_mapping:
-            category, key = event_mapping[t]
-            info[category][key] = c
-        
-        # Totaux de buts
-        elif t == 9 and p is not None:
-            raw_totals_global.append({"P": p, "Type": "Plus", "Cote": c})
-        elif t == 10 and p is not None:
-            raw_totals_global.append({"P": p, "Type": "Moins", "Cote": c})
-        elif t == 11 and p is not None:
-            raw_totals_t1.append({"P": p, "Type": "Plus", "Cote": c})
-        elif t == 12 and p is not None:
-            raw_totals_t1.append({"P": p, "Type": "Moins", "Cote": c})
-        elif t == 13 and p is not None:
-            raw_totals_t2.append({"P": p, "Type": "Plus", "Cote": c})
-        elif t == 14 and p is not None:
-            raw_totals_t2.append({"P": p, "Type": "Moins", "Cote": c})
+        return api_parser.TotalsLine(sorted_result)
     
     def parse_api_data(self, json_data):
         """
         Parse les données capturées de l'API.
+        Délègue au parseur à table de dispatch de monitor.api_parser.
         
         Args:
             json_data (dict): Réponse JSON de l'API
@@ -350,66 +489,7 @@ class MatchScraper:
         Returns:
             dict: Données parsées structurées
         """
-        info = {
-            "current_score": None,
-            "current_time": None,
-            "probabilities": {},
-            "live_odds": {
-                "V1": "N/A", "V2": "N/A", "X": "N/A",
-                "BTS_Oui": "N/A", "BTS_Non": "N/A"
-            },
-            "totals": {"global": [], "team_1": [], "team_2": []}
-        }
-        
-        try:
-            val = json_data.get("Value", {})
-            
-            # Score et temps
-            if "SC" in val:
-                sc = val["SC"]
-                if "FS" in sc:
-                    info["current_score"] = f"{sc['FS'].get('S1', 0)}-{sc['FS'].get('S2', 0)}"
-                if "TS" in sc:
-                    minutes = sc['TS'] // 60
-                    seconds = sc['TS'] % 60
-                    info["current_time"] = f"{minutes}:{seconds:02d}"
-            
-            # Probabilités
-            if "WP" in val:
-                info["probabilities"] = {
-                    "P1": f"{val['WP'].get('P1', 0)*100:.0f}%",
-                    "PX": f"{val['WP'].get('PX', 0)*100:.0f}%",
-                    "P2": f"{val['WP'].get('P2', 0)*100:.0f}%"
-                }
-            
-            # Cotes et totaux
-            raw_totals_global, raw_totals_t1, raw_totals_t2 = [], [], []
-            game_events = val.get("GE", [])
-            
-            for group in game_events:
-                events = group.get("E", [])
-                if isinstance(events, list):
-                    for event_group in events:
-                        if isinstance(event_group, list):
-                            for item in event_group:
-                                self.process_event_item(
-                                    item, info, raw_totals_global,
-                                    raw_totals_t1, raw_totals_t2
-                                )
-                        elif isinstance(event_group, dict):
-                            self.process_event_item(
-                                event_group, info, raw_totals_global,
-                                raw_totals_t1, raw_totals_t2
-                            )
-            
-            info["totals"]["global"] = self.organize_totals(raw_totals_global)
-            info["totals"]["team_1"] = self.organize_totals(raw_totals_t1)
-            info["totals"]["team_2"] = self.organize_totals(raw_totals_t2)
-        
-        except Exception as e:
-            print(f"      ⚠️ Erreur parsing API: {e}")
-        
-        return info
+        return api_parser.parse_api_data(json_data)
     
     async def extract_match_data(self, match_info):
         """
@@ -453,11 +533,14 @@ class MatchScraper:
                 content_type = response.headers.get("content-type", "")
                 if "application/json" in content_type:
                     try:
-                        data = await response.json()
+                        raw = await response.body()
+                        data = api_parser.decode_payload(raw)
                         if "Value" in data and ("GE" in data["Value"] or "SC" in data["Value"]):
                             captured_data = data
                             api_captured = True
                             print("      📡 Données API capturées")
+                            if self.archive is not None:
+                                self.archive.append(match_info.get("id", "N/A"), raw)
                     except:
                         pass
         
@@ -598,14 +681,26 @@ class MatchScraper:
         Returns:
             dict: Résultat mis à jour
         """
-        score_data = await self.extract_current_score_and_time(self.page)
+        snapshot = None
+        if self.use_js_extractor:
+            snapshot = await self.extract_live_snapshot(self.page)
+        if snapshot is None:
+            # Fallback seulement si l'évaluation JS a échoué : le statut est déjà connu
+            snapshot = await self._extract_live_snapshot_legacy(self.page, status=result["status"])
+        
+        # Match terminé entre la vérification du statut et l'extraction
+        if snapshot.get("status") == "FINISHED":
+            result["status"] = "FINISHED"
+            print("      🏁 Match terminé pendant l'extraction")
+        
+        score_data = snapshot["score"]
         result["score"] = f"{score_data['home']}-{score_data['away']}"
         result["game_time"] = score_data["time"]
         
-        ht_score = await self.get_half_time_score(self.page)
+        ht_score = snapshot["half_time_score"]
         result["half_time_score"] = ht_score
         
-        result["stats"] = await self.extract_detailed_stats(self.page)
+        result["stats"] = snapshot["stats"]
         
         if api_captured:
             api_data = self.parse_api_data(captured_data)
@@ -623,4 +718,35 @@ class MatchScraper:
         if ht_score["home"] is not None:
             print(f"      📍 HT: {ht_score['home']}-{ht_score['away']}")
         
-        return result
\ No newline at end of file
+        return result
+
+
+async def run_benchmark(url, runs=5, base_url="https://1xbet.cm", headless=True):
+    """Charge une page de match LIVE puis lance MatchScraper.benchmark_live_extraction"""
+    scraper = MatchScraper(base_url=base_url, headless=headless)
+    await scraper.start()
+    try:
+        full_url = url if url.startswith("http") else base_url + url
+        await scraper.page.goto(full_url, wait_until="load", timeout=60000)
+        await scraper.continuous_popup_checker(scraper.page, duration=5)
+        if not await scraper.wait_for_page_readiness(scraper.page):
+            print("      ⚠️ Scoreboard introuvable : mesures sur une page incomplète")
+        return await scraper.benchmark_live_extraction(runs=runs)
+    finally:
+        await scraper.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de l'extraction live (JS vs locators)")
+    parser.add_argument("url", help="URL (ou chemin) d'un match LIVE")
+    parser.add_argument("--runs", type=int, default=5, help="Mesures par méthode")
+    parser.add_argument("--base-url", default="https://1xbet.cm")
+    parser.add_argument("--headed", action="store_true", help="Navigateur visible")
+    args = parser.parse_args()
+
+    report = asyncio.run(run_benchmark(args.url, args.runs, args.base_url, not args.headed))
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
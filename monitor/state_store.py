@@ -0,0 +1,180 @@
+"""
+monitor/state_store.py
+Etat du dashboard et des alertes en mémoire, avec écriture disque atomique
+et regroupée (debounce).
+
+Au lieu de réécrire matchs_surveillance_final.json et alertes_opportunites.json
+après chaque match (O(n²) octets par cycle), les fichiers ne sont écrits
+qu'au plus une fois toutes les `min_interval` secondes, et en fin de cycle.
+Ecriture dans un fichier temporaire puis os.replace : un lecteur ne voit
+jamais de fichier à moitié écrit.
+
+Avec un backend SQLite (monitor/storage.py), chaque mise à jour est aussi
+upsertée immédiatement dans la base (lecture incrémentale par 05/06).
+"""
+
+import json
+import os
+import time
+
+
+def atomic_write_json(path, data, compact=True):
+    """
+    Ecrit un JSON de façon atomique (fichier temporaire + rename).
+
+    Args:
+        path (str): Fichier cible
+        data: Données sérialisables
+        compact (bool): Encodage compact (sans indentation)
+
+    Returns:
+        int: Nombre d'octets écrits
+    """
+    if compact:
+        payload = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+    else:
+        payload = json.dumps(data, ensure_ascii=False, indent=4)
+    encoded = payload.encode("utf-8")
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(encoded)
+    os.replace(tmp_path, path)
+    return len(encoded)
+
+
+class DashboardStore:
+    """Dashboard (matchs par ID) + alertes, écrits de façon groupée"""
+
+    def __init__(self, dashboard_path, alerts_path, alerts_provider=None,
+                 min_interval=5.0, compact=True, clock=time.monotonic,
+                 db=None, date_str=None):
+        """
+        Args:
+            dashboard_path (str): matchs_surveillance_final.json
+            alerts_path (str): alertes_opportunites.json
+            alerts_provider: Callable retournant la liste d'alertes courante
+            min_interval (float): Délai minimum entre deux écritures (s)
+            compact (bool): JSON compact
+            clock: Horloge monotone (injectable)
+            db (SQLiteStore): Base optionnelle (upsert par match et alertes)
+            date_str (str): Journée des données dans la base
+        """
+        self.dashboard_path = dashboard_path
+        self.alerts_path = alerts_path
+        self.alerts_provider = alerts_provider or (lambda: [])
+        self.min_interval = min_interval
+        self.compact = compact
+        self.clock = clock
+        self.db = db
+        self.date_str = date_str
+
+        self.matches = {}
+        self._dashboard_dirty = False
+        self._alerts_written = 0
+        self._last_flush = None
+        self.metrics = self._empty_metrics()
+
+    @staticmethod
+    def _empty_metrics():
+        return {"bytes_written": 0, "writes": 0, "updates": 0, "flushes_skipped": 0}
+
+    # ------------------------------------------------------------
+    # Chargement / mise à jour
+    # ------------------------------------------------------------
+
+    def load(self):
+        """
+        Recharge le dashboard existant indexé par ID de match.
+
+        Les alertes déjà présentes dans alerts_provider() (relues depuis
+        alertes_opportunites.json) sont considérées comme écrites : elles ne
+        sont ni réinsérées en base ni réécrites au premier flush.
+        """
+        self._alerts_written = len(self.alerts_provider())
+        if os.path.exists(self.dashboard_path):
+            try:
+                with open(self.dashboard_path, "r", encoding="utf-8") as f:
+                    content = f.read().strip()
+                    if content:
+                        for m in json.loads(content):
+                            if m.get("id"):
+                                self.matches[m["id"]] = m
+            except (OSError, json.JSONDecodeError):
+                pass
+        return self.matches
+
+    def reset(self, dashboard_path, alerts_path, date_str=None):
+        """Bascule sur de nouveaux fichiers (changement de jour)"""
+        self.dashboard_path = dashboard_path
+        self.alerts_path = alerts_path
+        self.date_str = date_str or self.date_str
+        self.matches = {}
+        self._dashboard_dirty = False
+        self._alerts_written = 0
+
+    def update_match(self, match_data):
+        """Met à jour un match puis écrit si le délai de debounce est écoulé"""
+        m_id = match_data.get("id")
+        if m_id:
+            self.matches[m_id] = match_data
+            self._dashboard_dirty = True
+            self.metrics["updates"] += 1
+            if self.db is not None:
+                self.db.upsert("dashboard", self.date_str, [match_data])
+        self.maybe_flush()
+
+    # ------------------------------------------------------------
+    # Ecriture
+    # ------------------------------------------------------------
+
+    def dashboard_list(self):
+        """Liste triée (LIVE en premier) telle qu'écrite sur disque"""
+        final_dashboard_list = list(self.matches.values())
+        final_dashboard_list.sort(key=lambda x: (x.get("status") != "LIVE", x.get("game_time", "")))
+        return final_dashboard_list
+
+    def _alerts_dirty(self, alerts):
+        return bool(alerts) and len(alerts) != self._alerts_written
+
+    def maybe_flush(self):
+        """Ecrit seulement si `min_interval` secondes se sont écoulées"""
+        now = self.clock()
+        if self._last_flush is not None and now - self._last_flush < self.min_interval:
+            self.metrics["flushes_skipped"] += 1
+            return 0
+        return self.flush()
+
+    def flush(self):
+        """Ecrit immédiatement ce qui a changé"""
+        written = 0
+        if self._dashboard_dirty:
+            written += atomic_write_json(self.dashboard_path, self.dashboard_list(), self.compact)
+            self._dashboard_dirty = False
+            self.metrics["writes"] += 1
+
+        alerts = self.alerts_provider()
+        if self._alerts_dirty(alerts):
+            if self.db is not None:
+                self.db.add("alerts", self.date_str, alerts[self._alerts_written:])
+            written += atomic_write_json(self.alerts_path, alerts, self.compact)
+            self._alerts_written = len(alerts)
+            self.metrics["writes"] += 1
+
+        self._last_flush = self.clock()
+        self.metrics["bytes_written"] += written
+        return written
+
+    def end_cycle(self):
+        """
+        Flush de fin de cycle et remise à zéro des métriques.
+
+        Returns:
+            dict: Métriques du cycle (bytes_written, writes, updates, flushes_skipped)
+        """
+        self.flush()
+        metrics, self.metrics = self.metrics, self._empty_metrics()
+        return metrics
@@ -0,0 +1,411 @@
+"""
+monitor/storage.py
+Couche de stockage commune aux étapes du pipeline (01 → 06, dashboard).
+
+Deux backends, même interface :
+- JsonDayStore : comportement historique, un fichier JSON par type et par
+  jour dans match/YYYY-MM-DD/ (réécrit en entier, de façon atomique).
+- SQLiteStore  : une base match/footy_tracker.db en mode WAL. Insertions et
+  upserts indexés par (date, id), lectures incrémentales par curseur (seq) :
+  un lecteur ne voit jamais de fichier à moitié écrit.
+
+Le backend SQLite garde les fichiers JSON historiques à jour via export_json()
+(shim de compatibilité pour dashboard.py et les anciens scripts).
+
+Sélection : STORAGE_BACKEND=sqlite (défaut : json).
+
+Usage :
+    python -m monitor.storage import --date 2025-12-30   # JSON -> SQLite
+    python -m monitor.storage export --date 2025-12-30   # SQLite -> JSON
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+from .state_store import atomic_write_json
+
+
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "json")
+DEFAULT_DB_PATH = os.path.join("match", "footy_tracker.db")
+
+# Type de données -> fichier JSON historique
+JSON_FILES = {
+    "leagues": "ids_championnats_24h.json",
+    "matches": "matchs_details.json",
+    "favorites": "matchs_tries_favoris.json",
+    "dashboard": "matchs_surveillance_final.json",
+    "alerts": "alertes_opportunites.json",
+}
+
+# Types en ajout seul (un ID n'est inséré qu'une fois) / en upsert (dernier état)
+APPEND_KINDS = ("leagues", "matches", "favorites", "alerts", "snapshots")
+UPSERT_KINDS = ("dashboard",)
+
+
+def alert_key(alert):
+    """Signature d'une alerte : MATCH + TYPE + NIVEAU + ACTION (sans timestamp)"""
+    opp = alert.get("opportunity", {})
+    return "|".join([
+        str(alert.get("match")),
+        str(opp.get("type", "UNKNOWN")),
+        str(opp.get("niveau", "UNKNOWN")),
+        str(opp.get("action_suggeree", "UNKNOWN")),
+    ])
+
+
+def _item_id(kind, item):
+    if kind == "alerts":
+        return f"{item.get('timestamp', '')}|{alert_key(item)}"
+    if kind == "snapshots":
+        return f"{item.get('id', 'N/A')}|{item.get('scan_timestamp', '')}"
+    return str(item.get("id", "N/A"))
+
+
+def sort_for_export(kind, items):
+    """Ordre des fichiers JSON historiques (favoris par heure, LIVE en tête)"""
+    if kind == "favorites":
+        return sorted(items, key=lambda x: x.get("heure", ""))
+    if kind == "dashboard":
+        return sorted(items, key=lambda x: (x.get("status") != "LIVE", x.get("game_time", "")))
+    return items
+
+
+def today_str():
+    return datetime.now().strftime("%Y-%m-%d")
+
+
+# ============================================================
+# Backend JSON (historique)
+# ============================================================
+
+class JsonDayStore:
+    """Un fichier JSON par type et par jour (comportement historique)"""
+
+    def __init__(self, root="match"):
+        self.root = root
+
+    def _path(self, kind, date_str):
+        return os.path.join(self.root, date_str, JSON_FILES[kind])
+
+    def _load(self, kind, date_str):
+        path = self._path(kind, date_str)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                content = f.read().strip()
+                return json.loads(content) if content else []
+        except (OSError, json.JSONDecodeError):
+            return []
+
+    def read(self, kind, date_str, since=0):
+        """
+        Lit les éléments d'un type.
+
+        Args:
+            kind (str): leagues, matches, favorites, dashboard ou alerts
+            date_str (str): Date YYYY-MM-DD
+            since (int): Curseur retourné par la lecture précédente
+
+        Returns:
+            tuple: (liste d'éléments, nouveau curseur)
+        """
+        if kind not in JSON_FILES:
+            return [], since
+        items = self._load(kind, date_str)
+        # Fichiers en ajout seul : le curseur est une position dans la liste
+        return items[since:], len(items)
+
+    def ids(self, kind, date_str):
+        return {_item_id(kind, item) for item in self._load(kind, date_str)}
+
+    def add(self, kind, date_str, items):
+        """Ajoute les éléments dont l'ID est inconnu, retourne le nombre ajouté"""
+        if kind not in JSON_FILES:
+            return 0  # Les snapshots restent dans matchs_history_log.jsonl
+        existing = self._load(kind, date_str)
+        known = {_item_id(kind, item) for item in existing}
+        added = 0
+        for item in items:
+            key = _item_id(kind, item)
+            if key not in known:
+                existing.append(item)
+                known.add(key)
+                added += 1
+        if added:
+            atomic_write_json(self._path(kind, date_str), sort_for_export(kind, existing), compact=False)
+        return added
+
+    def upsert(self, kind, date_str, items):
+        """Remplace l'état des éléments par ID"""
+        current = {_item_id(kind, item): item for item in self._load(kind, date_str)}
+        for item in items:
+            current[_item_id(kind, item)] = item
+        atomic_write_json(self._path(kind, date_str), sort_for_export(kind, list(current.values())), compact=False)
+        return len(items)
+
+    def get_cursor(self, name, date_str):
+        cursors = self._load_cursors(date_str)
+        return cursors.get(name, 0)
+
+    def set_cursor(self, name, date_str, value):
+        cursors = self._load_cursors(date_str)
+        cursors[name] = value
+        atomic_write_json(os.path.join(self.root, date_str, ".cursors.json"), cursors)
+
+    def _load_cursors(self, date_str):
+        try:
+            with open(os.path.join(self.root, date_str, ".cursors.json"), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {}
+
+    def export_json(self, date_str, kinds=None):
+        """Les fichiers JSON sont déjà la source : rien à faire"""
+        return 0
+
+    def close(self):
+        pass
+
+
+# ============================================================
+# Backend SQLite (WAL)
+# ============================================================
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS leagues (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    date TEXT NOT NULL,
+    id TEXT NOT NULL,
+    data TEXT NOT NULL,
+    UNIQUE (date, id)
+);
+CREATE TABLE IF NOT EXISTS matches (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    date TEXT NOT NULL,
+    id TEXT NOT NULL,
+    league TEXT,
+    data TEXT NOT NULL,
+    UNIQUE (date, id)
+);
+CREATE TABLE IF NOT EXISTS favorites (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    date TEXT NOT NULL,
+    id TEXT NOT NULL,
+    heure TEXT,
+    data TEXT NOT NULL,
+    UNIQUE (date, id)
+);
+CREATE TABLE IF NOT EXISTS dashboard (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    date TEXT NOT NULL,
+    id TEXT NOT NULL,
+    status TEXT,
+    data TEXT NOT NULL,
+    UNIQUE (date, id)
+);
+CREATE TABLE IF NOT EXISTS alerts (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    date TEXT NOT NULL,
+    id TEXT NOT NULL,
+    match_id TEXT,
+    alert_key TEXT,
+    data TEXT NOT NULL,
+    UNIQUE (date, id)
+);
+CREATE TABLE IF NOT EXISTS snapshots (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    date TEXT NOT NULL,
+    id TEXT NOT NULL,
+    match_id TEXT,
+    ts TEXT,
+    data TEXT NOT NULL,
+    UNIQUE (date, id)
+);
+CREATE TABLE IF NOT EXISTS cursors (
+    name TEXT NOT NULL,
+    date TEXT NOT NULL,
+    value INTEGER NOT NULL,
+    PRIMARY KEY (name, date)
+);
+CREATE INDEX IF NOT EXISTS idx_favorites_heure ON favorites (date, heure);
+CREATE INDEX IF NOT EXISTS idx_dashboard_status ON dashboard (date, status);
+CREATE INDEX IF NOT EXISTS idx_alerts_match ON alerts (date, match_id);
+CREATE INDEX IF NOT EXISTS idx_snapshots_match ON snapshots (date, match_id, ts);
+"""
+
+# Colonnes indexées en plus de (date, id, data)
+EXTRA_COLUMNS = {
+    "leagues": {},
+    "matches": {"league": lambda item: item.get("league")},
+    "favorites": {"heure": lambda item: item.get("heure")},
+    "dashboard": {"status": lambda item: item.get("status")},
+    "alerts": {"match_id": lambda item: str(item.get("match_id", "")), "alert_key": alert_key},
+    "snapshots": {"match_id": lambda item: str(item.get("id", "")),
+                  "ts": lambda item: item.get("scan_timestamp")},
+}
+
+
+class SQLiteStore:
+    """Base SQLite unique (WAL) : lecteurs et écrivains concurrents sans corruption"""
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, root="match"):
+        """
+        Args:
+            db_path (str): Fichier de la base
+            root (str): Dossier racine des fichiers JSON exportés
+        """
+        self.db_path = db_path
+        self.root = root
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def _rows(self, kind, date_str, items):
+        extras = EXTRA_COLUMNS[kind]
+        for item in items:
+            row = [date_str, _item_id(kind, item)]
+            row += [fn(item) for fn in extras.values()]
+            row.append(json.dumps(item, ensure_ascii=False))
+            yield row
+
+    def _columns(self, kind):
+        return ["date", "id"] + list(EXTRA_COLUMNS[kind]) + ["data"]
+
+    def read(self, kind, date_str, since=0):
+        """
+        Lit les éléments insérés/modifiés après le curseur `since`.
+
+        Args:
+            kind (str): leagues, matches, favorites, dashboard, alerts ou snapshots
+            date_str (str): Date YYYY-MM-DD
+            since (int): Curseur retourné par la lecture précédente
+
+        Returns:
+            tuple: (liste d'éléments, nouveau curseur)
+        """
+        with self._lock:
+            rows = self.conn.execute(
+                f"SELECT seq, data FROM {kind} WHERE date = ? AND seq > ? ORDER BY seq",
+                (date_str, since)
+            ).fetchall()
+        if not rows:
+            return [], since
+        return [json.loads(data) for _, data in rows], rows[-1][0]
+
+    def ids(self, kind, date_str):
+        with self._lock:
+            rows = self.conn.execute(f"SELECT id FROM {kind} WHERE date = ?", (date_str,)).fetchall()
+        return {r[0] for r in rows}
+
+    def add(self, kind, date_str, items):
+        """Insère les éléments dont l'ID est inconnu (INSERT OR IGNORE)"""
+        columns = self._columns(kind)
+        sql = (f"INSERT OR IGNORE INTO {kind} ({', '.join(columns)}) "
+               f"VALUES ({', '.join('?' * len(columns))})")
+        with self._lock, self.conn:
+            before = self.conn.total_changes
+            self.conn.executemany(sql, self._rows(kind, date_str, items))
+            return self.conn.total_changes - before
+
+    def upsert(self, kind, date_str, items):
+        """
+        Remplace l'état des éléments par ID. Le seq est renouvelé pour que
+        les lecteurs incrémentaux voient la mise à jour.
+        """
+        columns = self._columns(kind)
+        updates = ", ".join(f"{c} = excluded.{c}" for c in columns[2:])
+        sql = (f"INSERT INTO {kind} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))}) "
+               f"ON CONFLICT (date, id) DO UPDATE SET {updates}, "
+               f"seq = (SELECT MAX(seq) + 1 FROM {kind})")
+        with self._lock, self.conn:
+            self.conn.executemany(sql, self._rows(kind, date_str, items))
+        return len(items)
+
+    def get_cursor(self, name, date_str):
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT value FROM cursors WHERE name = ? AND date = ?", (name, date_str)
+            ).fetchone()
+        return row[0] if row else 0
+
+    def set_cursor(self, name, date_str, value):
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT INTO cursors (name, date, value) VALUES (?, ?, ?) "
+                "ON CONFLICT (name, date) DO UPDATE SET value = excluded.value",
+                (name, date_str, value)
+            )
+
+    def export_json(self, date_str, kinds=None):
+        """
+        Shim de compatibilité : réécrit les fichiers JSON historiques du jour.
+
+        Returns:
+            int: Octets écrits
+        """
+        written = 0
+        for kind in kinds or JSON_FILES:
+            items, _ = self.read(kind, date_str)
+            if not items:
+                continue
+            path = os.path.join(self.root, date_str, JSON_FILES[kind])
+            written += atomic_write_json(path, sort_for_export(kind, items), compact=False)
+        return written
+
+    def import_json(self, date_str):
+        """Charge les fichiers JSON existants d'une journée dans la base"""
+        source = JsonDayStore(self.root)
+        counts = {}
+        for kind in JSON_FILES:
+            items, _ = source.read(kind, date_str)
+            if kind in UPSERT_KINDS:
+                counts[kind] = self.upsert(kind, date_str, items)
+            else:
+                counts[kind] = self.add(kind, date_str, items)
+        return counts
+
+    def close(self):
+        self.conn.close()
+
+
+def open_store(backend=None, root="match", db_path=DEFAULT_DB_PATH):
+    """
+    Ouvre le backend configuré (STORAGE_BACKEND=json|sqlite).
+
+    Returns:
+        JsonDayStore | SQLiteStore
+    """
+    backend = backend or STORAGE_BACKEND
+    if backend == "sqlite":
+        return SQLiteStore(db_path, root=root)
+    return JsonDayStore(root)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stockage SQLite <-> fichiers JSON du jour")
+    parser.add_argument("action", choices=["import", "export"])
+    parser.add_argument("--date", default=today_str())
+    parser.add_argument("--db", default=DEFAULT_DB_PATH)
+    parser.add_argument("--root", default="match")
+    args = parser.parse_args()
+
+    store = SQLiteStore(args.db, root=args.root)
+    try:
+        if args.action == "import":
+            print(f"📥 {args.date} : {store.import_json(args.date)}")
+        else:
+            print(f"📤 {args.date} : {store.export_json(args.date)/1024:.1f} Ko écrits")
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
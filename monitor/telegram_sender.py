@@ -0,0 +1,484 @@
+"""
+monitor/telegram_sender.py
+Envoi Telegram asynchrone : boîte d'envoi persistante, limites de débit
+(globale et par chat), relances avec backoff sur 429 / 5xx.
+
+- TelegramOutbox : table SQLite (WAL). Un message par destinataire, statut
+  pending / sent / failed. Rien n'est perdu si le bot redémarre ; les
+  messages envoyés sont purgés après 7 jours par le worker.
+- TelegramSender : worker asyncio, session HTTP partagée (aiohttp), token
+  buckets de monitor/rate_limit.py (30 msg/s global, 1 msg/s par chat),
+  un seul envoi en cours par chat pour garder l'ordre des messages.
+- StubTelegramServer : faux serveur Bot API local (asyncio pur), pour les
+  essais et le benchmark de débit, avec taux de 429 / 5xx configurables.
+
+Benchmark :
+    python -m monitor.telegram_sender --messages 200 --chats 5 --error-rate 0.1
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+
+from .rate_limit import TokenBucket
+
+try:
+    import aiohttp
+except ImportError:  # aiohttp requis uniquement pour l'envoi réel
+    aiohttp = None
+
+
+DEFAULT_OUTBOX_PATH = os.path.join("match", "telegram_outbox.db")
+TELEGRAM_API_BASE = "https://api.telegram.org"
+
+# Limites Bot API : ~30 messages/s au total, ~1 message/s par chat
+GLOBAL_RATE = 30
+PER_CHAT_RATE = 1
+
+OUTBOX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    chat_id TEXT NOT NULL,
+    text TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    next_attempt_at REAL NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL DEFAULT 'pending',
+    last_error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_outbox_pending ON outbox (status, next_attempt_at);
+CREATE INDEX IF NOT EXISTS idx_outbox_chat ON outbox (chat_id, status, id);
+"""
+
+
+class TelegramOutbox:
+    """Boîte d'envoi persistante (un message par destinataire)"""
+
+    def __init__(self, db_path=DEFAULT_OUTBOX_PATH):
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(OUTBOX_SCHEMA)
+        self._lock = threading.Lock()
+
+    def enqueue(self, text, chat_ids):
+        """
+        Ajoute un message pour chaque destinataire.
+
+        Returns:
+            int: Nombre de messages ajoutés
+        """
+        now = time.time()
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "INSERT INTO outbox (chat_id, text, created_at, next_attempt_at) VALUES (?, ?, ?, ?)",
+                [(str(chat_id), text, now, now) for chat_id in chat_ids]
+            )
+        return len(chat_ids)
+
+    def due(self, now=None, limit=200):
+        """
+        Messages à envoyer maintenant : pour chaque chat, seulement le plus
+        ancien message en attente (un message en relance bloque les suivants
+        du même chat, l'ordre est conservé).
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT id, chat_id, text, attempts, created_at FROM outbox o "
+                "WHERE status = 'pending' AND next_attempt_at <= ? AND id = ("
+                "    SELECT MIN(id) FROM outbox WHERE chat_id = o.chat_id AND status = 'pending'"
+                ") ORDER BY id LIMIT ?",
+                (now, limit)
+            ).fetchall()
+        return [
+            {"id": r[0], "chat_id": r[1], "text": r[2], "attempts": r[3], "created_at": r[4]}
+            for r in rows
+        ]
+
+    def next_due_in(self, now=None):
+        """Secondes avant la prochaine tentative planifiée (None si vide)"""
+        now = time.time() if now is None else now
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT MIN(next_attempt_at) FROM outbox WHERE status = 'pending'"
+            ).fetchone()
+        return None if row[0] is None else max(0.0, row[0] - now)
+
+    def mark_sent(self, message_id):
+        with self._lock, self.conn:
+            self.conn.execute(
+                "UPDATE outbox SET status = 'sent', attempts = attempts + 1 WHERE id = ?", (message_id,)
+            )
+
+    def reschedule(self, message_id, delay, error):
+        with self._lock, self.conn:
+            self.conn.execute(
+                "UPDATE outbox SET attempts = attempts + 1, next_attempt_at = ?, last_error = ? WHERE id = ?",
+                (time.time() + delay, str(error)[:500], message_id)
+            )
+
+    def mark_failed(self, message_id, error):
+        with self._lock, self.conn:
+            self.conn.execute(
+                "UPDATE outbox SET status = 'failed', attempts = attempts + 1, last_error = ? WHERE id = ?",
+                (str(error)[:500], message_id)
+            )
+
+    def counts(self):
+        with self._lock:
+            rows = self.conn.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status").fetchall()
+        return dict(rows)
+
+    def purge_sent(self, older_than_seconds=7 * 24 * 3600):
+        """Supprime les messages envoyés depuis plus de N secondes"""
+        with self._lock, self.conn:
+            cursor = self.conn.execute(
+                "DELETE FROM outbox WHERE status = 'sent' AND created_at < ?",
+                (time.time() - older_than_seconds,)
+            )
+        return cursor.rowcount
+
+    def close(self):
+        self.conn.close()
+
+
+class TelegramSender:
+    """Worker asyncio qui vide la boîte d'envoi dans le respect des limites"""
+
+    MAX_ATTEMPTS = 8
+    BACKOFF_BASE = 1.0   # Secondes (doublé à chaque échec)
+    BACKOFF_MAX = 60.0
+    IDLE_WAIT = 1.0      # Relecture de la boîte d'envoi sans réveil
+    PURGE_INTERVAL = 3600.0       # Purge des messages envoyés (s)
+    PURGE_AFTER = 7 * 24 * 3600   # Age des messages envoyés supprimés (s)
+
+    def __init__(self, token, outbox, api_base=TELEGRAM_API_BASE,
+                 global_rate=GLOBAL_RATE, per_chat_rate=PER_CHAT_RATE,
+                 concurrency=10, request_timeout=15):
+        """
+        Args:
+            token (str): Jeton du bot
+            outbox (TelegramOutbox): Boîte d'envoi
+            api_base (str): URL de l'API (serveur local pour les essais)
+            global_rate (float): Messages par seconde, tous chats confondus
+            per_chat_rate (float): Messages par seconde et par chat
+            concurrency (int): Requêtes HTTP simultanées max
+            request_timeout (float): Délai max d'une requête (s)
+        """
+        self.url = f"{api_base.rstrip('/')}/bot{token}/sendMessage"
+        self.outbox = outbox
+        self.per_chat_rate = per_chat_rate
+        self.global_bucket = TokenBucket(global_rate, capacity=global_rate)
+        self.chat_buckets = {}
+        self.concurrency = concurrency
+        self.request_timeout = request_timeout
+
+        self.metrics = {"sent": 0, "retried": 0, "failed": 0, "rate_limited": 0}
+        self._in_flight_chats = set()
+        self._wake = None
+        self._loop = None
+        self._thread = None
+
+    def _chat_bucket(self, chat_id):
+        bucket = self.chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = self.chat_buckets[chat_id] = TokenBucket(self.per_chat_rate, capacity=1)
+        return bucket
+
+    def _backoff(self, attempts):
+        delay = min(self.BACKOFF_MAX, self.BACKOFF_BASE * (2 ** attempts))
+        return delay * random.uniform(0.8, 1.2)
+
+    # ------------------------------------------------------------
+    # Envoi d'un message
+    # ------------------------------------------------------------
+
+    async def _send_one(self, session, semaphore, message):
+        chat_id = message["chat_id"]
+        try:
+            await self._chat_bucket(chat_id).acquire()
+            await self.global_bucket.acquire()
+            payload = {
+                "chat_id": chat_id,
+                "text": message["text"],
+                "parse_mode": "HTML",
+                "disable_web_page_preview": True
+            }
+            async with semaphore:
+                async with session.post(self.url, json=payload) as resp:
+                    status = resp.status
+                    try:
+                        body = await resp.json(content_type=None)
+                    except Exception:
+                        body = {}
+
+            if status == 200:
+                self.outbox.mark_sent(message["id"])
+                self.metrics["sent"] += 1
+            elif status == 429:
+                # Telegram indique le délai à respecter
+                retry_after = (body.get("parameters") or {}).get("retry_after", 1)
+                self.metrics["rate_limited"] += 1
+                self.outbox.reschedule(message["id"], float(retry_after), "429 Too Many Requests")
+            elif status >= 500:
+                self._retry_or_fail(message, f"HTTP {status}")
+            else:
+                # 400 / 403 : chat invalide ou bot bloqué, inutile de réessayer
+                self.metrics["failed"] += 1
+                self.outbox.mark_failed(message["id"], f"HTTP {status} {body.get('description', '')}")
+                print(f"      ❌ Envoi refusé ({chat_id}) : HTTP {status}")
+        except Exception as e:
+            self._retry_or_fail(message, e)
+        finally:
+            self._in_flight_chats.discard(chat_id)
+            self._wake.set()  # Le message suivant du chat peut partir
+
+    def _retry_or_fail(self, message, error):
+        if message["attempts"] + 1 >= self.MAX_ATTEMPTS:
+            self.metrics["failed"] += 1
+            self.outbox.mark_failed(message["id"], error)
+            print(f"      ❌ Abandon après {self.MAX_ATTEMPTS} essais ({message['chat_id']}) : {error}")
+        else:
+            self.metrics["retried"] += 1
+            self.outbox.reschedule(message["id"], self._backoff(message["attempts"]), error)
+
+    # ------------------------------------------------------------
+    # Boucle
+    # ------------------------------------------------------------
+
+    def wake(self):
+        """Signale un nouveau message (appelable depuis un autre thread)"""
+        if self._loop is not None and self._wake is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    async def run(self, stop_event=None, drain=False):
+        """
+        Vide la boîte d'envoi en continu.
+
+        Args:
+            stop_event (asyncio.Event): Arrêt propre
+            drain (bool): S'arrêter dès que plus rien n'est en attente
+        """
+        if aiohttp is None:
+            raise ImportError("aiohttp est requis pour l'envoi Telegram (pip install aiohttp)")
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        stop_event = stop_event or asyncio.Event()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        tasks = set()
+
+        timeout = aiohttp.ClientTimeout(total=self.request_timeout)
+        connector = aiohttp.TCPConnector(limit=self.concurrency)
+        async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
+            last_purge = None
+            while not stop_event.is_set():
+                self._wake.clear()
+                # La boîte d'envoi ne garde que les messages envoyés récents
+                if last_purge is None or time.monotonic() - last_purge >= self.PURGE_INTERVAL:
+                    self.outbox.purge_sent(self.PURGE_AFTER)
+                    last_purge = time.monotonic()
+
+                # Un seul message en cours par chat
+                for message in self.outbox.due():
+                    if message["chat_id"] in self._in_flight_chats:
+                        continue
+                    self._in_flight_chats.add(message["chat_id"])
+                    task = asyncio.create_task(self._send_one(session, semaphore, message))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+
+                next_due = self.outbox.next_due_in()
+                if drain and next_due is None and not tasks:
+                    break
+
+                wait = self.IDLE_WAIT if next_due is None else min(self.IDLE_WAIT, next_due)
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=max(wait, 0.01))
+                except asyncio.TimeoutError:
+                    pass
+
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+    def start_in_thread(self):
+        """
+        Lance run() dans un thread dédié (pour les scripts synchrones).
+
+        Une erreur inattendue de la boucle est journalisée et la boucle est
+        relancée après un backoff ; les messages restés en attente sont
+        conservés dans la boîte d'envoi. Seule l'absence d'aiohttp arrête
+        le thread (l'appelant surveille thread.is_alive()).
+        """
+        def _target():
+            failures = 0
+            while True:
+                try:
+                    asyncio.run(self.run())
+                    return
+                except ImportError as e:
+                    print(f"❌ Worker Telegram arrêté : {e}")
+                    return
+                except Exception as e:
+                    delay = self._backoff(failures)
+                    failures += 1
+                    print(f"❌ Worker Telegram en erreur : {e!r} (relance dans {delay:.0f}s)")
+                finally:
+                    self._loop = None
+                    self._in_flight_chats.clear()
+                time.sleep(delay)
+
+        self._thread = threading.Thread(target=_target, name="telegram-sender", daemon=True)
+        self._thread.start()
+        return self._thread
+
+
+# ============================================================
+# Faux serveur Bot API (essais / benchmark)
+# ============================================================
+
+class StubTelegramServer:
+    """
+    Serveur HTTP minimal imitant sendMessage.
+
+    Args:
+        error_rate (float): Proportion de réponses 500
+        rate_limit_rate (float): Proportion de réponses 429
+        retry_after (int): Valeur retry_after renvoyée avec les 429
+        latency (float): Latence simulée par requête (s)
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, error_rate=0.0, rate_limit_rate=0.0,
+                 retry_after=1, latency=0.02):
+        self.host = host
+        self.port = port
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.latency = latency
+        self.received = []   # (chat_id, text, t) des messages acceptés
+        self.requests = 0
+        self._server = None
+
+    @property
+    def base_url(self):
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode().partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+                status, response = await self._respond(body)
+                payload = json.dumps(response).encode()
+                writer.write(
+                    f"HTTP/1.1 {status} X\r\nContent-Type: application/json\r\n"
+                    f"Content-Length: {len(payload)}\r\n\r\n".encode() + payload
+                )
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, body):
+        self.requests += 1
+        await asyncio.sleep(self.latency)
+        draw = random.random()
+        if draw < self.rate_limit_rate:
+            return 429, {"ok": False, "error_code": 429, "description": "Too Many Requests",
+                         "parameters": {"retry_after": self.retry_after}}
+        if draw < self.rate_limit_rate + self.error_rate:
+            return 500, {"ok": False, "error_code": 500, "description": "Internal Server Error"}
+        data = json.loads(body or b"{}")
+        self.received.append((str(data.get("chat_id")), data.get("text"), time.time()))
+        return 200, {"ok": True, "result": {"message_id": len(self.received)}}
+
+
+async def run_benchmark(messages=200, chats=5, error_rate=0.1, rate_limit_rate=0.02,
+                        per_chat_rate=PER_CHAT_RATE, db_path=None):
+    """
+    Mesure le débit de bout en bout contre le faux serveur.
+
+    Returns:
+        dict: Métriques (durée, messages/s, relances, doublons, ordre par chat)
+    """
+    import tempfile
+
+    server = await StubTelegramServer(error_rate=error_rate, rate_limit_rate=rate_limit_rate).start()
+    tmp_dir = tempfile.mkdtemp()
+    outbox = TelegramOutbox(db_path or os.path.join(tmp_dir, "outbox.db"))
+    chat_ids = [str(1000 + i) for i in range(chats)]
+    for i in range(messages):
+        outbox.enqueue(f"alerte #{i}", chat_ids)
+
+    sender = TelegramSender("TEST", outbox, api_base=server.base_url, per_chat_rate=per_chat_rate)
+    sender.BACKOFF_BASE = 0.05
+    start = time.time()
+    await sender.run(drain=True)
+    elapsed = time.time() - start
+    await server.stop()
+
+    delivered = len(server.received)
+    in_order = all(
+        [t for c, t, _ in server.received if c == chat] ==
+        [f"alerte #{i}" for i in range(messages)]
+        for chat in chat_ids
+    ) if not sender.metrics["failed"] else None
+    outbox.close()
+    return {
+        "messages": messages * chats,
+        "delivered": delivered,
+        "seconds": round(elapsed, 2),
+        "msg_per_s": round(delivered / elapsed, 1) if elapsed else None,
+        "http_requests": server.requests,
+        "in_order": in_order,
+        **sender.metrics
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de l'envoi Telegram (faux serveur local)")
+    parser.add_argument("--messages", type=int, default=20, help="Alertes par chat")
+    parser.add_argument("--chats", type=int, default=5)
+    parser.add_argument("--error-rate", type=float, default=0.1)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.02)
+    parser.add_argument("--per-chat-rate", type=float, default=PER_CHAT_RATE)
+    args = parser.parse_args()
+
+    result = asyncio.run(run_benchmark(
+        args.messages, args.chats, args.error_rate, args.rate_limit_rate, args.per_chat_rate
+    ))
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,18 @@
+import asyncio
+import os
 import subprocess
 import time
 import sys
 
+from monitor.daemon import MonitorDaemon, send_control_command
+from monitor.payload_archive import PayloadArchive
+
+CONTROL_HOST = os.getenv("MONITOR_CONTROL_HOST", "127.0.0.1")
+CONTROL_PORT = int(os.getenv("MONITOR_CONTROL_PORT", 8765))
+
+
 def run_forever():
+    """Ancienne boucle : relance 04 puis 06 en sous-processus toutes les 60 s"""
     print("🔄 Démarrage de la boucle infinie pour le Monitoring...")
     
     cycle_count = 1
@@ -31,5 +41,36 @@ def run_forever():
         time.sleep(60)  # pause 1 minute
         cycle_count += 1
 
+
+def run_daemon():
+    """Démon unique : navigateur et état gardés en mémoire entre les cycles"""
+    archive = None
+    if os.getenv("ARCHIVE_API_PAYLOADS", "False") == "True":
+        archive = PayloadArchive(compression=os.getenv("ARCHIVE_COMPRESSION", "gzip"))
+
+    daemon = MonitorDaemon(
+        control_host=CONTROL_HOST,
+        control_port=CONTROL_PORT,
+        archive=archive
+    )
+    try:
+        asyncio.run(daemon.run())
+    except KeyboardInterrupt:
+        print("\n🛑 Arrêt manuel demandé.")
+
+
 if __name__ == "__main__":
-    run_forever()
+    # python scheduler_monitor.py            -> démon
+    # python scheduler_monitor.py --legacy   -> ancienne boucle sous-processus
+    # python scheduler_monitor.py --status   -> santé du démon en cours
+    # python scheduler_monitor.py --stop     -> arrêt propre du démon
+    if "--legacy" in sys.argv:
+        run_forever()
+    elif "--status" in sys.argv or "--stop" in sys.argv:
+        command = "stop" if "--stop" in sys.argv else "health"
+        try:
+            print(send_control_command(command, CONTROL_HOST, CONTROL_PORT))
+        except (OSError, asyncio.TimeoutError) as e:
+            print(f"❌ Démon injoignable ({CONTROL_HOST}:{CONTROL_PORT}) : {e}")
+    else:
+        run_daemon()
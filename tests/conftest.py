@@ -0,0 +1,36 @@
+"""
+tests/conftest.py
+Fixtures communes : pages et flux de ligue enregistrés (anonymisés).
+
+Lancement depuis la racine du dépôt : python -m pytest -q
+"""
+
+import os
+import sys
+import time
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES_DIR = os.path.join(ROOT_DIR, "tests", "fixtures")
+
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+
+def read_fixture(*parts, mode="r"):
+    """Contenu d'une fixture (texte, ou octets avec mode="rb")"""
+    encoding = None if "b" in mode else "utf-8"
+    with open(os.path.join(FIXTURES_DIR, *parts), mode, encoding=encoding) as f:
+        return f.read()
+
+
+
+@pytest.fixture
+def utc(monkeypatch):
+    """Fuseau UTC : les epochs des fixtures de flux tombent le 30/12/2025 quel que soit l'hôte"""
+    monkeypatch.setenv("TZ", "UTC")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
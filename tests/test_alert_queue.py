@@ -0,0 +1,33 @@
+"""File d'alertes : purge des alertes lues par tous les consommateurs"""
+
+from monitor.alert_queue import AlertQueue
+
+
+def test_prune_keeps_what_a_consumer_has_not_read(tmp_path):
+    queue = AlertQueue(str(tmp_path / "alert_queue.db"), notify_port=None)
+    try:
+        for i in range(5):
+            queue.publish({"match": f"m{i}"})
+        assert queue.prune() == 0  # Aucun consommateur connu : rien n'est supprimé
+
+        queue.set_offset("telegram", 4)
+        queue.set_offset("autre", 2)
+        assert queue.prune() == 2
+        assert [seq for seq, _, _ in queue.consume(0)] == [3, 4, 5]
+
+        queue.set_offset("autre", 5)
+        queue.prune()
+        assert [seq for seq, _, _ in queue.consume(0)] == [5]
+        assert queue.publish({"match": "m5"}) == 6  # Numérotation jamais réutilisée
+    finally:
+        queue.close()
+
+
+def test_prune_drops_alerts_past_retention(tmp_path):
+    queue = AlertQueue(str(tmp_path / "alert_queue.db"), notify_port=None)
+    try:
+        queue.publish({"match": "m0"})
+        assert queue.prune(max_age=3600) == 0
+        assert queue.prune(max_age=-1) == 1
+    finally:
+        queue.close()
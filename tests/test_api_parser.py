@@ -0,0 +1,71 @@
+"""Parseur GetGameZip : équivalence avec l'ancien parseur et débit (pytest-benchmark)"""
+
+import os
+
+import pytest
+
+from conftest import FIXTURES_DIR, read_fixture
+from monitor.api_parser import decode_payload, parse_api_data, parse_api_data_legacy
+
+try:
+    import pytest_benchmark
+except ImportError:  # Mesures ignorées sans le plugin
+    pytest_benchmark = None
+
+needs_benchmark = pytest.mark.skipif(pytest_benchmark is None, reason="pytest-benchmark non installé")
+
+GAME_ZIP_FILES = sorted(f for f in os.listdir(os.path.join(FIXTURES_DIR, "game_zip")) if f.endswith(".json"))
+LEGACY_FIELDS = ("current_score", "current_time", "probabilities", "live_odds", "totals")
+
+
+def payloads():
+    return [read_fixture("game_zip", name, mode="rb") for name in GAME_ZIP_FILES]
+
+
+@pytest.mark.parametrize("name", GAME_ZIP_FILES)
+def test_same_result_as_legacy_parser(name):
+    raw = read_fixture("game_zip", name, mode="rb")
+
+    new, old = parse_api_data(raw), parse_api_data_legacy(raw)
+
+    for field in LEGACY_FIELDS:
+        assert new[field] == old[field], field
+    assert new["totals"]["global"], "fixture sans totaux"
+
+
+def test_live_fixture_fields():
+    info = parse_api_data(read_fixture("game_zip", "700000001_live_2-1.json", mode="rb"))
+
+    assert info["current_score"] == "2-1"
+    assert info["current_time"] == "64:07"
+    assert info["probabilities"] == {"P1": "61%", "PX": "25%", "P2": "13%"}
+    assert set(info["double_chance"]) == {"1X", "12", "X2"}
+    assert [row["Seuil"] for row in info["handicaps"]["main"]] == [-2.5, -1.5, -1, 0]
+    assert set(info["other_markets"]) == {"401", "402", "403"}
+    # Seuil 5.5 présent uniquement côté "Moins"
+    assert info["totals"]["global"].find(5.5)["Plus"] == "-"
+
+
+def test_prematch_has_no_score():
+    info = parse_api_data(read_fixture("game_zip", "700000008_prematch.json", mode="rb"))
+
+    assert info["current_score"] is None and info["current_time"] is None
+    assert info["live_odds"]["V1"] != "N/A"
+
+
+@needs_benchmark
+def test_benchmark_parse(benchmark):
+    decoded = [decode_payload(raw) for raw in payloads()]
+    benchmark(lambda: [parse_api_data(d) for d in decoded])
+
+
+@needs_benchmark
+def test_benchmark_parse_legacy(benchmark):
+    decoded = [decode_payload(raw) for raw in payloads()]
+    benchmark(lambda: [parse_api_data_legacy(d) for d in decoded])
+
+
+@needs_benchmark
+def test_benchmark_decode_and_parse(benchmark):
+    raws = payloads()
+    benchmark(lambda: [parse_api_data(raw) for raw in raws])
@@ -0,0 +1,68 @@
+"""Chemin vectorisé (numpy) contre BettingAnalyzer.calculate_opportunity_score"""
+
+import os
+
+import pytest
+
+from conftest import ROOT_DIR
+
+np = pytest.importorskip("numpy")
+
+from monitor.batch_scoring import differential_check, score_snapshots  # noqa: E402
+from monitor.history_log import HistoryReader  # noqa: E402
+
+
+HISTORY_PATH = os.path.join(ROOT_DIR, "match", "2025-12-30", "matchs_history_log.jsonl")
+
+
+def _live(score, minute, pronostic="V1", odds=None, stats=None, **extra):
+    snap = {
+        "id": f"{pronostic}-{score}-{minute}",
+        "status": "LIVE",
+        "favori": "Nordville FC",
+        "pronostic": pronostic,
+        "cote": 1.45,
+        "score": score,
+        "game_time": f"{minute}:00",
+        "live_odds": odds if odds is not None else {"V1": 2.1, "V2": 3.4, "X": 3.2},
+        "stats": stats if stats is not None else {},
+    }
+    snap.update(extra)
+    return snap
+
+
+SNAPSHOTS = [
+    _live("0-1", 70),                                  # favori mené d'un but, tard
+    _live("0-1", 50),                                  # favori mené d'un but, tôt
+    _live("0-2", 55),                                  # favori mené largement
+    _live("1-0", 80, pronostic="V2"),                  # favori V2 mené
+    _live("0-0", 60),                                  # nul tardif, cote value
+    _live("0-0", 60, odds={"V1": 1.3, "V2": 8.0}),     # nul tardif, surveillance
+    _live("0-0", 60, odds={"V1": "N/A"}),              # cote live illisible
+    _live("1-1", 50, stats={"Attaques": {"home": "40", "away": "12"}}),
+    _live("1-1", 50, stats={"Attaques": {"home": "-", "away": "12"}}),
+    _live("2-0", 75),                                  # favori mène : rien
+    _live("0-1", 20),                                  # trop tôt
+    _live("0-1", 70, pronostic=""),                    # pas de pronostic
+    _live("?", 70),                                    # score illisible
+    _live("0-1", 70, game_time="MT"),                  # minute absente
+    _live("0-1", 70, status="FINISHED"),
+    _live("0-1", 70, status="UPCOMING"),
+]
+
+
+def test_batch_matches_scalar_path_on_synthetic_snapshots():
+    assert differential_check(SNAPSHOTS) == []
+
+
+def test_batch_raises_alerts_on_synthetic_snapshots():
+    scores = score_snapshots(SNAPSHOTS)["score"]
+    assert int((scores >= 50).sum()) > 0
+    assert int(scores[-1]) == 0
+
+
+@pytest.mark.skipif(not os.path.exists(HISTORY_PATH), reason="historique enregistré absent")
+def test_batch_matches_scalar_path_on_recorded_history():
+    snapshots = list(HistoryReader(HISTORY_PATH).iter_all())
+    assert snapshots
+    assert differential_check(snapshots) == []
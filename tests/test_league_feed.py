@@ -0,0 +1,75 @@
+"""Collecte des matchs d'une ligue depuis le flux JSON (GetChampZip / Get1x2_VZip)"""
+
+from datetime import date, datetime
+
+import pytest
+
+from conftest import read_fixture
+from monitor.league_feed import feed_mentions_league, parse_league_feed
+from monitor.league_parser import parse_league_html, today_tokens
+
+LEAGUE_FILE = "88637-england-premier-league"
+LEAGUE_URL = f"/fr/line/football/{LEAGUE_FILE}"
+DAY = date(2025, 12, 30)  # Jour d'enregistrement des fixtures
+
+
+def champ_zip():
+    return read_fixture("league_feed", "GetChampZip", f"{LEAGUE_FILE}.json", mode="rb")
+
+
+def vzip():
+    return read_fixture("league_feed", "Get1x2_VZip", f"{LEAGUE_FILE}.json", mode="rb")
+
+
+def test_champ_zip_games_of_the_day(utc):
+    matches = parse_league_feed([champ_zip()], "Premier League", LEAGUE_URL, DAY)
+
+    # 700000004 : demain (S), 700000005 : pseudo-match, 700000007 : incomplet,
+    # 800000001 : autre ligue (LI)
+    assert [m["id"] for m in matches] == ["700000001", "700000002", "700000003"]
+    first, second, third = matches
+    assert first["odds"] == {"1": "1.45", "X": "4.265", "2": "6.9"}  # E[T] 1/2/3 -> 1/X/2
+    assert second["odds"] == {"1": "2", "X": "-", "2": "3.4"}        # E en listes imbriquées
+    assert third["odds"] == {"1": "3.05", "X": "3.3", "2": "1.55"}   # T=7 ignoré
+    assert first["date"] == "30/12" and first["time"] == "15:00"
+    assert first["start_ts"] == 1767106800
+    assert first["url"] == f"{LEAGUE_URL}/700000001-nordville-fc-sudport-fc"
+
+
+def test_vzip_list_and_dedup_across_payloads(utc):
+    matches = parse_league_feed([champ_zip(), vzip()], "Premier League", LEAGUE_URL, DAY)
+
+    ids = [m["id"] for m in matches]
+    assert ids == ["700000001", "700000002", "700000008", "700000003"]  # Tri par coup d'envoi
+    by_id = {m["id"]: m for m in matches}
+    assert by_id["700000003"]["odds"]["1"] == "3.05"  # Première réponse conservée
+    assert by_id["700000008"]["odds"] == {"1": "-", "X": "-", "2": "-"}
+
+
+def test_other_day_is_empty(utc):
+    assert parse_league_feed([champ_zip()], "Premier League", LEAGUE_URL, date(2025, 12, 29)) == []
+
+
+def test_same_ids_as_the_league_page(utc):
+    feed = parse_league_feed([champ_zip()], "Premier League", LEAGUE_URL, DAY)
+    dom = parse_league_html(read_fixture("league_html", f"{LEAGUE_FILE}.html"), "Premier League",
+                            today_tokens(datetime(2025, 12, 30)))
+
+    assert [(m["id"], m["url"]) for m in feed] == [(m["id"], m["url"]) for m in dom]
+
+
+@pytest.mark.parametrize("url, expected", [
+    ("https://1xbet.cm/LineFeed/GetChampZip?sports=1&champ=88637&lng=fr", True),
+    ("https://1xbet.cm/LineFeed/Get1x2_VZip?sports=1&champs=12,88637&count=50", True),
+    ("https://1xbet.cm/LineFeed/Get1x2_VZip?sports=1&champs=886370&count=50", False),
+])
+def test_feed_mentions_league_by_url(url, expected):
+    assert feed_mentions_league(url, b"{}", "88637") is expected
+
+
+def test_feed_mentions_league_by_games():
+    url = "https://1xbet.cm/LineFeed/Get1x2_VZip?sports=1&count=50"
+    assert feed_mentions_league(url, vzip(), "88637")
+    assert feed_mentions_league(url, vzip(), "99999")
+    assert not feed_mentions_league(url, vzip(), "12345")
+    assert not feed_mentions_league(url, b"not json", "88637")
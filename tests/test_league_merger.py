@@ -0,0 +1,51 @@
+"""LeagueMerger (02_scrape.py) + tri des favoris : un changement de cote arrive jusqu'au filtre"""
+
+import importlib
+
+import pytest
+
+from monitor.favorite_filter import FavoriteSorter, parse_bands
+from monitor.storage import JsonDayStore
+
+pytest.importorskip("playwright")
+scrape = importlib.import_module("02_scrape")
+
+LEAGUE = {"id": "88637", "name": "England. Premier League", "url": "/fr/line/football/88637"}
+
+
+def _match(match_id, odd_1, odd_2="6.9"):
+    return {"id": match_id, "league": LEAGUE["name"], "time": "15:00",
+            "home": "Nordville FC", "away": "Sudport FC",
+            "odds": {"1": odd_1, "X": "4.2", "2": odd_2}, "url": f"/fr/line/football/88637/{match_id}"}
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(scrape, "PROGRESS_FILE", str(tmp_path / ".ligues_traitees.json"))
+    return JsonDayStore(root=str(tmp_path))
+
+
+def test_changed_odds_are_upserted_and_sent_downstream(store):
+    merger = scrape.LeagueMerger(store, set())
+    assert [m["id"] for m in merger.merge(LEAGUE, [_match("1", "1.45"), _match("2", "2.1")])] == ["1", "2"]
+    assert merger.merge(LEAGUE, [_match("1", "1.45"), _match("2", "2.1")]) == []
+
+    changed = merger.merge(LEAGUE, [_match("1", "1.3"), _match("2", "2.1")])
+    assert [m["odds"]["1"] for m in changed] == ["1.3"]
+    stored, _ = store.read("matches", scrape.DATE_STR)
+    assert {m["id"]: m["odds"]["1"] for m in stored} == {"1": "1.3", "2": "2.1"}
+
+    # Reprise : l'état connu vient du store
+    assert scrape.LeagueMerger(store, set()).merge(LEAGUE, [_match("1", "1.3")]) == []
+
+
+def test_changed_odds_reach_the_favorite_filter(store):
+    merger = scrape.LeagueMerger(store, set())
+    sorter = FavoriteSorter(store, scrape.DATE_STR,
+                            parse_bands("SUPER:1.0-1.25,FORT:1.25-1.45,FAVORI:1.45-1.60"))
+
+    changes = [sorter.feed(m) for m in merger.merge(LEAGUE, [_match("1", "1.5")])]
+    assert [(status, fav["bande"]) for status, fav in changes] == [("new", "FAVORI")]
+
+    changes = [sorter.feed(m) for m in merger.merge(LEAGUE, [_match("1", "1.2")])]
+    assert [(status, fav["bande"], fav["cote"]) for status, fav in changes] == [("changed", "SUPER", 1.2)]
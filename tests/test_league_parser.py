@@ -0,0 +1,41 @@
+"""Parseur lxml des pages de ligue : équivalence avec l'ancien chemin BeautifulSoup"""
+
+from datetime import datetime
+
+import pytest
+
+from conftest import read_fixture
+from monitor.league_parser import parse_league_html, parse_league_html_legacy, today_tokens
+
+LEAGUE_PAGE = "88637-england-premier-league.html"
+TOKENS = today_tokens(datetime(2025, 12, 30))  # Jour d'enregistrement de la fixture
+
+
+def test_lxml_matches_beautifulsoup_reference():
+    pytest.importorskip("bs4")
+    games_html = read_fixture("league_html", LEAGUE_PAGE)
+
+    fast = parse_league_html(games_html, "Premier League", TOKENS)
+    slow = parse_league_html_legacy(games_html, "Premier League", TOKENS)
+
+    assert fast == slow
+
+
+def test_keeps_only_today_with_known_time():
+    games_html = read_fixture("league_html", LEAGUE_PAGE)
+
+    matches = parse_league_html(games_html, "Premier League", TOKENS)
+
+    # 700000004 : demain, 700000005 : pseudo-match (corners), 700000006 : sans heure
+    assert [m["id"] for m in matches] == ["700000001", "700000002", "700000003"]
+    first, no_date, long_date = matches
+    assert first["home"] == "Nordville FC" and first["away"] == "Sudport FC"
+    assert first["odds"] == {"1": "1.45", "X": "4.265", "2": "6.9"}
+    assert no_date["date"] == "30/12"  # Date absente = jour même
+    assert no_date["odds"]["X"] == "-"
+    assert long_date["date"] == "30 décembre" and long_date["time"] == "20:45"
+
+
+def test_empty_page():
+    assert parse_league_html("", "Premier League", TOKENS) == []
+    assert parse_league_html("   ", "Premier League", TOKENS) == []
@@ -0,0 +1,50 @@
+"""Etat glissant d'un match : scans sans bloc de statistiques"""
+
+from monitor.betting_logic import BettingAnalyzer
+from monitor.match_state import MatchState
+
+
+def scan(game_time, score="0-0", stats=None):
+    return {
+        "id": "700000001", "status": "LIVE", "score": score, "game_time": game_time,
+        "match_complet": "Nordville FC vs Sudport FC", "favori": "Nordville FC",
+        "pronostic": "V1", "cote": "1.45", "live_odds": {"V1": "1.9", "V2": "4.5"},
+        "stats": stats or {},
+    }
+
+
+def danger(home, away):
+    return {"Attaques dangereuses": {"home": str(home), "away": str(away)}}
+
+
+def test_missing_stats_give_no_rate():
+    state = MatchState("700000001")
+    state.update(scan("50:00", stats=danger(40, 10)))
+    state.update(scan("55:00"))
+
+    feats = state.features()
+    assert feats["danger_per_min"] is None  # Et non (-8.0, -2.0)
+    assert feats["attacks_per_min"] is None
+    assert feats["window_minutes"] == 5
+
+
+def test_rate_when_both_endpoints_have_stats():
+    state = MatchState("700000001")
+    state.update(scan("50:00", stats=danger(40, 10)))
+    state.update(scan("52:00"))
+    state.update(scan("55:00", stats=danger(50, 15)))
+
+    assert state.features()["danger_per_min"] == (2.0, 1.0)
+
+
+def test_no_static_penalty_without_stats():
+    analyzer = BettingAnalyzer()
+    scans = [scan(t) for t in ("50:00", "55:00", "61:00")]
+    for s in scans:
+        features = analyzer.observe(s)
+    with_features = analyzer.calculate_opportunity_score(scans[-1], features)
+    without = BettingAnalyzer().calculate_opportunity_score(scans[-1])
+
+    assert with_features["score"] == without["score"]
+    assert not any("figée" in r for r in with_features["raisons"])
+    assert with_features["dynamique"]["danger_fav"] is None
@@ -0,0 +1,93 @@
+"""Invariants du PollingScheduler sur horloge simulée (monitor.polling_scheduler.simulate)"""
+
+from datetime import datetime
+
+import pytest
+
+from monitor.polling_scheduler import PollingScheduler, simulate
+from monitor.rate_limit import SimulatedClock
+
+
+MAX_POLLS_PER_MINUTE = 30
+
+
+@pytest.fixture(scope="module")
+def simulation():
+    return simulate(hours=3.0, max_polls_per_minute=MAX_POLLS_PER_MINUTE)
+
+
+def test_budget_is_respected_on_any_minute(simulation):
+    scheduler, polls, _ = simulation
+    all_polls = sorted(t for times in polls.values() for t in times)
+    limit = scheduler.budget.capacity + MAX_POLLS_PER_MINUTE
+    j = 0
+    for i, t in enumerate(all_polls):
+        while all_polls[j] <= t - 60:
+            j += 1
+        assert i - j + 1 <= limit, f"{i - j + 1} scans en 60 s (max {limit})"
+
+
+def test_hot_match_is_polled_at_hot_interval(simulation):
+    scheduler, polls, kickoff = simulation
+    policy = scheduler.policy
+    hot = [
+        t for t in polls["hot"]
+        if kickoff + (policy.hot_minute + 1) * 60 <= t <= kickoff + 110 * 60
+    ]
+    assert len(hot) > 1
+    max_gap = max(b - a for a, b in zip(hot, hot[1:]))
+    assert max_gap <= policy.HOT_INTERVAL + 60.0 / MAX_POLLS_PER_MINUTE
+
+
+def test_calm_match_stays_at_live_interval(simulation):
+    scheduler, polls, kickoff = simulation
+    live = [t for t in polls["calm"] if kickoff <= t <= kickoff + 110 * 60]
+    gaps = [b - a for a, b in zip(live, live[1:])]
+    assert gaps and min(gaps) >= scheduler.policy.LIVE_INTERVAL
+
+
+def test_finished_match_is_polled_once_and_retired(simulation):
+    scheduler, polls, _ = simulation
+    assert len(polls["morning"]) == 1
+    assert "morning" not in scheduler.matches
+    assert "morning" in scheduler.retired
+
+
+def test_evening_match_is_not_polled_early(simulation):
+    scheduler, polls, _ = simulation
+    assert not polls["tonight"]
+    assert "tonight" in scheduler.matches
+
+
+def _scheduler():
+    start = datetime.now().replace(hour=12, minute=0, second=0, microsecond=0)
+    return PollingScheduler(clock=SimulatedClock(start.timestamp()))
+
+
+def test_sync_upserts_by_id():
+    scheduler = _scheduler()
+    favorite = {"id": "1", "heure": "18:00", "pronostic": "V1", "cote": 1.5}
+    assert scheduler.sync([favorite]) == (1, 0)
+    assert scheduler.sync([dict(favorite)]) == (0, 0)
+
+    assert scheduler.sync([{**favorite, "cote": 1.3}]) == (0, 1)
+    assert scheduler.matches["1"]["cote"] == 1.3
+    assert len(scheduler) == 1
+
+
+def test_kickoff_change_reschedules():
+    scheduler = _scheduler()
+    favorite = {"id": "1", "heure": "18:00", "pronostic": "V1", "cote": 1.5}
+    scheduler.sync([favorite])
+    due = scheduler.next_due()
+
+    scheduler.upsert({**favorite, "heure": "15:00"})
+    assert scheduler.next_due() == due - 3 * 3600
+
+
+def test_retired_match_is_not_brought_back():
+    scheduler = _scheduler()
+    scheduler.sync([{"id": "1", "heure": "08:00", "pronostic": "V1"}])
+    scheduler.update("1", {"status": "FINISHED"})
+    assert scheduler.upsert({"id": "1", "heure": "08:00", "pronostic": "V1", "cote": 1.2}) is None
+    assert "1" not in scheduler.matches
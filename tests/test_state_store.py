@@ -0,0 +1,50 @@
+"""DashboardStore : alertes déjà sur disque ni réinsérées ni réécrites"""
+
+import json
+
+from monitor.state_store import DashboardStore
+
+
+class RecordingDB:
+    def __init__(self):
+        self.added = []
+
+    def add(self, kind, date_str, items):
+        self.added.append((kind, list(items)))
+
+    def upsert(self, kind, date_str, items):
+        pass
+
+
+def _store(tmp_path, alerts, db):
+    alerts_path = tmp_path / "alertes_opportunites.json"
+    alerts_path.write_text(json.dumps(alerts), encoding="utf-8")
+    store = DashboardStore(str(tmp_path / "matchs_surveillance_final.json"), str(alerts_path),
+                           lambda: alerts, min_interval=0, db=db, date_str="2025-12-30")
+    store.load()
+    return store, alerts_path
+
+
+def test_loaded_alerts_are_not_written_again(tmp_path):
+    db = RecordingDB()
+    alerts = [{"match_id": "1"}, {"match_id": "2"}]
+    store, alerts_path = _store(tmp_path, alerts, db)
+    mtime = alerts_path.stat().st_mtime_ns
+
+    store.update_match({"id": "1", "status": "LIVE"})
+    store.end_cycle()
+
+    assert db.added == []
+    assert alerts_path.stat().st_mtime_ns == mtime
+
+
+def test_only_new_alerts_are_added(tmp_path):
+    db = RecordingDB()
+    alerts = [{"match_id": "1"}]
+    store, alerts_path = _store(tmp_path, alerts, db)
+
+    alerts.append({"match_id": "3"})
+    store.flush()
+
+    assert db.added == [("alerts", [{"match_id": "3"}])]
+    assert json.loads(alerts_path.read_text(encoding="utf-8")) == alerts
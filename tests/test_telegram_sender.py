@@ -0,0 +1,113 @@
+"""Envoi Telegram contre le faux serveur Bot API : relances, 429, limites de débit"""
+
+import asyncio
+import time
+
+import pytest
+
+pytest.importorskip("aiohttp")
+
+from monitor.telegram_sender import StubTelegramServer, TelegramOutbox, TelegramSender
+
+
+class ScriptedServer(StubTelegramServer):
+    """Faux serveur dont les réponses d'erreur sont imposées (file de statuts)"""
+
+    def __init__(self, statuses=(), **kwargs):
+        super().__init__(latency=0.0, **kwargs)
+        self.statuses = list(statuses)
+
+    async def _respond(self, body):
+        if self.statuses:
+            status = self.statuses.pop(0)
+            self.requests += 1
+            if status == 429:
+                return 429, {"ok": False, "error_code": 429,
+                             "parameters": {"retry_after": self.retry_after}}
+            return status, {"ok": False, "error_code": status, "description": "erreur"}
+        return await super()._respond(body)
+
+
+def send_all(server, outbox, **sender_kwargs):
+    async def scenario():
+        await server.start()
+        try:
+            sender = TelegramSender("TEST", outbox, api_base=server.base_url, **sender_kwargs)
+            sender.BACKOFF_BASE = 0.01
+            await asyncio.wait_for(sender.run(drain=True), timeout=20)
+            return sender
+        finally:
+            await server.stop()
+    return asyncio.run(scenario())
+
+
+@pytest.fixture
+def outbox(tmp_path):
+    box = TelegramOutbox(str(tmp_path / "outbox.db"))
+    yield box
+    box.close()
+
+
+def test_retries_5xx_and_429_without_duplicates(outbox):
+    server = ScriptedServer([500, 429, 502], retry_after=0)
+    for i in range(4):
+        outbox.enqueue(f"alerte #{i}", ["1001"])
+
+    sender = send_all(server, outbox, per_chat_rate=50)
+
+    assert [text for _, text, _ in server.received] == [f"alerte #{i}" for i in range(4)]
+    assert sender.metrics == {"sent": 4, "retried": 2, "failed": 0, "rate_limited": 1}
+    assert outbox.counts() == {"sent": 4}
+
+
+def test_gives_up_after_max_attempts(outbox, monkeypatch):
+    monkeypatch.setattr(TelegramSender, "MAX_ATTEMPTS", 3)
+    server = ScriptedServer([500] * 3 + [403])
+    outbox.enqueue("alerte #0", ["1001"])
+    outbox.enqueue("alerte #1", ["1001"])
+
+    sender = send_all(server, outbox, per_chat_rate=50)
+
+    # #0 abandonnée après 3 erreurs 500, #1 refusée d'emblée (403, sans relance)
+    assert server.received == []
+    assert server.requests == 4
+    assert sender.metrics["failed"] == 2 and sender.metrics["retried"] == 2
+    assert outbox.counts() == {"failed": 2}
+
+
+def test_per_chat_rate_limit(outbox):
+    server = ScriptedServer()
+    for i in range(5):
+        outbox.enqueue(f"alerte #{i}", ["1001", "1002"])
+
+    send_all(server, outbox, per_chat_rate=10)
+
+    for chat in ("1001", "1002"):
+        times = [t for c, _, t in server.received if c == chat]
+        assert len(times) == 5
+        # Seau d'un jeton par chat : au plus 10 messages/s (petite marge d'horloge)
+        assert all(b - a >= 0.09 for a, b in zip(times, times[1:]))
+
+
+def test_global_rate_limit(outbox):
+    server = ScriptedServer()
+    for i in range(3):
+        outbox.enqueue(f"alerte #{i}", [str(1000 + c) for c in range(6)])
+
+    start = time.time()
+    send_all(server, outbox, global_rate=6, per_chat_rate=50)
+
+    # 18 messages, rafale de 6 puis 6 msg/s : au moins 2 s
+    assert len(server.received) == 18
+    assert time.time() - start >= 1.9
+
+
+def test_worker_purges_old_sent_messages(outbox):
+    outbox.enqueue("ancienne alerte", ["1001"])
+    with outbox.conn:
+        outbox.conn.execute("UPDATE outbox SET status = 'sent', created_at = 0")
+    outbox.enqueue("nouvelle alerte", ["1001"])
+
+    send_all(ScriptedServer(), outbox, per_chat_rate=50)
+
+    assert outbox.counts() == {"sent": 1}